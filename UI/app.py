@@ -20,6 +20,7 @@ if st.button("Send"):
 
         if response.status_code == 200:
             data = response.json()
+            st.session_state["run_id"] = data.get("run_id")
             
             # Display dropdowns
             with st.expander("Overview"):
@@ -69,8 +70,8 @@ if st.button("Send"):
 
 # Download button
 if st.button("Download PDF"):
-    pdf_url = f"{BACKEND_URL}api/download_pdf/"
-    response = requests.get(pdf_url)
+    pdf_url = f"{BACKEND_URL}/api/download_pdf/"
+    response = requests.get(pdf_url, params={"run_id": st.session_state.get("run_id")})
 
     if response.status_code == 200:
         st.download_button(
@@ -0,0 +1,99 @@
+"""Cold-start import benchmark for the Django project.
+
+Runs each target in a fresh interpreter under ``python -X importtime``,
+repeats it a few times and reports the best total import time together with
+the slowest top-level imports. Results can be saved as a baseline and later
+runs compared against it to track how cold start changes.
+
+Targets:
+    check   ``manage.py check`` (loads settings, apps and the URLconf)
+    worker  what a WSGI worker imports before serving: settings, the WSGI
+            application and the URLconf with all views
+
+Usage:
+    python -m benchmarks.import_time [--repeat 5] [--top 10]
+        [--save baseline.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+WORKER_SNIPPET = (
+    "import os; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings'); "
+    "from main.wsgi import application; "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+TARGETS = {
+    "check": [str(PROJECT_DIR / "manage.py"), "check"],
+    "worker": ["-c", WORKER_SNIPPET],
+}
+
+# import time:    self [us] |   cumulative | imported package
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(args):
+    """Import times of one cold run: ``(total_us, {module: cumulative_us})`` for top-level imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=PROJECT_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        tail = "\n".join(result.stderr.splitlines()[-5:])
+        raise RuntimeError(f"{' '.join(args)} exited with {result.returncode}:\n{tail}")
+
+    top_level = {}
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        # A single space of indent marks a module imported directly by the entry point
+        if match and len(match.group(3)) == 1:
+            top_level[match.group(4)] = top_level.get(match.group(4), 0) + int(match.group(2))
+    return sum(top_level.values()), top_level
+
+
+def run(targets, repeat, top):
+    results = {}
+    for name in targets:
+        runs = [measure(TARGETS[name]) for _ in range(repeat)]
+        total, modules = min(runs, key=lambda run: run[0])
+        results[name] = {"total_ms": round(total / 1000, 1)}
+        print(f"{name:<8} best of {repeat}: {total / 1000:8.1f} ms")
+        for module, cumulative in sorted(modules.items(), key=lambda item: -item[1])[:top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {module}")
+    return results
+
+
+def compare(results, baseline):
+    for name, result in results.items():
+        before = baseline.get(name, {}).get("total_ms")
+        if before:
+            after = result["total_ms"]
+            print(f"{name:<8} {before:8.1f} ms -> {after:8.1f} ms  ({(before - after) / before:+.0%} faster)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=sorted(TARGETS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against results saved with --save")
+    args = parser.parse_args()
+
+    results = run(args.targets, args.repeat, args.top)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Stage-by-stage benchmark of the research pipeline against local stand-ins.
+
+Every upstream (Google, the scraped pages, Gemini, Hugging Face, GitHub,
+Kaggle, arXiv) is served by ``benchmarks.standins`` with fixed latency, so
+the numbers measure our own overhead plus a known network cost and need no
+network access. Caches and rate limits are turned off so each repetition
+does the full work.
+
+Stages: search, scrape, context (clean/dedup/pack), overview, usecases,
+parse, resources, pdf, end_to_end (``POST /api/main/``) and async_pipeline
+(``run_research_async`` on one event loop). The median of
+each stage is compared against a stored baseline; the run fails when a
+stage is slower than ``baseline * (1 + threshold)`` by more than
+``--min-regression-ms``.
+
+Usage:
+    python -m benchmarks.pipeline [--repeat 5] [--latency 0.05] [--jitter 0.01]
+        [--error-rate 0] [--threshold 0.25] [--save-baseline]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.standins import FakeKaggleApi, StandInServer
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "pipeline.json"
+COMPANY = "Acme Mobility"
+
+
+def configure_environment(server, workdir):
+    """Point the app at the stand-ins and turn caching and rate limiting off."""
+    os.environ.update(server.env())
+    os.environ.update({
+        "DJANGO_SETTINGS_MODULE": "main.settings",
+        "RESEARCH_CACHE_DIR": str(Path(workdir) / "cache"),
+        "RESEARCH_RESULTS_DIR": str(Path(workdir) / "results"),
+        "RESEARCH_DB_PATH": str(Path(workdir) / "db.sqlite3"),
+        "LLM_CACHE_TTL": "0",
+        "SEMANTIC_CACHE_ENTRIES": "0",
+        "RESOURCE_LOOKUP_MODE": "live",
+        "PDF_PRERENDER": "",
+        # Always recompute instead of serving the previous repetition's stored run
+        "RESEARCH_FRESH_OVERVIEW": "0",
+        "RESEARCH_FRESH_USECASES": "0",
+        "RESEARCH_FRESH_RESOURCES": "0",
+    })
+    for api in ("GOOGLE", "GITHUB", "KAGGLE", "GEMINI"):
+        os.environ[f"RATE_LIMIT_{api}"] = "0"
+
+
+def timed(stages, name, func, *args, **kwargs):
+    # Start every stage with a clean heap so a collection owed to earlier stages isn't billed to this one
+    gc.collect()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    stages.setdefault(name, []).append(time.perf_counter() - start)
+    return result
+
+
+def run(repeat, server):
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from django.test import Client
+    from research_agent import clients, http_client, response_cache
+    from research_agent.pipeline import run_research_async
+    from research_agent.research_main import (
+        CONTEXT_PAGE_CHARS, search_google, scrape_urls, build_context, generate_company_overview,
+    )
+    from research_agent.usecase_main import generate_ai_usecases, parse_ai_usecases
+    from research_agent.resources_main import collect_resources_for_usecases
+    from research_agent.pdf_generator import render_pdf_bytes
+
+    call_command("migrate", verbosity=0)
+    for provider in response_cache.PROVIDER_TTLS:
+        response_cache.PROVIDER_TTLS[provider] = 0
+    clients.register_client("kaggle", lambda: FakeKaggleApi(server))
+    client = Client(SERVER_NAME="localhost")
+    # One loop for every repetition, as under an ASGI server, so its AsyncClient is reused
+    loop = asyncio.new_event_loop()
+
+    stages = {}
+    for _ in range(repeat):
+        links = timed(stages, "search", search_google, f"{COMPANY} company profile")
+        pages = timed(stages, "scrape", scrape_urls, links, char_budget=CONTEXT_PAGE_CHARS, skip_failed=True)
+        context = timed(stages, "context", build_context, pages, COMPANY)
+        overview = timed(stages, "overview", generate_company_overview, context)
+        text = timed(stages, "usecases", generate_ai_usecases, COMPANY, overview)
+        use_cases = timed(stages, "parse", parse_ai_usecases, text)
+        resources = timed(stages, "resources", collect_resources_for_usecases, use_cases)
+        payload = {
+            "message": f"Successfully completed the research for {COMPANY}",
+            "Overview": overview, "Usecases": use_cases, "Resources": resources,
+        }
+        timed(stages, "pdf", render_pdf_bytes, payload)
+        response = timed(stages, "end_to_end", client.post, "/api/main/", {"query": COMPANY},
+                         content_type="application/json")
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/main/ returned {response.status_code}")
+        timed(stages, "async_pipeline", loop.run_until_complete, run_research_async(COMPANY))
+    loop.run_until_complete(http_client.close_async())
+    loop.close()
+    return stages
+
+
+def summarize(stages):
+    return {
+        name: {"median_ms": round(statistics.median(times) * 1000, 1), "min_ms": round(min(times) * 1000, 1)}
+        for name, times in stages.items()
+    }
+
+
+def compare(summary, baseline, threshold, min_regression_ms):
+    """Print a comparison table and return the names of regressed stages."""
+    regressed = []
+    print(f"{'stage':<14} {'median':>10} {'baseline':>10} {'change':>8}")
+    for name, stats in summary.items():
+        before = baseline.get("stages", {}).get(name, {}).get("median_ms")
+        after = stats["median_ms"]
+        if before is None:
+            print(f"{name:<14} {after:>8.1f}ms {'-':>10} {'new':>8}")
+            continue
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if after > before * (1 + threshold) and after - before > min_regression_ms:
+            regressed.append(name)
+            flag = "  REGRESSED"
+        print(f"{name:<14} {after:>8.1f}ms {before:>8.1f}ms {change:>+8.0%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown per stage, as a fraction")
+    parser.add_argument("--min-regression-ms", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    settings = {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate}
+    server = StandInServer(**settings).start()
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(server, workdir)
+        try:
+            stages = run(args.repeat, server)
+        finally:
+            server.stop()
+
+    summary = summarize(stages)
+    baseline = {}
+    if Path(args.baseline).exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != settings:
+            print(f"Warning: baseline was recorded with {baseline.get('settings')}, this run uses {settings}")
+    regressed = compare(summary, baseline, args.threshold, args.min_regression_ms)
+    print(f"Upstream requests: {server.requests}")
+
+    if args.save_baseline:
+        Path(args.baseline).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"settings": settings, "repeat": args.repeat, "stages": summary}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+    elif regressed:
+        print(f"Regressed beyond {args.threshold:.0%}: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
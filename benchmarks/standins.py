@@ -0,0 +1,264 @@
+"""Local stand-ins for every upstream the research pipeline talks to.
+
+``StandInServer`` is one threaded HTTP server that answers like Google
+Custom Search, the scraped web pages, the Hugging Face Hub API, GitHub
+search, the arXiv API and the Gemini ``generateContent`` endpoint, with
+configurable latency, jitter and error rate per route. GET routes send an
+ETag and answer a matching If-None-Match with 304, as GitHub and the Hub do.
+``FakeKaggleApi`` does the same for the Kaggle SDK, which cannot be pointed
+at another host.
+
+Usage:
+    server = StandInServer(latency=0.05, jitter=0.01).start()
+    os.environ.update(server.env())   # before research_agent is imported
+    ...
+    server.stop()
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, quote, urlparse
+from xml.sax.saxutils import escape
+
+ROUTES = ("google", "page", "huggingface", "github", "arxiv", "gemini", "kaggle")
+
+SENTENCES = (
+    "{company} is a technology company founded in 2009 and headquartered in Bangalore.",
+    "The company provides ride-hailing, payments and logistics services to millions of customers.",
+    "In 2023 {company} reported revenue growth of 40 percent and expanded into three new markets.",
+    "Its platform connects drivers, merchants and riders through a single mobile application.",
+    "{company} acquired a mapping startup to improve routing and arrival time estimates.",
+    "Recent milestones include the launch of an electric vehicle fleet and a credit product.",
+    "Cookie settings and newsletter sign-up forms appear on every page of this site.",
+    "Analysts expect the market for on-demand mobility to keep growing over the next decade.",
+)
+
+USE_CASES = (
+    ("Dynamic Pricing Optimization & Demand Forecasting", "Predicts demand by location and time.", "Adjusts fares during peaks."),
+    ("Route Optimization & ETA Prediction", "Finds the fastest routes from live traffic.", "Gives riders accurate arrival times."),
+    ("Fraud Detection & Driver Monitoring", "Flags fake bookings and unsafe driving.", "Protects riders and drivers from losses."),
+    ("Personalized Recommendations & Customer Support", "Tailors offers to each rider.", "Chatbots resolve routine requests."),
+    ("Driver Allocation & Matching", "Matches riders with the best available driver.", "Cuts wait times and idle driving."),
+)
+
+
+def usecase_text(company):
+    """Gemini-style bullet list that ``usecase_main.parse_ai_usecases`` understands."""
+    blocks = [
+        f"*   **{i}. {title}:**\n"
+        f"    *   **Explanation:** {explanation}\n"
+        f"    *   **Practical Application:** {application}"
+        for i, (title, explanation, application) in enumerate(USE_CASES, 1)
+    ]
+    return f"Here are the top 5 AI use cases for {company}:\n\n" + "\n\n".join(blocks) + "\n"
+
+
+def overview_text(prompt):
+    return (
+        "The company is a fast-growing technology platform offering mobility, payments and logistics services. "
+        "Founded in 2009, it has expanded across several markets, acquired complementary startups and recently "
+        f"launched an electric fleet. (Summarized from {len(prompt)} characters of context.)"
+    )
+
+
+def query_words(search_query):
+    """Words of each OR-ed clause in an arXiv ``search_query``."""
+    clauses = re.split(r"\s+OR\s+", search_query)
+    return [re.findall(r"(?:all:)?([A-Za-z0-9]+)", clause.replace("AND", " ")) for clause in clauses]
+
+
+class StandInServer:
+    """Threaded HTTP server impersonating the pipeline's upstreams.
+
+    Args:
+        latency (float): Seconds added to every response.
+        jitter (float): Uniform +/- variation of the latency.
+        error_rate (float): Probability of answering 503 instead.
+        routes (dict, optional): Per-route overrides, e.g.
+            ``{"arxiv": {"latency": 0.5}}``; route names are in ``ROUTES``.
+        page_paragraphs (int): Paragraphs on each scraped page.
+        seed (int): Seed for jitter and error injection.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.01, error_rate=0.0, routes=None, page_paragraphs=30, seed=0):
+        self.defaults = {"latency": latency, "jitter": jitter, "error_rate": error_rate}
+        self.routes = routes or {}
+        self.page_paragraphs = page_paragraphs
+        self.requests = {route: 0 for route in ROUTES}
+        self.not_modified = {route: 0 for route in ROUTES}  # requests answered with 304
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+        self.base_url = None
+
+    def setting(self, route, name):
+        return self.routes.get(route, {}).get(name, self.defaults[name])
+
+    def delay(self, route):
+        """Sleep for the route's latency; return True when the call should fail."""
+        with self._lock:
+            self.requests[route] += 1
+            jitter = self._random.uniform(-1, 1) * self.setting(route, "jitter")
+            fail = self._random.random() < self.setting(route, "error_rate")
+        time.sleep(max(0.0, self.setting(route, "latency") + jitter))
+        return fail
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; with Nagle on, every
+            # response on a kept-alive connection would stall for a delayed ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status, body, content_type, etag=None):
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                route, handler = server.get_handler(url.path)
+                if handler is None:
+                    return self.send(404, "not found", "text/plain")
+                if server.delay(route):
+                    return self.send(503, "unavailable", "text/plain")
+                body, content_type = handler(url.path, params)
+                etag = '"%s"' % hashlib.sha1(body.encode("utf-8")).hexdigest()[:16]
+                if self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified[route] += 1
+                    return self.send(304, b"", content_type, etag)
+                self.send(200, body, content_type, etag)
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if not url.path.startswith("/gemini/") or not url.path.endswith(":generateContent"):
+                    return self.send(404, "not found", "text/plain")
+                if server.delay("gemini"):
+                    return self.send(503, json.dumps({"error": {"code": 503, "status": "UNAVAILABLE"}}), "application/json")
+                self.send(200, *server.gemini(body))
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_port}"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def env(self):
+        """Environment variables that point the research agent at this server."""
+        return {
+            "GOOGLE_SEARCH_URL": f"{self.base_url}/google/customsearch/v1",
+            "HUGGINGFACE_API_URL": f"{self.base_url}/huggingface/api",
+            "GITHUB_API_URL": f"{self.base_url}/github",
+            "ARXIV_API_URL": f"{self.base_url}/arxiv/api/query",
+            "GEMINI_BASE_URL": f"{self.base_url}/gemini/",
+            "GEMINI_API_KEY": "stand-in",
+        }
+
+    def get_handler(self, path):
+        if path.startswith("/google/"):
+            return "google", self.google
+        if path.startswith("/pages/") or path.startswith("/wikipedia.org/"):
+            return "page", self.page
+        if path.startswith("/huggingface/api/"):
+            return "huggingface", self.huggingface
+        if path.startswith("/github/search/"):
+            return "github", self.github
+        if path.startswith("/arxiv/"):
+            return "arxiv", self.arxiv
+        return None, None
+
+    # Responses
+
+    def google(self, path, params):
+        slug = quote(params.get("q", "company"))
+        links = [f"{self.base_url}/pages/{i}/{slug}" for i in range(4)]
+        links.insert(2, f"{self.base_url}/wikipedia.org/{slug}")
+        return json.dumps({"items": [{"link": link} for link in links]}), "application/json"
+
+    def page(self, path, params):
+        company = path.rsplit("/", 1)[-1].split("%20")[0] or "Company"
+        rng = random.Random(path)
+        paragraphs = [
+            " ".join(rng.choice(SENTENCES).format(company=company) for _ in range(3))
+            for _ in range(self.page_paragraphs)
+        ]
+        body = "".join(f"<p>{escape(text)} [{i}]</p>" for i, text in enumerate(paragraphs))
+        html = f"<html><head><script>var x = 1;</script></head><body><nav>Menu</nav>{body}</body></html>"
+        return html, "text/html; charset=utf-8"
+
+    def huggingface(self, path, params):
+        kind = "datasets" if path.endswith("/datasets") else "models"
+        words = re.findall(r"\w+", params.get("search", "model").lower())[:2] or ["model"]
+        limit = int(params.get("limit", 5))
+        items = [{"id": f"org{i}/{'-'.join(words)}-{kind[:-1]}-{i}"} for i in range(limit)]
+        return json.dumps(items), "application/json"
+
+    def github(self, path, params):
+        words = re.findall(r"\w+", params.get("q", "repo").lower())[:3] or ["repo"]
+        items = [
+            {"full_name": f"user{i}/{'-'.join(words)}", "html_url": f"https://github.com/user{i}/{'-'.join(words)}"}
+            for i in range(int(params.get("per_page", 5)))
+        ]
+        return json.dumps({"total_count": len(items), "items": items}), "application/json"
+
+    def arxiv(self, path, params):
+        entries = []
+        for n, words in enumerate(query_words(params.get("search_query", ""))):
+            topic = " ".join(words) or "learning"
+            for i in range(5):
+                entries.append(
+                    f"<entry><id>http://arxiv.org/abs/2401.{n:02d}{i:03d}</id>"
+                    f"<title>{escape(topic.title())}: study {i}</title>"
+                    f"<summary>We study {escape(topic)} with deep learning.</summary></entry>"
+                )
+        feed = f'<feed xmlns="http://www.w3.org/2005/Atom">{"".join(entries)}</feed>'
+        return feed, "application/atom+xml"
+
+    def gemini(self, body):
+        prompt = " ".join(
+            part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])
+        )
+        match = re.search(r"that (.+?) can implement", prompt)
+        text = usecase_text(match.group(1)) if match else overview_text(prompt)
+        response = {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4},
+        }
+        return json.dumps(response), "application/json"
+
+
+class FakeKaggleApi:
+    """Stand-in for ``KaggleApi`` with the latency settings of a ``StandInServer``."""
+
+    def __init__(self, server):
+        self.server = server
+
+    def dataset_list(self, search="", page=1, **kwargs):
+        if self.server.delay("kaggle"):
+            raise RuntimeError("Kaggle stand-in: 503 Service Unavailable")
+        slug = "-".join(re.findall(r"\w+", search.lower())[:3]) or "data"
+        return [SimpleNamespace(ref=f"owner{i}/{slug}", title=slug, subtitle="", lastUpdated="") for i in range(20)]
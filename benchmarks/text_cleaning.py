@@ -0,0 +1,90 @@
+"""Micro-benchmark for the scraped-text cleaning pipeline.
+
+Compares the legacy chain (clean_irrelevant_content -> clean_text ->
+truncate_text -> remove_duplicates) with the single-pass TextCleaner on
+synthetic scraped corpora of a few megabytes.
+
+Usage:
+    python -m benchmarks.text_cleaning [--sizes 1 4 16] [--repeat 5]
+"""
+import argparse
+import random
+import time
+
+from research_agent.format_result import (
+    TextCleaner, clean_irrelevant_content, clean_text, remove_duplicates, truncate_text,
+)
+
+WORDS = (
+    "company founded revenue platform customers market growth product services "
+    "global technology investors headquarters employees acquisition launch"
+).split()
+BOILERPLATE = ["Read our blog.", "Cookie settings.", "Share this article."]
+
+
+def make_corpus(size_mb, seed=0, stop_phrase_at=None):
+    """Build ~size_mb of sentence-like text with citations, repeats and ragged spacing."""
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    parts = []
+    length = 0
+    while length < target:
+        if rng.random() < 0.1:
+            sentence = rng.choice(BOILERPLATE)
+        else:
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+            if rng.random() < 0.2:
+                words.append(f"[{rng.randint(1, 40)}]")
+            sentence = " ".join(words).capitalize() + "."
+        parts.append(sentence + rng.choice([" ", "  ", "\n", " \t "]))
+        length += len(parts[-1])
+    text = "".join(parts)
+    if stop_phrase_at is not None:
+        cut = int(len(text) * stop_phrase_at)
+        text = text[:cut] + " Privacy Policy " + text[cut:]
+    return text
+
+
+def legacy(text, limit):
+    return remove_duplicates(truncate_text(clean_irrelevant_content(clean_text(text)), limit))
+
+
+def best_of(func, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(sizes, repeat):
+    rows = []
+    for size in sizes:
+        for label, stop_at, limit in (
+            ("no stop phrase, limit 3000", None, 3000),
+            ("stop phrase at 90%, no limit", 0.9, None),
+        ):
+            text = make_corpus(size, stop_phrase_at=stop_at)
+            legacy_limit = limit if limit is not None else len(text)
+            cleaner = TextCleaner(limit=limit)
+            old = best_of(lambda t: legacy(t, legacy_limit), text, repeat)
+            new = best_of(cleaner.clean, text, repeat)
+            rows.append((size, label, old, new))
+            print(
+                f"{size:>4} MB  {label:<30} legacy {old * 1000:9.1f} ms  "
+                f"single-pass {new * 1000:9.1f} ms  ({size / new:8.1f} MB/s, x{old / new:.1f})"
+            )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4, 16], help="corpus sizes in MB")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
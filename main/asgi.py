@@ -12,5 +12,14 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
+# Serve the research endpoints with the async views (see RESEARCH_ASYNC_VIEWS in settings)
+os.environ.setdefault('RESEARCH_ASYNC_VIEWS', 'true')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402 (configured by get_asgi_application)
+from .static import StaticFilesApplication  # noqa: E402
+
+application = StaticFilesApplication(
+    django_application, settings.STATIC_ROOT, settings.STATIC_URL, max_age=0 if settings.DEBUG else 60,
+)
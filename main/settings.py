@@ -61,8 +61,34 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'research_agent.profiling.ProfilingMiddleware',
 ]
 
+# Serve /api/main/ and /api/download_pdf/ with native async views. main/asgi.py turns this on, so an ASGI
+# server (uvicorn) runs the pipeline on its event loop; WSGI servers keep the sync views.
+RESEARCH_ASYNC_VIEWS = os.getenv("RESEARCH_ASYNC_VIEWS", "false").lower() in ("1", "true", "yes")
+if RESEARCH_ASYNC_VIEWS:
+    # WhiteNoiseMiddleware is sync-only and would put every request through a thread; main/asgi.py
+    # serves the collected static files with WhiteNoise in front of Django instead
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
+# On-demand profiling: a request to one of these paths with an "X-Profile" header is profiled when
+# RESEARCH_PROFILING is on. The header must equal RESEARCH_PROFILING_TOKEN when one is set, otherwise
+# it only works for staff users. Results are listed at /api/profiles/ (staff only).
+RESEARCH_PROFILING = os.getenv("RESEARCH_PROFILING", "false").lower() in ("1", "true", "yes")
+RESEARCH_PROFILING_TOKEN = os.getenv("RESEARCH_PROFILING_TOKEN", "")
+RESEARCH_PROFILING_PATHS = ["/api/main/", "/api/download_pdf/"]
+RESEARCH_PROFILING_KEEP = 100  # stored profiles
+
+# Seconds a stage's stored output is reused by /api/main/ for the same company before it is recomputed
+# (0 always recomputes that stage). A stage is only reused if the stages before it are, and a request
+# can send "force_refresh": true, or the names of the stages to recompute, to bypass the stored run.
+RESEARCH_FRESHNESS = {
+    "overview": int(os.getenv("RESEARCH_FRESH_OVERVIEW", 7 * 24 * 3600)),
+    "usecases": int(os.getenv("RESEARCH_FRESH_USECASES", 7 * 24 * 3600)),
+    "resources": int(os.getenv("RESEARCH_FRESH_RESOURCES", 24 * 3600)),
+}
+
 ROOT_URLCONF = 'main.urls'
 
 TEMPLATES = [
@@ -90,7 +116,7 @@ WSGI_APPLICATION = 'main.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv("RESEARCH_DB_PATH", BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -176,5 +202,16 @@ LOGGING = {
             "level": "ERROR",
             "propagate": False,
         },
+        "research_agent": {
+            "handlers": ["file", "console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        # Span records from research_agent.telemetry, one JSON object per line
+        "research_agent.trace": {
+            "handlers": ["file"],
+            "level": os.getenv("RESEARCH_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
     },
 }
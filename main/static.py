@@ -0,0 +1,50 @@
+"""
+Collected static files for the ASGI application.
+
+WhiteNoiseMiddleware is sync-only: in an async middleware chain every
+request would be handed to a thread. Under ASGI the files are served by
+WhiteNoise in front of Django instead, with the same caching headers,
+conditional requests and ranges, and everything else goes to Django.
+"""
+import asyncio
+from whitenoise import WhiteNoise
+
+CHUNK_SIZE = 64 * 1024
+# ManifestStaticFilesStorage names, e.g. base.5af66c1b1797.css, never change content
+IMMUTABLE_FILE_TEST = r"^.+\.[0-9a-f]{12}\..+$"
+
+
+class StaticFilesApplication:
+    def __init__(self, application, root, prefix, max_age=60):
+        self.application = application
+        self.whitenoise = WhiteNoise(
+            None, root=root, prefix=prefix, max_age=max_age, immutable_file_test=IMMUTABLE_FILE_TEST,
+        )
+
+    async def __call__(self, scope, receive, send):
+        static_file = self.whitenoise.files.get(scope["path"]) if scope["type"] == "http" else None
+        if static_file is None:
+            return await self.application(scope, receive, send)
+
+        # WhiteNoise reads request headers in WSGI environ form
+        environ = {
+            "HTTP_" + name.decode("latin-1").upper().replace("-", "_"): value.decode("latin-1")
+            for name, value in scope["headers"]
+        }
+        response = await asyncio.to_thread(static_file.get_response, scope["method"], environ)
+        await send({
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in response.headers],
+        })
+        if response.file is None:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        try:
+            while True:
+                chunk = await asyncio.to_thread(response.file.read, CHUNK_SIZE)
+                await send({"type": "http.response.body", "body": chunk, "more_body": bool(chunk)})
+                if not chunk:
+                    break
+        finally:
+            response.file.close()
@@ -17,9 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from .views import welcome
+from research_agent.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', welcome),
     path('api/', include('research_agent.urls')),
+    path('metrics', metrics, name="metrics"),
 ]
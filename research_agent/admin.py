@@ -1,3 +1,26 @@
 from django.contrib import admin
+from .models import CompanyOverview, ResearchRun, ResourceEntry, UseCase
 
-# Register your models here.
+
+class UseCaseInline(admin.TabularInline):
+    model = UseCase
+    fields = ("position", "title")
+    extra = 0
+
+
+@admin.register(ResearchRun)
+class ResearchRunAdmin(admin.ModelAdmin):
+    list_display = ("company_name", "run_id", "created_at", "overview_generated_at", "resources_generated_at")
+    search_fields = ("company_name", "run_id")
+    date_hierarchy = "created_at"
+    inlines = [UseCaseInline]
+
+
+@admin.register(ResourceEntry)
+class ResourceEntryAdmin(admin.ModelAdmin):
+    list_display = ("name", "provider", "use_case", "is_error")
+    list_filter = ("provider", "is_error")
+    search_fields = ("name", "url")
+
+
+admin.site.register(CompanyOverview)
@@ -0,0 +1,42 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from .forking import register_fork_reset
+from .telemetry import in_context
+
+# Threads for blocking calls made from the event loop: SDK requests (Gemini, Kaggle) and the
+# file-locked rate limit buckets. The default executor has only min(32, cpus + 4) threads and
+# would cap how many completions one ASGI worker can have in flight.
+BLOCKING_WORKERS = int(os.getenv("RESEARCH_BLOCKING_WORKERS", 64))
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="research-blocking")
+        return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Await ``func(*args, **kwargs)`` run in the blocking-call pool.
+
+    Like ``asyncio.to_thread``, the call sees the caller's context, so its
+    spans join the caller's trace.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), in_context(partial(func, *args, **kwargs)))
+
+
+def _reset_after_fork():
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+
+
+register_fork_reset(_reset_after_fork)
@@ -0,0 +1,279 @@
+import csv
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from .forking import register_fork_reset
+from .pipeline import run_research
+from .history import record_run
+from .result_store import RESULTS_DIR, atomic_write, normalize_company, save_result
+
+BULK_WORKERS = int(os.getenv("RESEARCH_BULK_WORKERS", 4))  # companies researched at once per batch
+MAX_BATCH_COMPANIES = int(os.getenv("RESEARCH_MAX_BATCH_COMPANIES", 1000))
+MAX_RUNNING_BATCHES = 2
+BATCHES_DIR = RESULTS_DIR / "batches"
+
+COMPANY_FIELDS = ("company", "query", "name", "company_name")
+_EXPECTED_COMPANY = f"neither a non-empty name nor an object with one of: {', '.join(COMPANY_FIELDS)}"
+
+
+def _company_name(item):
+    """The company name in a JSON item: a string, or an object naming it under a ``COMPANY_FIELDS`` key."""
+    if isinstance(item, dict):
+        item = next((item[field] for field in COMPANY_FIELDS if item.get(field)), None)
+    if isinstance(item, str) and item.strip():
+        return item.strip()
+    return None
+
+
+def read_companies(path):
+    """Company names from a CSV (a company/query/name column, else the first), JSONL or plain-text file."""
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix == ".csv":
+            rows = list(csv.reader(f))
+            if not rows:
+                return []
+            header = [cell.strip().lower() for cell in rows[0]]
+            column = next((header.index(field) for field in COMPANY_FIELDS if field in header), None)
+            if column is None:
+                return [row[0].strip() for row in rows if row and row[0].strip()]
+            return [row[column].strip() for row in rows[1:] if len(row) > column and row[column].strip()]
+
+        if path.suffix in (".jsonl", ".ndjson"):
+            companies = []
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                name = _company_name(json.loads(line))
+                if name is None:
+                    raise ValueError(f"line {number} is {_EXPECTED_COMPANY}")
+                companies.append(name)
+            return companies
+
+        return [line.strip() for line in f if line.strip()]
+
+
+def parse_companies(value):
+    """Company names from a request's ``companies`` value.
+
+    A list holds names or objects like the lines of a JSONL file; a string
+    holds one name per line or comma.
+
+    Raises:
+        ValueError: If ``value`` is neither a list nor a string, or a list
+            item names no company.
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [name.strip() for name in re.split(r"[\n,]", value) if name.strip()]
+    if not isinstance(value, (list, tuple)):
+        raise ValueError("companies must be a list of names or a string of names separated by newlines or commas")
+    companies = []
+    for index, item in enumerate(value):
+        name = _company_name(item)
+        if name is None:
+            raise ValueError(f"companies[{index}] is {_EXPECTED_COMPANY}")
+        companies.append(name)
+    return companies
+
+
+def finished_companies(output_path):
+    """Normalized names of companies that already succeeded in an output file."""
+    done = set()
+    try:
+        with open(output_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                if record.get("status") == "succeeded":
+                    done.add(normalize_company(record["company"]))
+    except OSError:
+        pass
+    return done
+
+
+def _open_for_append(output_path):
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    f = open(output_path, "a+b")
+    # Start on a fresh line if the last run died mid-write
+    if f.tell() > 0:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+    return f
+
+
+def _research_one(company_name, sources):
+    start = time.perf_counter()
+    try:
+        result = run_research(company_name, sources=sources)
+        run_id = save_result(company_name, result)
+        record_run(run_id, company_name, result, sources)
+    except Exception as e:
+        return {"company": company_name, "status": "failed", "error": str(e),
+                "seconds": round(time.perf_counter() - start, 2)}
+    return {"company": company_name, "status": "succeeded", "run_id": run_id,
+            "seconds": round(time.perf_counter() - start, 2), "result": result}
+
+
+def run_bulk(companies, output_path, workers=BULK_WORKERS, sources=None, on_record=None):
+    """Research every company and append one JSON line per company to ``output_path``.
+
+    Companies that already succeeded in ``output_path`` are skipped, so
+    re-running an interrupted batch with the same output file resumes it;
+    failed companies are retried. Duplicate names are researched once.
+    All companies share the process-wide caches and rate limits.
+
+    Args:
+        companies (list): Company names.
+        output_path (str | Path): JSONL file that doubles as the checkpoint.
+        workers (int): Companies researched concurrently.
+        sources (list, optional): Resource providers to query.
+        on_record (callable, optional): ``on_record(record)`` called after
+            each line is written.
+
+    Returns:
+        dict: Counts of ``total``, ``skipped``, ``succeeded`` and ``failed`` companies.
+    """
+    done = finished_companies(output_path)
+    todo = {}
+    for company in companies:
+        key = normalize_company(company)
+        if key and key not in done:
+            todo.setdefault(key, company)
+
+    summary = {"total": len(companies), "skipped": len(companies) - len(todo), "succeeded": 0, "failed": 0}
+    if not todo:
+        return summary
+
+    lock = threading.Lock()
+    with _open_for_append(output_path) as out, ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(todo))), thread_name_prefix="research-bulk"
+    ) as executor:
+        futures = [executor.submit(_research_one, company, sources) for company in todo.values()]
+        for future in as_completed(futures):
+            record = future.result()
+            line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+            with lock:
+                out.write(line.encode("utf-8"))
+                out.flush()
+                os.fsync(out.fileno())
+                summary[record["status"]] += 1
+            print(f"Bulk research: {record['company']} {record['status']} in {record['seconds']}s")
+            if on_record is not None:
+                on_record(record)
+    return summary
+
+
+# Batches submitted through the API run in the background and keep their state next to the output
+
+_batches_lock = threading.Lock()
+_running = set()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_RUNNING_BATCHES, thread_name_prefix="research-batch")
+        return _executor
+
+
+def batch_output_path(batch_id):
+    return BATCHES_DIR / f"{batch_id}.jsonl"
+
+
+def _state_path(batch_id):
+    return BATCHES_DIR / f"{batch_id}.json"
+
+
+def _save_state(state):
+    atomic_write(_state_path(state["batch_id"]), json.dumps(state, ensure_ascii=False).encode("utf-8"))
+
+
+def get_batch(batch_id):
+    """Return the stored state of a batch, or None if it is unknown."""
+    try:
+        uuid.UUID(hex=batch_id)
+        with open(_state_path(batch_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (ValueError, OSError):
+        return None
+
+
+def _run_batch(state):
+    def on_record(record):
+        with _batches_lock:
+            state[record["status"]] += 1
+            _save_state(state)
+
+    try:
+        summary = run_bulk(
+            state["companies"], batch_output_path(state["batch_id"]),
+            workers=state["workers"], sources=state["sources"], on_record=on_record,
+        )
+        with _batches_lock:
+            state.update(summary, status="finished", finished_at=time.time())
+            _save_state(state)
+    except Exception as e:
+        with _batches_lock:
+            state.update(status="failed", error=str(e), finished_at=time.time())
+            _save_state(state)
+        print(f"Bulk batch {state['batch_id']} failed: {e}")
+    finally:
+        with _batches_lock:
+            _running.discard(state["batch_id"])
+
+
+def submit_batch(companies=None, workers=BULK_WORKERS, sources=None, batch_id=None):
+    """Start a background batch, or resume ``batch_id`` from its checkpoint.
+
+    Raises:
+        ValueError: If there are no companies, too many, or ``batch_id`` is unknown.
+    """
+    if batch_id is not None:
+        state = get_batch(batch_id)
+        if state is None:
+            raise ValueError("Unknown batch id")
+    else:
+        companies = list(companies or [])
+        if not companies:
+            raise ValueError("No companies given")
+        if len(companies) > MAX_BATCH_COMPANIES:
+            raise ValueError(f"At most {MAX_BATCH_COMPANIES} companies per batch")
+        state = {"batch_id": uuid.uuid4().hex, "companies": companies, "workers": workers, "sources": sources,
+                 "created_at": time.time()}
+
+    with _batches_lock:
+        if state["batch_id"] in _running:
+            return state
+        _running.add(state["batch_id"])
+        done = len(finished_companies(batch_output_path(state["batch_id"])))
+        state.update(status="running", total=len(state["companies"]), skipped=done, succeeded=0, failed=0,
+                     error=None, finished_at=None)
+        _save_state(state)
+
+    _get_executor().submit(_run_batch, state)
+    return state
+
+
+def _reset_after_fork():
+    global _batches_lock, _executor, _executor_lock
+    _batches_lock = threading.Lock()
+    _executor_lock = threading.Lock()
+    _executor = None
+    _running.clear()
+
+
+register_fork_reset(_reset_after_fork)
@@ -0,0 +1,69 @@
+import os
+import threading
+from .forking import register_fork_reset
+
+# Name -> zero-argument callable that builds the client
+_factories = {}
+_clients = {}
+_lock = threading.Lock()
+
+
+def register_client(name, factory):
+    """Register how to build a shared client; replaces any client already built."""
+    with _lock:
+        _factories[name] = factory
+        _clients.pop(name, None)
+
+
+def get_client(name):
+    """Return the shared client for ``name``, building it on first use.
+
+    Building happens at most once per process; if the factory raises, the
+    error propagates and the next call tries again.
+    """
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                if name not in _factories:
+                    raise KeyError(f"No client registered as {name!r}")
+                client = _clients[name] = _factories[name]()
+    return client
+
+
+def reset_clients(*names):
+    """Drop built clients (all of them when no names are given) so they are rebuilt on next use."""
+    with _lock:
+        for name in names or list(_clients):
+            _clients.pop(name, None)
+
+
+def _make_gemini():
+    # google.genai takes the better part of a second to import; keep it off the boot path
+    from google import genai
+    base_url = os.getenv("GEMINI_BASE_URL")
+    http_options = {"base_url": base_url} if base_url else None
+    return genai.Client(api_key=os.getenv("GEMINI_API_KEY"), http_options=http_options)
+
+
+def _make_kaggle():
+    # Importing the kaggle package authenticates; it reads KAGGLE_USERNAME/KAGGLE_KEY
+    # from the environment or ~/.kaggle/kaggle.json
+    from kaggle.api.kaggle_api_extended import KaggleApi
+    api = KaggleApi()
+    api.authenticate()
+    return api
+
+
+register_client("gemini", _make_gemini)
+register_client("kaggle", _make_kaggle)
+
+
+def _reset_after_fork():
+    global _lock
+    _lock = threading.Lock()
+    _clients.clear()
+
+
+register_fork_reset(_reset_after_fork)
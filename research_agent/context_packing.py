@@ -0,0 +1,91 @@
+import re
+from collections import Counter
+import numpy as np
+from .near_dedup import split_passages
+from .tokens import count_tokens
+
+CONTEXT_TOKEN_BUDGET = 800  # tokens of scraped context sent to the overview prompt
+
+# Terms the overview prompt asks about, added to every company query
+OVERVIEW_QUERY_TERMS = (
+    "company business products services founded headquarters revenue "
+    "customers market acquisition launched milestones recent"
+)
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TERM_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TERM_RE.findall(text.lower())
+
+
+def bm25_scores(passages, query):
+    """BM25 score of each passage against the query terms.
+
+    Only the query terms are counted, so the term-frequency matrix is
+    (passages x query terms) and the scoring is a handful of NumPy ops.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not passages or not terms:
+        return np.zeros(len(passages))
+
+    column = {term: j for j, term in enumerate(terms)}
+    tf = np.zeros((len(passages), len(terms)))
+    lengths = np.zeros(len(passages))
+    for i, passage in enumerate(passages):
+        words = tokenize(passage)
+        lengths[i] = len(words)
+        for term, count in Counter(w for w in words if w in column).items():
+            tf[i, column[term]] = count
+
+    df = (tf > 0).sum(axis=0)
+    idf = np.log1p((len(passages) - df + 0.5) / (df + 0.5))
+    avg_length = lengths.mean() or 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length)
+    return ((tf * (BM25_K1 + 1)) / (tf + norm[:, None]) * idf).sum(axis=1)
+
+
+def pack_context(texts, company_name, token_budget=CONTEXT_TOKEN_BUDGET):
+    """Pick the passages most relevant to the company that fit in ``token_budget``.
+
+    ``texts`` are the scraped pages in rank order. Passages are scored with
+    BM25 against the company name plus ``OVERVIEW_QUERY_TERMS`` (the name
+    counts twice), packed greedily by score, and returned in their original
+    reading order.
+
+    Returns:
+        tuple: ``(context, stats)``; ``stats`` has passage and token counts.
+    """
+    passages = [passage for text in texts for passage in split_passages(text)]
+    stats = {"passages": len(passages), "packed_passages": 0, "tokens": 0, "token_budget": token_budget}
+    if not passages:
+        return "", stats
+
+    query = f"{company_name} {company_name} {OVERVIEW_QUERY_TERMS}"
+    scores = bm25_scores(passages, query)
+    # Highest score first; earlier (better-ranked source) passages win ties
+    order = sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+
+    chosen = []
+    used = 0
+    for i in order:
+        tokens = count_tokens(passages[i]) + 1  # +1 for the joining space
+        if used + tokens <= token_budget:
+            chosen.append(i)
+            used += tokens
+
+    # Joining can merge tokens differently; trim the weakest passages until the real count fits
+    chosen.sort()
+    context = " ".join(passages[i] for i in chosen)
+    total = count_tokens(context)
+    while chosen and total > token_budget:
+        chosen.remove(min(chosen, key=lambda i: (scores[i], -i)))
+        context = " ".join(passages[i] for i in chosen)
+        total = count_tokens(context)
+
+    stats["packed_passages"] = len(chosen)
+    stats["tokens"] = total
+    return context, stats
@@ -0,0 +1,115 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .telemetry import in_context
+
+TIMED_OUT = object()
+
+
+def fan_out(tasks, limits, deadline, default_limit=2, on_result=None):
+    """Run independent lookups concurrently and collect their results.
+
+    Args:
+        tasks (list): ``(key, group, func, args)`` tuples. ``group`` names the
+            upstream the task talks to and is used for the concurrency cap.
+        limits (dict): Maximum number of in-flight tasks for each group.
+        deadline (float): Seconds to wait for the whole batch.
+        default_limit (int): Cap for groups missing from ``limits``.
+        on_result (callable, optional): ``on_result(key, result)`` called from
+            a worker thread as soon as each task finishes within the deadline.
+
+    Returns:
+        dict: ``key -> result``. Tasks still queued or running when the
+        deadline expires map to ``TIMED_OUT``; tasks that raised map to the
+        exception instance.
+    """
+    results = {}
+    if not tasks:
+        return results
+
+    queues = {}
+    for task in tasks:
+        queues.setdefault(task[1], []).append(task)
+
+    # Re-entrant: a future that is already done runs its callback in the submitting thread.
+    # Tasks are also submitted from done callbacks in worker threads; run them all in the caller's context.
+    context = contextvars.copy_context()
+    lock = threading.RLock()
+    finished = threading.Event()
+    state = {"remaining": len(tasks), "closed": False}
+    executor = ThreadPoolExecutor(
+        max_workers=sum(min(limits.get(group, default_limit), len(queue)) for group, queue in queues.items())
+    )
+
+    def submit_next(group):
+        # Caller holds the lock.
+        if state["closed"] or not queues[group]:
+            return
+        key, _, func, args = queues[group].pop(0)
+        future = executor.submit(in_context(func, context), *args)
+        future.add_done_callback(lambda f, key=key, group=group: on_done(key, group, f))
+
+    def on_done(key, group, future):
+        with lock:
+            if state["closed"]:
+                return
+            error = future.exception()
+            result = results[key] = error if error is not None else future.result()
+            state["remaining"] -= 1
+            last = state["remaining"] == 0
+            if not last:
+                submit_next(group)
+        if on_result is not None:
+            on_result(key, result)
+        if last:
+            finished.set()
+
+    with lock:
+        for group, queue in queues.items():
+            for _ in range(min(limits.get(group, default_limit), len(queue))):
+                submit_next(group)
+
+    finished.wait(timeout=deadline)
+
+    with lock:
+        state["closed"] = True
+        for key, *_ in tasks:
+            results.setdefault(key, TIMED_OUT)
+
+    # Running lookups finish in the background; their results are discarded.
+    executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+async def fan_out_async(tasks, limits, deadline, default_limit=2, on_result=None):
+    """``fan_out`` for coroutines: ``func`` in each task is a coroutine function.
+
+    Everything runs on the calling event loop. Tasks still queued or running
+    at the deadline are cancelled rather than left to finish.
+    """
+    results = {}
+    if not tasks:
+        return results
+
+    semaphores = {group: asyncio.Semaphore(limits.get(group, default_limit)) for _, group, _, _ in tasks}
+
+    async def run(key, group, func, args):
+        async with semaphores[group]:
+            try:
+                result = await func(*args)
+            except Exception as e:
+                result = e
+        results[key] = result
+        if on_result is not None:
+            on_result(key, result)
+
+    running = [asyncio.ensure_future(run(*task)) for task in tasks]
+    _, not_done = await asyncio.wait(running, timeout=deadline)
+    for task in not_done:
+        task.cancel()
+
+    for key, *_ in tasks:
+        results.setdefault(key, TIMED_OUT)
+    return results
+
@@ -0,0 +1,10 @@
+import os
+
+# Locks, pools and caches held at module level must not be shared with forked workers
+# (gunicorn, the bulk runner). Modules register a callback that rebuilds them in the child.
+
+
+def register_fork_reset(callback):
+    """Call ``callback`` in the child after every ``os.fork``; a no-op where fork is unavailable."""
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=callback)
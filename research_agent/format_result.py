@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 
 def remove_duplicates(text):
     """Remove duplicate paragraphs by normalizing spaces and removing repeats."""
@@ -23,4 +24,105 @@ def clean_irrelevant_content(text):
     stop_phrases = ["Newsletter", "Privacy Policy", "Terms of Service", "Sign In", "Founder first", "Start your day"]
     for phrase in stop_phrases:
         text = text.split(phrase)[0]  
-    return text.strip()
\ No newline at end of file
+    return text.strip()
+
+# Phrases that mark the start of page chrome; everything after the first one is dropped
+STOP_PHRASES = ["Newsletter", "Privacy Policy", "Terms of Service", "Sign In", "Founder first", "Start your day"]
+
+
+class TextCleaner:
+    """Single-pass replacement for the clean_irrelevant_content -> truncate_text
+    -> remove_duplicates chain, with citation removal (clean_text) folded in.
+
+    The input is walked once, front to back, in whitespace-aligned windows.
+    Each window goes through precompiled patterns (one alternation for all
+    stop phrases, one for citations, one for whitespace runs) and its
+    sentences are deduplicated and packed until ``limit`` characters are
+    collected. Scanning stops at the first stop phrase or as soon as the
+    limit is reached, so the work is bounded by the output size, not by the
+    size of the scraped corpus.
+    """
+
+    CITATION_RE = re.compile(r"\[\d+\]")
+    WHITESPACE_RE = re.compile(r"\s+")
+    # Window boundary: start of a whitespace run with no citation on either side
+    BOUNDARY_RE = re.compile(r"(?<=[^\s\]])(?=\s+[^\s\[])")
+
+    def __init__(self, stop_phrases=STOP_PHRASES, limit=3000, window=None):
+        self.limit = limit
+        self.window = window or (max(4 * limit, 64 * 1024) if limit else 1024 * 1024)
+        self.stop_re = None
+        self.max_phrase = 0
+        if stop_phrases:
+            # Longest first so overlapping phrases cut at the same place str.split would
+            phrases = sorted(set(stop_phrases), key=len, reverse=True)
+            self.stop_re = re.compile("|".join(map(re.escape, phrases)))
+            self.max_phrase = len(phrases[0])
+
+    def clean(self, text):
+        limit = self.limit
+        sentences = []
+        seen = set()
+        length = 0  # len(". ".join(sentences))
+        truncated = hard_cut = False
+        carry = ""  # unfinished sentence from the previous window
+        started = False
+        position = 0
+        n = len(text)
+
+        while position < n:
+            # Extend the window to a boundary so no token, citation or whitespace run is split
+            end = min(position + self.window, n)
+            if end < n:
+                match = self.BOUNDARY_RE.search(text, end)
+                end = match.start() if match else n
+            last = end == n
+            if self.stop_re is not None:
+                stop = self.stop_re.search(text, position, min(end + self.max_phrase, n))
+                if stop is not None and stop.start() < end:
+                    end, last = stop.start(), True
+
+            chunk = self.WHITESPACE_RE.sub(" ", self.CITATION_RE.sub("", text[position:end]))
+            position = end
+            if not started:
+                chunk = chunk.lstrip()
+                started = bool(chunk)
+            chunk = carry + chunk
+            if last:
+                chunk = chunk.rstrip()
+
+            parts = chunk.split(". ")
+            carry = "" if last else parts.pop()
+            for sentence in parts:
+                if sentence in seen:
+                    continue
+                added = len(sentence) + (2 if sentences else 0)
+                if limit is not None and length + added + 1 > limit:
+                    truncated = True
+                    if not sentences:
+                        sentences.append(sentence[:limit])
+                        hard_cut = True
+                    break
+                seen.add(sentence)
+                sentences.append(sentence)
+                length += added
+            if truncated or last:
+                break
+
+        cleaned = ". ".join(sentences)
+        if truncated and not hard_cut:
+            cleaned += "."
+        return cleaned
+
+
+@lru_cache(maxsize=16)
+def _default_cleaner(limit):
+    # Building a cleaner sorts and compiles the stop phrases; callers use only a few limits
+    return TextCleaner(STOP_PHRASES, limit)
+
+
+def clean_scraped_text(text, limit=3000, stop_phrases=None):
+    """Cut page chrome, drop citations, normalize spaces, dedup sentences and truncate in one pass."""
+    if stop_phrases is None:
+        return _default_cleaner(limit).clean(text)
+    return TextCleaner(stop_phrases, limit).clean(text)
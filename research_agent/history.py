@@ -0,0 +1,243 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, transaction
+from django.db.models import Count
+from django.utils import timezone
+from .models import CompanyOverview, ResearchRun, ResourceEntry, UseCase
+from .pipeline import STAGES
+from .providers import is_error_result, select_providers
+from .result_store import normalize_company
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+
+def freshness():
+    """Freshness window of each stage in seconds, from ``RESEARCH_FRESHNESS``; missing stages are never reused."""
+    return dict(getattr(settings, "RESEARCH_FRESHNESS", {}))
+
+
+def parse_refresh(value):
+    """Stages a request wants recomputed, from its ``force_refresh`` value.
+
+    ``true`` refreshes every stage; stage names (a list or comma-separated
+    string) refresh the earliest of them and every stage after it, since
+    later stages are built from earlier ones.
+
+    Raises:
+        ValueError: If ``value`` names an unknown stage.
+    """
+    if value in (None, False, ""):
+        return set()
+    if isinstance(value, str):
+        if value.lower() in ("1", "true", "yes"):
+            return set(STAGES)
+        if value.lower() in ("0", "false", "no"):
+            return set()
+        value = [name.strip() for name in value.split(",") if name.strip()]
+    if value is True or not isinstance(value, (list, tuple)):
+        return set(STAGES) if value else set()
+    unknown = [name for name in value if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(map(str, unknown))}; expected some of: {', '.join(STAGES)}")
+    first = min(STAGES.index(name) for name in value) if value else len(STAGES)
+    return set(STAGES[first:])
+
+
+def _source_names(sources):
+    return [provider.name for provider in select_providers(sources)]
+
+
+def _generated_at(run, stage):
+    return getattr(run, f"{stage}_generated_at")
+
+
+def reusable_stages(company_name, sources=None, refresh=(), now=None):
+    """Stored stage outputs for ``company_name`` that are still fresh.
+
+    Looks at the newest recorded run of the company. Stages are reused in
+    pipeline order and only while each one is within its freshness window
+    and not in ``refresh``; use cases must not be empty, and resources also
+    need the same ``sources`` and no failed lookups.
+
+    Returns:
+        tuple: ``(run, reuse)`` where ``reuse`` maps stage names to their
+        stored payload; ``(None, {})`` when nothing can be reused.
+    """
+    windows = freshness()
+    if not normalize_company(company_name) or windows.get(STAGES[0], 0) <= 0 or STAGES[0] in refresh:
+        return None, {}
+    now = now or timezone.now()
+    try:
+        run = ResearchRun.objects.filter(normalized_name=normalize_company(company_name)).first()
+    except DatabaseError as e:
+        logger.warning("Could not read research history: %s", e)
+        return None, {}
+    if run is None:
+        return None, {}
+
+    fresh = []
+    for stage in STAGES:
+        window = windows.get(stage, 0)
+        if stage in refresh or window <= 0 or now - _generated_at(run, stage) > timedelta(seconds=window):
+            break
+        if stage == "resources" and run.sources != _source_names(sources):
+            break
+        fresh.append(stage)
+    if not fresh:
+        return None, {}
+
+    try:
+        payload = run_payload(run)
+    except DatabaseError as e:
+        logger.warning("Could not read research history: %s", e)
+        return None, {}
+    sections = {"overview": payload["Overview"], "usecases": payload["Usecases"], "resources": payload["Resources"]}
+    if "usecases" in fresh and not sections["usecases"]["use_cases"]:
+        # An empty list means the model's answer could not be parsed; the resources built on it are empty too
+        fresh = fresh[:fresh.index("usecases")]
+    if "resources" in fresh and any(
+        is_error_result(items)
+        for entry in sections["resources"]["use_cases_resources"] for items in entry["resources"].values()
+    ):
+        # Failed or timed-out lookups are worth retrying
+        fresh.remove("resources")
+    return run, {stage: sections[stage] for stage in fresh}
+
+
+def record_run(run_id, company_name, payload, sources=None, reused_from=None, reused=()):
+    """Store a finished run in the history tables; returns the ``ResearchRun`` or None on a database error.
+
+    Stages listed in ``reused`` keep the generation time they had in
+    ``reused_from``, the run they were taken from.
+    """
+    now = timezone.now()
+    generated = {
+        stage: _generated_at(reused_from, stage) if reused_from is not None and stage in reused else now
+        for stage in STAGES
+    }
+    source_names = _source_names(sources)
+    use_cases = payload["Usecases"]["use_cases"]
+    resources = payload["Resources"]["use_cases_resources"]
+
+    try:
+        with transaction.atomic():
+            run = ResearchRun.objects.create(
+                run_id=run_id,
+                company_name=company_name,
+                normalized_name=normalize_company(company_name),
+                sources=source_names,
+                created_at=now,
+                overview_generated_at=generated["overview"],
+                usecases_generated_at=generated["usecases"],
+                resources_generated_at=generated["resources"],
+                message=payload.get("message", ""),
+            )
+            CompanyOverview.objects.create(run=run, text=payload["Overview"] or "")
+            rows = UseCase.objects.bulk_create([
+                UseCase(
+                    run=run, position=position, title=use_case["title"],
+                    explanation=use_case.get("explanation", ""),
+                    practical_application=use_case.get("practical_application", []),
+                )
+                for position, use_case in enumerate(use_cases)
+            ])
+            ResourceEntry.objects.bulk_create([
+                _resource_entry(use_case, provider, position, item)
+                for use_case, entry in zip(rows, resources)
+                for provider, items in entry["resources"].items()
+                for position, item in enumerate(items)
+            ])
+    except DatabaseError as e:
+        logger.error("Could not record research run %s: %s", run_id, e)
+        return None
+    return run
+
+
+def _resource_entry(use_case, provider, position, item):
+    fields = item if isinstance(item, dict) else {"name": str(item)}
+    name = fields.get("name") or fields.get("title") or fields.get("message") or fields.get("error") or ""
+    return ResourceEntry(
+        use_case=use_case, provider=provider, position=position,
+        name=str(name)[:500], url=str(fields.get("url", ""))[:1000],
+        is_error="error" in fields, data=item,
+    )
+
+
+def run_payload(run):
+    """Rebuild the response payload of a recorded run (a ``ResearchRun`` or its run id), or None."""
+    if not isinstance(run, ResearchRun):
+        run = ResearchRun.objects.filter(run_id=run).first()
+        if run is None:
+            return None
+    use_cases = list(run.use_cases.prefetch_related("resources"))
+    overview = CompanyOverview.objects.filter(run=run).values_list("text", flat=True).first()
+
+    resources = []
+    for use_case in use_cases:
+        found = {provider: [] for provider in run.sources}
+        for resource in use_case.resources.all():
+            found.setdefault(resource.provider, []).append(resource.data)
+        resources.append({"title": use_case.title, "resources": found})
+
+    return {
+        "message": run.message,
+        "Overview": overview,
+        "Usecases": {"use_cases": [
+            {
+                "title": use_case.title,
+                "explanation": use_case.explanation,
+                "practical_application": use_case.practical_application,
+            }
+            for use_case in use_cases
+        ]},
+        "Resources": {"use_cases_resources": resources},
+    }
+
+
+def latest_recorded_run_id(company_name=None):
+    """Run id of the newest recorded run, of one company when given, or None."""
+    runs = ResearchRun.objects.all()
+    if company_name:
+        runs = runs.filter(normalized_name=normalize_company(company_name))
+    try:
+        return runs.values_list("run_id", flat=True).first()
+    except DatabaseError as e:
+        logger.warning("Could not read research history: %s", e)
+        return None
+
+
+def _summary(run):
+    return {
+        "run_id": run.run_id,
+        "query": run.company_name,
+        "sources": run.sources,
+        "use_cases": run.use_case_count,
+        "created_at": run.created_at.isoformat(),
+        "generated_at": {stage: _generated_at(run, stage).isoformat() for stage in STAGES},
+    }
+
+
+def history_page(company_name=None, page=1, page_size=HISTORY_PAGE_SIZE):
+    """One page of recorded runs, newest first, optionally for one company.
+
+    Raises:
+        django.core.paginator.InvalidPage: If ``page`` is out of range.
+    """
+    runs = ResearchRun.objects.annotate(use_case_count=Count("use_cases")).order_by("-created_at", "-id")
+    if company_name:
+        runs = runs.filter(normalized_name=normalize_company(company_name))
+    paginator = Paginator(runs, max(1, min(page_size, HISTORY_MAX_PAGE_SIZE)))
+    current = paginator.page(page)
+    return {
+        "count": paginator.count,
+        "page": current.number,
+        "pages": paginator.num_pages,
+        "next_page": current.next_page_number() if current.has_next() else None,
+        "previous_page": current.previous_page_number() if current.has_previous() else None,
+        "results": [_summary(run) for run in current.object_list],
+    }
@@ -0,0 +1,140 @@
+import codecs
+from html.parser import HTMLParser
+
+CHUNK_SIZE = 16 * 1024
+IGNORED_TAGS = {"script", "style", "noscript", "template"}
+
+
+class ParagraphExtractor(HTMLParser):
+    """Collect the text of ``<p>`` elements from HTML fed in pieces.
+
+    Text is gathered the way ``BeautifulSoup.find_all("p")`` + ``get_text()``
+    would see it, without building a DOM. ``full`` turns True once the
+    collected (cleaned) paragraphs reach ``char_budget`` characters.
+    """
+
+    def __init__(self, char_budget, clean=None):
+        super().__init__(convert_charrefs=True)
+        self.char_budget = char_budget
+        self.clean = clean
+        self.paragraphs = []
+        self.chars = 0
+        self.full = False
+        self._depth = 0
+        self._ignored = 0
+        self._current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "p":
+            if self._depth == 0:
+                self._current = []
+            self._depth += 1
+        elif tag in IGNORED_TAGS:
+            self._ignored += 1
+
+    def handle_endtag(self, tag):
+        if tag == "p" and self._depth:
+            self._depth -= 1
+            if self._depth == 0:
+                self._finish_paragraph()
+        elif tag in IGNORED_TAGS and self._ignored:
+            self._ignored -= 1
+
+    def handle_data(self, data):
+        if self._depth and not self._ignored and not self.full:
+            self._current.append(data)
+
+    def _finish_paragraph(self):
+        text = "".join(self._current)
+        self._current = []
+        if self.full:
+            return
+        if self.clean is not None:
+            text = self.clean(text)
+        self.paragraphs.append(text)
+        self.chars += len(text) + 1
+        if self.chars >= self.char_budget:
+            self.full = True
+
+    def close(self):
+        super().close()
+        # An unclosed <p> at the end of the input still counts
+        if self._depth:
+            self._depth = 0
+            self._finish_paragraph()
+
+    def text(self):
+        return " ".join(self.paragraphs)
+
+
+class _BodyReader:
+    """Feeds body chunks to a ``ParagraphExtractor`` and keeps the read stats."""
+
+    def __init__(self, encoding, char_budget, max_bytes, clean):
+        self.extractor = ParagraphExtractor(char_budget, clean=clean)
+        try:
+            self.decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        except LookupError:
+            self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.stopped_early = False
+
+    def feed(self, chunk):
+        """Feed one chunk; return True once reading can stop."""
+        self.bytes_read += len(chunk)
+        self.extractor.feed(self.decoder.decode(chunk))
+        if self.extractor.full or self.bytes_read >= self.max_bytes:
+            self.stopped_early = True
+        return self.stopped_early
+
+    def close(self):
+        if not self.stopped_early:
+            self.extractor.feed(self.decoder.decode(b"", final=True))
+        self.extractor.close()
+
+    def result(self, headers):
+        # Content-Length only matches the decoded size for uncompressed bodies
+        content_length = headers.get("Content-Length", "")
+        if not self.stopped_early:
+            bytes_skipped = 0
+        elif content_length.isdigit() and not headers.get("Content-Encoding"):
+            bytes_skipped = max(int(content_length) - self.bytes_read, 0)
+        else:
+            bytes_skipped = None
+        return self.extractor.text(), {"bytes_read": self.bytes_read, "bytes_skipped": bytes_skipped}
+
+
+def extract_paragraphs(response, char_budget, max_bytes, clean=None):
+    """Stream a response body through ``ParagraphExtractor``.
+
+    Reading stops once ``char_budget`` characters of paragraph text are
+    collected or ``max_bytes`` of body have been read, whichever comes first.
+
+    Returns:
+        tuple: ``(text, stats)`` where ``stats`` has ``bytes_read`` (decoded
+        body bytes) and ``bytes_skipped`` (None when the body length is
+        unknown and reading stopped early).
+    """
+    reader = _BodyReader(response.encoding, char_budget, max_bytes, clean)
+    try:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if reader.feed(chunk):
+                break
+        reader.close()
+    finally:
+        response.close()
+    return reader.result(response.headers)
+
+
+async def extract_paragraphs_async(response, char_budget, max_bytes, clean=None):
+    """``extract_paragraphs`` for a streamed ``httpx`` response."""
+    reader = _BodyReader(response.encoding, char_budget, max_bytes, clean)
+    try:
+        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+            if reader.feed(chunk):
+                break
+        reader.close()
+    finally:
+        await response.aclose()
+    return reader.result(response.headers)
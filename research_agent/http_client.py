@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import weakref
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .forking import register_fork_reset
+from .telemetry import annotate
+
+DEFAULT_TIMEOUT = 10  # seconds
+USER_AGENT = "Mozilla/5.0"
+
+# Connection pools: number of hosts kept warm and sockets kept per host
+POOL_HOSTS = 32
+POOL_SIZE_PER_HOST = 10
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRIES = 2
+BACKOFF_FACTOR = 0.3
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def _build_session(retry):
+    """Create a keep-alive session, optionally retrying 429/5xx with backoff."""
+    retries = Retry(
+        total=RETRIES,
+        connect=RETRIES,
+        read=0,
+        status=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    ) if retry else Retry(total=0, raise_on_status=False)
+
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE_PER_HOST, max_retries=retries)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def get_session(retry=True):
+    """Return the process-wide session, creating it on first use."""
+    session = _sessions.get(retry)
+    if session is None:
+        with _lock:
+            session = _sessions.get(retry)
+            if session is None:
+                session = _sessions[retry] = _build_session(retry)
+    return session
+
+
+def get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, retry=True, **kwargs):
+    """GET through the shared connection pool.
+
+    Args:
+        url (str): Target URL.
+        params (dict, optional): Query string parameters.
+        headers (dict, optional): Extra request headers.
+        timeout (float): Connect/read timeout in seconds.
+        retry (bool): Retry connection errors and 429/5xx responses with backoff.
+            Disable for best-effort fetches such as page scraping.
+
+    The host, status and (for non-streamed bodies) size are added to the
+    enclosing telemetry span.
+
+    Returns:
+        requests.Response
+    """
+    response = get_session(retry).get(url, params=params, headers=headers, timeout=timeout, **kwargs)
+    annotate(
+        host=urlsplit(url).hostname, status=response.status_code,
+        **({} if kwargs.get("stream") else {"bytes": len(response.content)}),
+    )
+    return response
+
+
+def close():
+    """Close all pooled connections."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+# Async twin of the pool: one httpx.AsyncClient per event loop (an AsyncClient can't cross loops)
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_async_client():
+    """Return the AsyncClient of the running event loop, creating it on first use.
+
+    It speaks HTTP/2 when the optional ``h2`` package is installed.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx  # only the async path needs it
+        client = _async_clients[loop] = httpx.AsyncClient(
+            http2=_http2_available(),
+            limits=httpx.Limits(max_connections=POOL_HOSTS * POOL_SIZE_PER_HOST, max_keepalive_connections=POOL_HOSTS),
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+        )
+    return client
+
+
+async def get_async(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, retry=True, stream=False):
+    """``get`` for coroutines, through the running loop's AsyncClient.
+
+    Retries connection errors and 429/5xx responses like the sync session.
+    With ``stream`` the body is left unread: iterate ``aiter_bytes()`` and
+    ``await response.aclose()`` when done.
+
+    Returns:
+        httpx.Response
+    """
+    import httpx
+    client = get_async_client()
+    attempts = RETRIES + 1 if retry else 1
+    for attempt in range(attempts):
+        if attempt > 1:
+            await asyncio.sleep(BACKOFF_FACTOR * 2 ** (attempt - 1))
+        request = client.build_request("GET", url, params=params, headers=headers, timeout=timeout)
+        try:
+            response = await client.send(request, stream=stream)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            if attempt == attempts - 1:
+                raise
+            continue
+        if response.status_code in RETRY_STATUSES and attempt < attempts - 1:
+            await response.aclose()
+            continue
+        annotate(
+            host=urlsplit(url).hostname, status=response.status_code,
+            **({} if stream else {"bytes": len(response.content)}),
+        )
+        return response
+
+
+async def close_async():
+    """Close the running loop's AsyncClient; call before the loop ends."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _reset_after_fork():
+    # Pooled sockets must not be shared between a parent and forked workers.
+    global _lock, _async_clients
+    _lock = threading.Lock()
+    _sessions.clear()
+    _async_clients = weakref.WeakKeyDictionary()
+
+
+register_fork_reset(_reset_after_fork)
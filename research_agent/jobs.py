@@ -0,0 +1,217 @@
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from .pipeline import STAGES, run_research
+from .result_store import save_result, load_result
+from .pdf_cache import prerender_pdf
+from .forking import register_fork_reset
+from .history import record_run, run_payload
+from .rate_limit import RateLimited
+from .response_cache import CACHE_DIR
+
+JOB_WORKERS = int(os.getenv("RESEARCH_JOB_WORKERS", 4))
+MAX_PENDING_JOBS = int(os.getenv("RESEARCH_MAX_PENDING_JOBS", 100))
+JOB_RETENTION = 24 * 3600  # seconds a finished job stays queryable
+
+JOBS_DIR = CACHE_DIR / "jobs"
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting or running."""
+
+
+class Job:
+    """State of one background research run.
+
+    Every transition is written to ``JOBS_DIR`` so any web worker can answer
+    status requests for a job started by another worker.
+    """
+
+    def __init__(self, company_name, job_id=None, sources=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.company_name = company_name
+        self.sources = sources
+        self.status = "queued"
+        self.stages = {stage: {"status": "pending"} for stage in STAGES}
+        self.run_id = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def to_dict(self, include_result=True):
+        data = {
+            "job_id": self.id,
+            "query": self.company_name,
+            "sources": self.sources,
+            "status": self.status,
+            "stages": self.stages,
+            "run_id": self.run_id,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if include_result:
+            # A run reused as a whole may be older than the result store's retention
+            data["result"] = (load_result(self.run_id) or run_payload(self.run_id)) if self.run_id else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data["query"], job_id=data["job_id"], sources=data.get("sources"))
+        job.status = data["status"]
+        job.stages = data["stages"]
+        job.run_id = data.get("run_id")
+        job.error = data.get("error")
+        job.created_at = data["created_at"]
+        job.finished_at = data.get("finished_at")
+        return job
+
+    def save(self):
+        JOBS_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=JOBS_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(include_result=False), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, JOBS_DIR / f"{self.id}.json")
+
+
+_jobs = {}
+_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="research-job")
+        return _executor
+
+
+def _pending_count():
+    return sum(1 for job in _jobs.values() if job.status in ("queued", "running"))
+
+
+def _prune():
+    # Caller holds the lock.
+    cutoff = time.time() - JOB_RETENTION
+    for job_id in [job_id for job_id, job in _jobs.items() if job.finished_at and job.finished_at < cutoff]:
+        del _jobs[job_id]
+        try:
+            os.remove(JOBS_DIR / f"{job_id}.json")
+        except OSError:
+            pass
+
+
+def _run(job, listener=None, reuse=None, reused_from=None):
+    def notify(event, data):
+        if listener is not None:
+            listener(event, data)
+
+    def on_progress(stage, status, payload):
+        with _lock:
+            job.stages[stage]["status"] = status
+            job.stages[stage]["started_at" if status == "running" else "finished_at"] = time.time()
+            job.save()
+        if status == "done":
+            notify(stage, payload)
+
+    def on_resource(index, entry):
+        notify("resource", dict(entry, index=index))
+
+    with _lock:
+        job.status = "running"
+        job.save()
+
+    try:
+        result = run_research(
+            job.company_name, on_progress=on_progress, on_resource=on_resource, sources=job.sources, reuse=reuse
+        )
+        if reused_from is not None and all(stage in (reuse or {}) for stage in STAGES):
+            # Nothing was recomputed: point at the stored run instead of storing a copy of it
+            run_id = reused_from.run_id
+        else:
+            run_id = save_result(job.company_name, result)
+            record_run(run_id, job.company_name, result, job.sources, reused_from, reuse or ())
+    except RateLimited as e:
+        logger.warning("Research job %s stopped by a quota: %s", job.id, e)
+        _fail(job, f"{e} (retry after {e.retry_after}s)", notify, retry_after=e.retry_after)
+        return
+    except Exception as e:
+        logger.exception("Research job %s failed", job.id)
+        _fail(job, str(e), notify)
+        return
+
+    with _lock:
+        job.status = "succeeded"
+        job.run_id = run_id
+        job.finished_at = time.time()
+        job.save()
+    notify("done", {"job_id": job.id, "run_id": run_id, "message": result["message"]})
+    # After the run is stored and reported: the PDF is an extra, not part of the job
+    prerender_pdf(result)
+
+
+def _fail(job, error, notify, **details):
+    with _lock:
+        job.status = "failed"
+        job.error = error
+        job.finished_at = time.time()
+        job.save()
+    notify("error", dict(details, job_id=job.id, error=error))
+
+
+def submit_job(company_name, listener=None, sources=None, reuse=None, reused_from=None):
+    """Queue a research run and return its ``Job`` without waiting for it.
+
+    ``listener(event, data)`` is called from the worker thread with each
+    finished stage (``overview``, ``usecases``, ``resources``), every
+    ``resource`` entry as it completes, and finally ``done`` or ``error``.
+    ``sources`` and ``reuse`` are passed on to ``run_research``;
+    ``reused_from`` is the recorded run the reused stages came from.
+    """
+    with _lock:
+        _prune()
+        if _pending_count() >= MAX_PENDING_JOBS:
+            raise JobQueueFull(f"{MAX_PENDING_JOBS} research jobs are already pending")
+        job = Job(company_name, sources=sources)
+        _jobs[job.id] = job
+        job.save()
+
+    _get_executor().submit(_run, job, listener, reuse, reused_from)
+    return job
+
+
+def get_job(job_id):
+    """Return the job with this id, or None if it is unknown or expired."""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            return copy.deepcopy(job)
+
+    try:
+        uuid.UUID(hex=job_id)
+        with open(JOBS_DIR / f"{job_id}.json", encoding="utf-8") as f:
+            return Job.from_dict(json.load(f))
+    except (ValueError, OSError):
+        return None
+
+
+def _reset_after_fork():
+    # The parent's worker threads don't exist in the child; its jobs are read back from JOBS_DIR.
+    global _lock, _executor, _executor_lock
+    _lock = threading.Lock()
+    _executor_lock = threading.Lock()
+    _executor = None
+    _jobs.clear()
+
+
+register_fork_reset(_reset_after_fork)
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from .blocking import run_blocking
+from .clients import get_client
+from .forking import register_fork_reset
+from .rate_limit import acquire, acquire_async
+from .response_cache import CACHE_DIR, ResponseCache
+from .steps import run_steps, run_steps_async
+from .telemetry import span
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+# Completions younger than this are reused for byte-identical prompts
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 2000))
+
+_cache = None
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(CACHE_DIR / "llm.sqlite3", memory_entries=128, disk_entries=LLM_CACHE_MAX_ENTRIES)
+    return _cache
+
+
+def prompt_key(model, prompt, config=None):
+    """Content address of a completion request."""
+    raw = json.dumps([model, prompt, config or {}], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def llm_cache_stats():
+    """Completion cache hits and misses since process start."""
+    with _cache_lock:
+        return dict(_stats)
+
+
+def generate_text(prompt, model=DEFAULT_MODEL, config=None, max_age=None):
+    """Run a Gemini completion, reusing a cached answer for an identical request.
+
+    Args:
+        prompt (str): The prompt text.
+        model (str): Gemini model name.
+        config (dict, optional): Generation config, part of the cache key.
+        max_age (int, optional): Freshness window in seconds, defaults to
+            ``LLM_CACHE_TTL``. ``0`` always calls the model.
+
+    Returns:
+        str: The completion text.
+    """
+    return run_steps(_completion_steps(prompt, model, config, max_age), lambda _: _complete(prompt, model, config))
+
+
+async def generate_text_async(prompt, model=DEFAULT_MODEL, config=None, max_age=None):
+    """``generate_text`` for coroutines.
+
+    The completion itself runs in the blocking-call pool: the ``aio`` API of the
+    pinned google-genai builds a new httpx client, TLS context included,
+    for every call, which costs more than the thread.
+    """
+    return await run_steps_async(
+        _completion_steps(prompt, model, config, max_age), lambda _: _complete_async(prompt, model, config)
+    )
+
+
+def _complete(prompt, model, config):
+    acquire("gemini")
+    return get_client("gemini").models.generate_content(model=model, contents=prompt, config=config).text
+
+
+async def _complete_async(prompt, model, config):
+    await acquire_async("gemini")
+    response = await run_blocking(
+        get_client("gemini").models.generate_content, model=model, contents=prompt, config=config
+    )
+    return response.text
+
+
+def _completion_steps(prompt, model, config, max_age):
+    # Yields once when the model has to be called and receives the completion text.
+    max_age = LLM_CACHE_TTL if max_age is None else max_age
+    cache = _get_cache() if max_age > 0 else None
+    key = prompt_key(model, prompt, config)
+
+    with span("call", "gemini", model=model, prompt_chars=len(prompt)) as call:
+        if cache is not None:
+            entry = cache.get(key)
+            if entry is not None and time.time() - entry["stored_at"] < max_age:
+                with _cache_lock:
+                    _stats["hits"] += 1
+                call.set(cache="hit")
+                return entry["value"]
+
+        call.set(cache="miss" if cache is not None else "off")
+        text = yield None
+        call.set(bytes=len(text.encode("utf-8")) if text else 0)
+
+        with _cache_lock:
+            _stats["misses"] += 1
+        if cache is not None and text:
+            cache.set(key, text)
+        return text
+
+
+def _reset_after_fork():
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+register_fork_reset(_reset_after_fork)
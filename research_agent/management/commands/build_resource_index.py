@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from research_agent.resource_index import SOURCES, get_index, ingest_snapshot, refresh_source
+
+
+class Command(BaseCommand):
+    help = "Build or incrementally refresh the local full-text index of resource metadata."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "sources", nargs="*", metavar="source",
+            help=f"sources to crawl (default: all of {', '.join(SOURCES)})",
+        )
+        parser.add_argument("--snapshot", help="bulk-load a JSON Lines metadata snapshot instead of crawling")
+        parser.add_argument("--full", action="store_true", help="recrawl from the newest entry instead of the last sync")
+        parser.add_argument("--max-items", type=int, default=5000, help="entries to crawl per source")
+
+    def handle(self, *args, **options):
+        if options["snapshot"]:
+            try:
+                written = ingest_snapshot(options["snapshot"])
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Could not load snapshot: {e}")
+            for source, count in written.items():
+                self.stdout.write(f"{source}: {count} entries loaded")
+            return
+
+        unknown = [source for source in options["sources"] if source not in SOURCES]
+        if unknown:
+            raise CommandError(f"Unknown source(s): {', '.join(unknown)}")
+
+        failed = []
+        for source in options["sources"] or SOURCES:
+            try:
+                count = refresh_source(source, full=options["full"], max_items=options["max_items"])
+            except Exception as e:
+                failed.append(source)
+                self.stderr.write(f"{source}: refresh failed: {e}")
+                continue
+            self.stdout.write(f"{source}: {count} entries updated, {get_index().count(source)} indexed")
+
+        if failed:
+            raise CommandError(f"Refresh failed for {', '.join(failed)}")
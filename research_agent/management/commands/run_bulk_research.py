@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from research_agent.bulk import BULK_WORKERS, read_companies, run_bulk
+from research_agent.providers import select_providers
+
+
+class Command(BaseCommand):
+    help = (
+        "Research every company in a CSV/JSONL/text file and append the results to a JSONL file. "
+        "Re-run with the same output file to resume an interrupted batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="CSV (company/query/name column), JSONL or one-name-per-line file")
+        parser.add_argument("--output", "-o", required=True, help="JSONL results file, also used as the checkpoint")
+        parser.add_argument("--workers", type=int, default=BULK_WORKERS, help="companies researched at once")
+        parser.add_argument("--sources", help="comma-separated resource providers to query")
+
+    def handle(self, *args, **options):
+        try:
+            companies = read_companies(options["input"])
+            sources = options["sources"]
+            if sources is not None:
+                sources = [provider.name for provider in select_providers(sources)]
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        summary = run_bulk(companies, options["output"], workers=options["workers"], sources=sources)
+        self.stdout.write(
+            f"{summary['succeeded']} succeeded, {summary['failed']} failed, "
+            f"{summary['skipped']} skipped as already done or duplicate, of {summary['total']} companies"
+        )
+        if summary["failed"]:
+            raise CommandError("Some companies failed; re-run the same command to retry them")
@@ -0,0 +1,111 @@
+from .telemetry import LATENCY_BUCKETS, span_metrics
+from .response_cache import cache_stats
+from .llm import llm_cache_stats
+from .providers import provider_stats
+from .rate_limit import rate_limit_stats
+from .semantic_cache import semantic_cache_stats
+from .resource_index import index_stats
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+CIRCUIT_STATES = ("closed", "half_open", "open")
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def family(self, metric, kind, help_text):
+        self.lines.append(f"# HELP {metric} {help_text}")
+        self.lines.append(f"# TYPE {metric} {kind}")
+
+    def sample(self, metric, value, **labels):
+        self.lines.append(f"{metric}{_labels(**labels) if labels else ''} {value:g}")
+
+    def text(self):
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics():
+    """Metrics of this process in the Prometheus text exposition format.
+
+    Each worker process counts on its own; scrape every worker, or run a
+    single one, to see the full picture.
+    """
+    out = _Writer()
+    spans = sorted(span_metrics().items())
+
+    out.family("research_span_duration_seconds", "histogram", "Latency of pipeline stages, provider lookups and upstream calls.")
+    for (kind, name), series in spans:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, series["buckets"]):
+            cumulative += count
+            out.sample("research_span_duration_seconds_bucket", cumulative, kind=kind, name=name, le=f"{bound:g}")
+        out.sample("research_span_duration_seconds_bucket", series["count"], kind=kind, name=name, le="+Inf")
+        out.sample("research_span_duration_seconds_sum", series["sum"], kind=kind, name=name)
+        out.sample("research_span_duration_seconds_count", series["count"], kind=kind, name=name)
+
+    out.family("research_span_in_flight", "gauge", "Spans currently running.")
+    for (kind, name), series in spans:
+        out.sample("research_span_in_flight", series["in_flight"], kind=kind, name=name)
+
+    out.family("research_span_errors_total", "counter", "Spans that raised or recorded an error.")
+    for (kind, name), series in spans:
+        out.sample("research_span_errors_total", series["errors"], kind=kind, name=name)
+
+    out.family("research_response_cache_total", "counter", "Response cache lookups by outcome.")
+    for provider, counters in sorted(cache_stats().items()):
+        for outcome, count in counters.items():
+            out.sample("research_response_cache_total", count, provider=provider, outcome=outcome)
+
+    out.family("research_llm_cache_total", "counter", "Completion cache lookups by outcome.")
+    for outcome, count in llm_cache_stats().items():
+        out.sample("research_llm_cache_total", count, outcome=outcome)
+
+    providers = provider_stats()
+    out.family("research_provider_events_total", "counter",
+               "Provider calls, failures, timeouts, hedges, short circuits and replaced thread pools.")
+    for provider, stats in providers.items():
+        for event in ("calls", "failures", "timeouts", "hedges", "short_circuits", "pool_replacements"):
+            out.sample("research_provider_events_total", stats[event], provider=provider, event=event)
+    out.family("research_provider_abandoned_calls", "gauge", "Calls left running after a timeout or a lost hedge.")
+    for provider, stats in providers.items():
+        out.sample("research_provider_abandoned_calls", stats["abandoned"], provider=provider)
+    out.family("research_provider_circuit_state", "gauge", "1 for the current circuit breaker state of each provider.")
+    for provider, stats in providers.items():
+        for state in CIRCUIT_STATES:
+            out.sample("research_provider_circuit_state", int(stats["state"] == state), provider=provider, state=state)
+
+    limits = sorted(rate_limit_stats().items())
+    out.family("research_rate_limit_calls_total", "counter", "Rate-limited calls let through.")
+    for api, stats in limits:
+        out.sample("research_rate_limit_calls_total", stats["calls"], api=api)
+    out.family("research_rate_limit_waited_calls_total", "counter", "Calls that waited for a token.")
+    for api, stats in limits:
+        out.sample("research_rate_limit_waited_calls_total", stats["waited_calls"], api=api)
+    out.family("research_rate_limit_wait_seconds_total", "counter", "Time spent waiting for tokens.")
+    for api, stats in limits:
+        out.sample("research_rate_limit_wait_seconds_total", stats["wait_seconds"], api=api)
+    out.family("research_rate_limit_rejected_total", "counter", "Calls refused because the wait would be too long.")
+    for api, stats in limits:
+        out.sample("research_rate_limit_rejected_total", stats["rejected"], api=api)
+
+    semantic = semantic_cache_stats()
+    out.family("research_semantic_cache_entries", "gauge", "Resource bundles held by the semantic cache.")
+    out.sample("research_semantic_cache_entries", semantic["entries"])
+    out.family("research_semantic_cache_lookups_total", "counter", "Semantic cache lookups by outcome.")
+    out.sample("research_semantic_cache_lookups_total", semantic["hits"], outcome="hits")
+    out.sample("research_semantic_cache_lookups_total", semantic["misses"], outcome="misses")
+
+    out.family("research_resource_index_lookups_total", "counter", "Local resource index lookups by outcome.")
+    for source, counters in sorted(index_stats().items()):
+        for outcome, count in counters.items():
+            out.sample("research_resource_index_lookups_total", count, source=source, outcome=outcome)
+
+    return out.text()
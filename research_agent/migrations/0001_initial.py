@@ -0,0 +1,80 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResearchRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_id', models.CharField(max_length=32, unique=True)),
+                ('company_name', models.CharField(max_length=200)),
+                ('normalized_name', models.CharField(max_length=200)),
+                ('sources', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField()),
+                ('overview_generated_at', models.DateTimeField()),
+                ('usecases_generated_at', models.DateTimeField()),
+                ('resources_generated_at', models.DateTimeField()),
+                ('message', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['normalized_name', '-created_at'], name='run_company_created_idx'), models.Index(fields=['-created_at'], name='run_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CompanyOverview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='overview', to='research_agent.researchrun')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UseCase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('title', models.CharField(max_length=500)),
+                ('explanation', models.TextField(blank=True)),
+                ('practical_application', models.JSONField(default=list)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='use_cases', to='research_agent.researchrun')),
+            ],
+            options={
+                'ordering': ['run', 'position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResourceEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('name', models.CharField(blank=True, max_length=500)),
+                ('url', models.URLField(blank=True, max_length=1000)),
+                ('is_error', models.BooleanField(default=False)),
+                ('data', models.JSONField()),
+                ('use_case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resources', to='research_agent.usecase')),
+            ],
+            options={
+                'ordering': ['use_case', 'provider', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='usecase',
+            constraint=models.UniqueConstraint(fields=('run', 'position'), name='usecase_run_position_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='resourceentry',
+            index=models.Index(fields=['provider', 'name'], name='resource_provider_name_idx'),
+        ),
+    ]
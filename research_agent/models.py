@@ -1,3 +1,77 @@
 from django.db import models
 
-# Create your models here.
+
+class ResearchRun(models.Model):
+    """One finished research run; ``run_id`` is its id in the result store.
+
+    Each stage keeps the time its output was generated. A stage reused from
+    an earlier run keeps that run's time, so reuse never makes data look
+    fresher than it is.
+    """
+    run_id = models.CharField(max_length=32, unique=True)
+    company_name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200)
+    sources = models.JSONField(default=list)
+    created_at = models.DateTimeField()
+    overview_generated_at = models.DateTimeField()
+    usecases_generated_at = models.DateTimeField()
+    resources_generated_at = models.DateTimeField()
+    message = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["normalized_name", "-created_at"], name="run_company_created_idx"),
+            models.Index(fields=["-created_at"], name="run_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.company_name} ({self.run_id})"
+
+
+class CompanyOverview(models.Model):
+    run = models.OneToOneField(ResearchRun, on_delete=models.CASCADE, related_name="overview")
+    text = models.TextField()
+
+    def __str__(self):
+        return f"Overview of {self.run.company_name}"
+
+
+class UseCase(models.Model):
+    run = models.ForeignKey(ResearchRun, on_delete=models.CASCADE, related_name="use_cases")
+    position = models.PositiveSmallIntegerField()
+    title = models.CharField(max_length=500)
+    explanation = models.TextField(blank=True)
+    practical_application = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ["run", "position"]
+        constraints = [
+            models.UniqueConstraint(fields=["run", "position"], name="usecase_run_position_uniq"),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ResourceEntry(models.Model):
+    """One item a provider returned for a use case, or its error/empty message.
+
+    ``data`` is the item exactly as served, so the payload can be rebuilt.
+    """
+    use_case = models.ForeignKey(UseCase, on_delete=models.CASCADE, related_name="resources")
+    provider = models.CharField(max_length=50)
+    position = models.PositiveSmallIntegerField()
+    name = models.CharField(max_length=500, blank=True)
+    url = models.URLField(max_length=1000, blank=True)
+    is_error = models.BooleanField(default=False)
+    data = models.JSONField()
+
+    class Meta:
+        ordering = ["use_case", "provider", "position"]
+        indexes = [
+            models.Index(fields=["provider", "name"], name="resource_provider_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}: {self.name}"
@@ -0,0 +1,90 @@
+import re
+import zlib
+import numpy as np
+from .tokens import count_tokens
+
+SHINGLE_SIZE = 3  # words per shingle
+NUM_PERM = 64  # MinHash signature length
+SIMILARITY_THRESHOLD = 0.6  # estimated Jaccard above which a passage is a near-duplicate
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+WORD_RE = re.compile(r"\w+")
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(20250301)
+_A = _rng.integers(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+
+def split_passages(text, sentences_per_passage=2):
+    """Split page text into passages of a couple of sentences each."""
+    sentences = [s for s in SENTENCE_SPLIT_RE.split(text.strip()) if s]
+    return [
+        " ".join(sentences[i:i + sentences_per_passage])
+        for i in range(0, len(sentences), sentences_per_passage)
+    ]
+
+
+def shingle_hashes(passage, size=SHINGLE_SIZE):
+    """CRC32 hashes of the passage's lowercase word n-grams."""
+    words = WORD_RE.findall(passage.lower())
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in set(grams)), dtype=np.uint64)
+
+
+def minhash_signatures(passages):
+    """MinHash signature matrix of shape (len(passages), NUM_PERM).
+
+    Each row is min over shingles of ``(a * h + b) mod p`` for NUM_PERM random
+    (a, b) pairs, computed as one broadcasted NumPy expression per passage.
+    Passages without words get an all-max row that matches nothing.
+    """
+    signatures = np.full((len(passages), NUM_PERM), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for row, passage in enumerate(passages):
+        hashes = shingle_hashes(passage)
+        if hashes.size:
+            # a, h < 2**32 so a * h + b stays below 2**64
+            signatures[row] = ((np.outer(hashes, _A) + _B) % _MERSENNE).min(axis=0)
+    return signatures
+
+
+def remove_near_duplicates(texts, threshold=SIMILARITY_THRESHOLD):
+    """Drop passages that repeat, nearly word for word, a passage from an earlier text.
+
+    ``texts`` must be in rank order (best source first); the first copy of
+    each passage is kept, so the highest-ranked source's wording wins.
+
+    Returns:
+        tuple: ``(texts, stats)`` with one cleaned text per input text and
+        ``stats`` reporting passages and tokens dropped.
+    """
+    passages = []
+    owners = []
+    for index, text in enumerate(texts):
+        for passage in split_passages(text):
+            passages.append(passage)
+            owners.append(index)
+
+    stats = {"passages": len(passages), "dropped_passages": 0, "tokens_saved": 0}
+    if not passages:
+        return list(texts), stats
+
+    signatures = minhash_signatures(passages)
+    empty = signatures[:, 0] == np.iinfo(np.uint64).max
+    kept_rows = []
+    kept = [[] for _ in texts]
+
+    for row, passage in enumerate(passages):
+        if kept_rows and not empty[row]:
+            similarity = (signatures[kept_rows] == signatures[row]).mean(axis=1)
+            if similarity.max() >= threshold:
+                stats["dropped_passages"] += 1
+                stats["tokens_saved"] += count_tokens(passage)
+                continue
+        kept_rows.append(row)
+        kept[owners[row]].append(passage)
+
+    return [" ".join(parts) for parts in kept], stats
@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .forking import register_fork_reset
+from .pdf_generator import render_pdf_bytes
+from .result_store import RESULTS_DIR, atomic_write, prune_dir
+from .telemetry import active_profiler, span
+
+PDF_DIR = RESULTS_DIR / "pdf"
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", 2))
+PDF_RENDER_TIMEOUT = 60  # seconds
+PDF_MEMORY_BYTES = 32 * 1024 * 1024  # in-process cache budget
+PDF_DISK_FILES = 500  # rendered reports kept on disk
+PDF_PRERENDER = os.getenv("PDF_PRERENDER", "false").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+_memory = OrderedDict()
+_memory_bytes = 0
+_inflight = {}
+_writes = 0
+_lock = threading.Lock()
+_executor = None
+
+
+def payload_hash(data):
+    """Content hash of a research payload; identical payloads share one PDF."""
+    # run_id is attached to responses and is not part of the report content
+    content = {key: value for key, value in data.items() if key != "run_id"}
+    raw = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _get_executor():
+    # Caller holds the lock.
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PDF_RENDER_WORKERS)
+    return _executor
+
+
+def _remember(key, pdf):
+    # Caller holds the lock.
+    global _memory_bytes
+    if key in _memory:
+        return
+    _memory[key] = pdf
+    _memory_bytes += len(pdf)
+    while _memory_bytes > PDF_MEMORY_BYTES and len(_memory) > 1:
+        _, evicted = _memory.popitem(last=False)
+        _memory_bytes -= len(evicted)
+
+
+def _cached(key):
+    with _lock:
+        pdf = _memory.get(key)
+        if pdf is not None:
+            _memory.move_to_end(key)
+            return pdf
+    try:
+        pdf = (PDF_DIR / f"{key}.pdf").read_bytes()
+    except OSError:
+        return None
+    with _lock:
+        _remember(key, pdf)
+    return pdf
+
+
+def _submit(key, data):
+    """Start rendering in the process pool, or join a render already running."""
+    global _executor
+    with _lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+        try:
+            future = _get_executor().submit(render_pdf_bytes, data)
+        except BrokenProcessPool:
+            _executor = None
+            future = _get_executor().submit(render_pdf_bytes, data)
+        _inflight[key] = future
+
+    def on_done(f):
+        global _writes
+        with _lock:
+            _inflight.pop(key, None)
+            if f.cancelled():
+                return
+            if f.exception() is not None:
+                logger.error("Error rendering PDF %s: %s", key, f.exception())
+                return
+            _remember(key, f.result())
+            _writes += 1
+            prune = _writes % 50 == 0
+        try:
+            atomic_write(PDF_DIR / f"{key}.pdf", f.result())
+            if prune:
+                prune_dir(PDF_DIR, ".pdf", PDF_DISK_FILES)
+        except OSError as e:
+            logger.warning("Could not store PDF %s: %s", key, e)
+
+    future.add_done_callback(on_done)
+    return future
+
+
+def get_pdf(data):
+    """Return ``(key, pdf_bytes)`` for a payload, rendering it at most once."""
+    with span("stage", "pdf") as stage:
+        key = payload_hash(data)
+        pdf = _cached(key)
+        stage.set(cache="miss" if pdf is None else "hit")
+        if active_profiler.get() is not None:
+            # A profiled request renders here, where the profiler can see it
+            stage.set(cache="profiled")
+            pdf = render_pdf_bytes(data)
+        elif pdf is None:
+            pdf = _submit(key, data).result(timeout=PDF_RENDER_TIMEOUT)
+        stage.set(bytes=len(pdf))
+        return key, pdf
+
+
+async def get_pdf_async(data):
+    """``get_pdf`` for coroutines; the event loop keeps running while the process pool renders."""
+    with span("stage", "pdf") as stage:
+        key = payload_hash(data)
+        pdf = await asyncio.to_thread(_cached, key)
+        stage.set(cache="miss" if pdf is None else "hit")
+        if active_profiler.get() is not None:
+            stage.set(cache="profiled")
+            pdf = render_pdf_bytes(data)
+        elif pdf is None:
+            # Shielded: other requests may be waiting on the same render
+            pdf = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(_submit(key, data))), PDF_RENDER_TIMEOUT)
+        stage.set(bytes=len(pdf))
+        return key, pdf
+
+
+def prerender_pdf(data):
+    """Render a finished run's report in the background when PDF_PRERENDER is on.
+
+    Best effort: a failure is logged and the report is rendered on download instead.
+    """
+    if not PDF_PRERENDER:
+        return
+    try:
+        key = payload_hash(data)
+        if _cached(key) is None:
+            _submit(key, data)
+    except Exception:
+        logger.exception("Could not start prerendering a PDF")
+
+
+def _reset_after_fork():
+    global _executor, _lock, _memory_bytes
+    _executor = None
+    _lock = threading.Lock()
+    _inflight.clear()
+    _memory.clear()
+    _memory_bytes = 0
+
+
+register_fork_reset(_reset_after_fork)
@@ -1,5 +1,7 @@
+import io
 import json
 import os
+from functools import lru_cache
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -16,39 +18,9 @@ def validate_json_data(data):
     
     return True
 
-def create_pdf_from_json(json_string, output_filename=None):
-    
-    # Parse JSON data
-    try:
-        data = json.loads(json_string)
-        validate_json_data(data)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON data: {e}")
-    
-    # Extract company name from Overview
-    overview = data.get("Overview", "")
-    company_name = "Company"
-    if overview:
-        first_sentence = overview.split('.')[0]
-        words = first_sentence.split()
-        if len(words) >= 2:
-            company_name = words[0] + " " + words[1]
-    
-    # Set output filename if not provided
-    if not output_filename:
-        output_filename = f"{company_name.replace(' ', '_')}_Research_Report.pdf"
-    
-    # Create PDF document
-    doc = SimpleDocTemplate(
-        output_filename,
-        pagesize=A4,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=72
-    )
-    
-    # Styles
+@lru_cache(maxsize=1)
+def get_styles():
+    """Build the report stylesheet once per process."""
     styles = getSampleStyleSheet()
     
     # MODIFY existing styles instead of adding new ones with the same name
@@ -83,6 +55,63 @@ def create_pdf_from_json(json_string, output_filename=None):
         fontName='Helvetica-Bold',
         spaceBefore=6
     ))
+    return styles
+
+
+def report_company_name(data):
+    """Company name shown in the report title, taken from the Overview."""
+    overview = data.get("Overview", "")
+    company_name = "Company"
+    if overview:
+        first_sentence = overview.split('.')[0]
+        words = first_sentence.split()
+        if len(words) >= 2:
+            company_name = words[0] + " " + words[1]
+    return company_name
+
+
+def render_pdf_bytes(data):
+    """Render a research payload to PDF and return the document bytes."""
+    validate_json_data(data)
+    buffer = io.BytesIO()
+    build_pdf(data, buffer)
+    return buffer.getvalue()
+
+
+def create_pdf_from_json(json_string, output_filename=None):
+    
+    # Parse JSON data
+    try:
+        data = json.loads(json_string)
+        validate_json_data(data)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON data: {e}")
+    
+    # Set output filename if not provided
+    if not output_filename:
+        output_filename = f"{report_company_name(data).replace(' ', '_')}_Research_Report.pdf"
+    
+    build_pdf(data, output_filename)
+    print(f"PDF created successfully: {output_filename}")
+    return output_filename
+
+
+def build_pdf(data, output):
+    """Lay out the report for ``data`` into ``output``, a filename or file-like object."""
+    overview = data.get("Overview", "")
+    company_name = report_company_name(data)
+
+    # Create PDF document
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
+    
+    styles = get_styles()
     
     # Content elements
     elements = []
@@ -174,8 +203,6 @@ def create_pdf_from_json(json_string, output_filename=None):
     
     # Build the PDF
     doc.build(elements)
-    print(f"PDF created successfully: {output_filename}")
-    return output_filename
 
 
 def generate_pdf(json_file, output_filename):
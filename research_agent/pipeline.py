@@ -0,0 +1,107 @@
+from .research_main import get_summarized_info, get_summarized_info_async
+from .usecase_main import generate_structured_usecases, generate_structured_usecases_async
+from .resources_main import collect_resources_for_usecases, collect_resources_for_usecases_async
+from .steps import run_steps, run_steps_async
+from .telemetry import span
+
+STAGES = ("overview", "usecases", "resources")
+
+
+def run_research(company_name, on_progress=None, on_resource=None, sources=None, reuse=None):
+    """Run the research pipeline for one company.
+
+    Args:
+        company_name (str): Company or industry to research.
+        on_progress (callable, optional): ``on_progress(stage, status, payload)``
+            called with status ``"running"`` before and ``"done"`` after each
+            stage in ``STAGES``; ``payload`` is the stage output when done.
+        on_resource (callable, optional): ``on_resource(index, entry)`` called
+            as soon as the resources for one use case are collected.
+        sources (list, optional): Resource providers to query; defaults to
+            every enabled provider.
+        reuse (dict, optional): Stored outputs of stages to skip, keyed by
+            stage name (see ``history.reusable_stages``). Skipped stages
+            still report ``"done"`` and their resources.
+
+    Every computed stage runs in a telemetry span under one ``research``
+    span, so a run's timings share a trace id in the trace log.
+
+    Returns:
+        dict: The response payload served by the main endpoint.
+    """
+    steps = _research_steps(company_name, on_progress, on_resource, sources, reuse or {})
+    return run_steps(steps, lambda stage: _STAGE_FUNCTIONS[stage[0]](*stage[1], **stage[2]))
+
+
+async def run_research_async(company_name, on_progress=None, on_resource=None, sources=None, reuse=None):
+    """``run_research`` for coroutines: every upstream call runs on the current event loop.
+
+    Takes the same arguments and returns the same payload; the callbacks
+    are called on the event loop thread.
+    """
+    steps = _research_steps(company_name, on_progress, on_resource, sources, reuse or {}, mode="async")
+    return await run_steps_async(steps, lambda stage: _STAGE_FUNCTIONS_ASYNC[stage[0]](*stage[1], **stage[2]))
+
+
+_STAGE_FUNCTIONS = {
+    "overview": get_summarized_info,
+    "usecases": generate_structured_usecases,
+    "resources": collect_resources_for_usecases,
+}
+_STAGE_FUNCTIONS_ASYNC = {
+    "overview": get_summarized_info_async,
+    "usecases": generate_structured_usecases_async,
+    "resources": collect_resources_for_usecases_async,
+}
+
+
+def _research_steps(company_name, on_progress, on_resource, sources, reuse, **attrs):
+    # Yields (stage, args, kwargs) for every stage to compute and receives its output.
+    def notify(stage, status, payload=None):
+        if on_progress is not None:
+            on_progress(stage, status, payload)
+
+    with span("pipeline", "research", company=company_name, reused=sorted(reuse), **attrs):
+        # Step 1 : Market research
+        if "overview" in reuse:
+            research_results = _reused("overview", reuse, notify)
+        else:
+            notify("overview", "running")
+            with span("stage", "overview"):
+                research_results = yield "overview", (company_name,), {}
+            notify("overview", "done", research_results)
+
+        # Step 2 : AI/Ml use cases generation
+        if "usecases" in reuse:
+            use_cases = _reused("usecases", reuse, notify)
+        else:
+            notify("usecases", "running")
+            with span("stage", "usecases") as stage:
+                use_cases = yield "usecases", (company_name, research_results), {}
+                stage.set(use_cases=len(use_cases["use_cases"]))
+            notify("usecases", "done", use_cases)
+
+        # Step 3: Generate relevant resources for each usecases
+        if "resources" in reuse:
+            resources = _reused("resources", reuse, notify, on_resource)
+        else:
+            notify("resources", "running")
+            with span("stage", "resources", sources=sources):
+                resources = yield "resources", (use_cases,), {"on_usecase": on_resource, "sources": sources}
+            notify("resources", "done", resources)
+
+    return {
+        "message": f"Successfully completed the research for {company_name}",
+        "Overview": research_results,
+        "Usecases": use_cases,
+        "Resources": resources
+    }
+
+
+def _reused(stage, reuse, notify, on_resource=None):
+    payload = reuse[stage]
+    if on_resource is not None:
+        for index, entry in enumerate(payload["use_cases_resources"]):
+            on_resource(index, entry)
+    notify(stage, "done", payload)
+    return payload
@@ -0,0 +1,284 @@
+import cProfile
+import hmac
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .forking import register_fork_reset
+from .result_store import RESULTS_DIR, atomic_write, prune_dir
+from .telemetry import active_profiler
+
+PROFILES_DIR = RESULTS_DIR / "profiles"
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+TOP_FUNCTIONS = 40  # rows kept per sort order in the stored summary
+TOP_ALLOCATIONS = 15  # allocation sites still holding memory when the response is ready
+MEMORY_FRAMES = 1  # traceback depth tracemalloc records per allocation
+
+# tracemalloc and the worker hooks are process-wide, so one profiled request at a time
+_busy = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileSession:
+    """cProfile data for one request: its own thread plus every worker started through ``telemetry.in_context``."""
+
+    def __init__(self):
+        self.request_profile = cProfile.Profile()
+        self._profiles = [self.request_profile]
+        self._lock = threading.Lock()
+
+    def run(self, func, *args, **kwargs):
+        if sys.getprofile() is not None:
+            # This thread is already being profiled
+            return func(*args, **kwargs)
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        return profile.runcall(func, *args, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            try:
+                stats.add(profile)
+            except TypeError:
+                pass  # a worker that never called anything has no stats
+        return stats, len(profiles)
+
+
+def _function_name(func):
+    filename, line, name = func
+    if filename == "~":
+        return name  # built-ins, e.g. <method 'join' of 'str' objects>
+    for prefix in sorted(filter(None, sys.path), key=len, reverse=True):
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):].lstrip(os.sep)
+            break
+    return f"{filename}:{line}({name})"
+
+
+def hottest_functions(stats, sort="tottime", limit=TOP_FUNCTIONS):
+    """Rows of ``{function, calls, tottime_ms, cumtime_ms}`` sorted by ``sort`` (``tottime`` or ``cumtime``)."""
+    rows = [
+        {
+            "function": _function_name(func),
+            "calls": calls,
+            "tottime_ms": round(tottime * 1000, 2),
+            "cumtime_ms": round(cumtime * 1000, 2),
+        }
+        for func, (_, calls, tottime, cumtime, _) in stats.stats.items()
+    ]
+    rows.sort(key=lambda row: row[f"{sort}_ms"], reverse=True)
+    return rows[:limit]
+
+
+def profile_requested(request):
+    """True when profiling is on and the request carries a valid trigger.
+
+    The trigger is the ``X-Profile`` header; a query parameter would leave
+    the token in access logs and browser history. With
+    ``RESEARCH_PROFILING_TOKEN`` set its value must match the token;
+    otherwise any value works for staff users only.
+    """
+    if not getattr(settings, "RESEARCH_PROFILING", False):
+        return False
+    if request.path not in getattr(settings, "RESEARCH_PROFILING_PATHS", ()):
+        return False
+    trigger = request.headers.get(PROFILE_HEADER)
+    if not trigger:
+        return False
+    token = getattr(settings, "RESEARCH_PROFILING_TOKEN", "")
+    if token:
+        return hmac.compare_digest(trigger.encode("utf-8"), token.encode("utf-8"))
+    user = getattr(request, "user", None)
+    return bool(user is not None and user.is_staff)
+
+
+def _profile_paths(profile_id):
+    return PROFILES_DIR / f"{profile_id}.json", PROFILES_DIR / f"{profile_id}.prof"
+
+
+def _save(summary, stats):
+    summary_path, stats_path = _profile_paths(summary["id"])
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    stats.dump_stats(stats_path)
+    atomic_write(summary_path, json.dumps(summary).encode("utf-8"))
+    keep = getattr(settings, "RESEARCH_PROFILING_KEEP", 100)
+    prune_dir(PROFILES_DIR, ".json", keep)
+    prune_dir(PROFILES_DIR, ".prof", keep)
+
+
+def load_profile(profile_id):
+    """Stored summary of a profile, or None if it is unknown."""
+    try:
+        uuid.UUID(hex=profile_id)
+        with open(_profile_paths(profile_id)[0], encoding="utf-8") as f:
+            return json.load(f)
+    except (ValueError, OSError):
+        return None
+
+
+def profile_stats_path(profile_id):
+    """Path of the raw ``pstats`` dump (open with ``pstats`` or snakeviz), or None."""
+    if load_profile(profile_id) is None:
+        return None
+    path = _profile_paths(profile_id)[1]
+    return path if path.exists() else None
+
+
+def list_profiles(limit=50):
+    """Summaries of the newest stored profiles, without their function tables."""
+    try:
+        entries = [entry for entry in os.scandir(PROFILES_DIR) if entry.name.endswith(".json")]
+    except OSError:
+        return []
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    profiles = []
+    for entry in entries[:limit]:
+        summary = load_profile(entry.name[:-len(".json")])
+        if summary is not None:
+            profiles.append({key: value for key, value in summary.items() if not key.startswith("top_")})
+    return profiles
+
+
+class ProfilingMiddleware:
+    """Profile single requests to the paths in ``RESEARCH_PROFILING_PATHS`` on demand.
+
+    A triggered request (see ``profile_requested``) runs under cProfile, in
+    its own thread and in the pool workers it starts, with tracemalloc
+    tracking its peak memory; PDFs are rendered in-process instead of in
+    the render pool so the profile sees them. The stats are stored under
+    ``PROFILES_DIR`` and the response carries their id in ``X-Profile-Id``.
+
+    Only one request is profiled at a time; a trigger arriving meanwhile
+    gets ``X-Profile-Id: busy`` and is served normally. Work done after the
+    response is returned (streamed output, async jobs) is not covered.
+
+    Under ASGI the profiler runs on the event loop thread while the request
+    is awaited, so it also sees whatever other requests do on the loop in
+    the meantime; profile with no other traffic for clean numbers.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not profile_requested(request):
+            return self.get_response(request)
+        if not _busy.acquire(blocking=False):
+            response = self.get_response(request)
+            response[PROFILE_ID_HEADER] = "busy"
+            return response
+        try:
+            return self._profile(request)
+        finally:
+            _busy.release()
+
+    async def __acall__(self, request):
+        if not profile_requested(request):
+            return await self.get_response(request)
+        if not _busy.acquire(blocking=False):
+            response = await self.get_response(request)
+            response[PROFILE_ID_HEADER] = "busy"
+            return response
+        try:
+            session, started_tracing = self._start()
+            token = active_profiler.set(session)
+            start, cpu_start = time.perf_counter(), time.process_time()
+            session.request_profile.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                session.request_profile.disable()
+                active_profiler.reset(token)
+                measured = self._stop(start, cpu_start, started_tracing)
+            return self._finish(request, response, session, *measured)
+        finally:
+            _busy.release()
+
+    def _start(self):
+        session = ProfileSession()
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(MEMORY_FRAMES)
+        tracemalloc.reset_peak()
+        return session, started_tracing
+
+    def _stop(self, start, cpu_start, started_tracing):
+        wall, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
+        return wall, cpu, current_bytes, peak_bytes, snapshot
+
+    def _profile(self, request):
+        session, started_tracing = self._start()
+        token = active_profiler.set(session)
+        start, cpu_start = time.perf_counter(), time.process_time()
+
+        try:
+            response = session.request_profile.runcall(self.get_response, request)
+        finally:
+            active_profiler.reset(token)
+            measured = self._stop(start, cpu_start, started_tracing)
+        return self._finish(request, response, session, *measured)
+
+    def _finish(self, request, response, session, wall, cpu, current_bytes, peak_bytes, snapshot):
+        stats, threads = session.stats()
+        summary = {
+            "id": uuid.uuid4().hex,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "created_at": time.time(),
+            "wall_ms": round(wall * 1000, 1),
+            "process_cpu_ms": round(cpu * 1000, 1),
+            "profiled_threads": threads,
+            "peak_memory_bytes": peak_bytes,
+            "retained_memory_bytes": current_bytes,
+            "top_tottime": hottest_functions(stats, "tottime"),
+            "top_cumtime": hottest_functions(stats, "cumtime"),
+            "top_retained_allocations": [
+                {"line": str(stat.traceback[0]), "bytes": stat.size, "blocks": stat.count}
+                for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+            ],
+        }
+        try:
+            _save(summary, stats)
+        except OSError as e:
+            logger.error("Could not store profile: %s", e)
+            return response
+
+        response[PROFILE_ID_HEADER] = summary["id"]
+        logger.info(
+            "Profiled %s %s: %s ms, peak %.1f MiB, profile %s",
+            request.method, request.path, summary["wall_ms"], peak_bytes / 1024 / 1024, summary["id"],
+        )
+        return response
+
+
+def _reset_after_fork():
+    global _busy
+    _busy = threading.Lock()
+
+
+register_fork_reset(_reset_after_fork)
@@ -0,0 +1,345 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from .blocking import run_blocking
+from .forking import register_fork_reset
+from .steps import run_steps, run_steps_async
+from .telemetry import annotate, in_context, span
+
+# Comma-separated provider names to leave out unless a request asks for them
+DISABLED_SOURCES = {name.strip() for name in os.getenv("RESEARCH_DISABLED_SOURCES", "").split(",") if name.strip()}
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+class ProviderTimeout(TimeoutError):
+    """Raised when a provider call takes longer than the provider's timeout."""
+
+
+def is_error_result(result):
+    """True for the ``[{"error": ...}]`` lists the fetchers return on failure."""
+    return (
+        isinstance(result, list) and bool(result)
+        and all(isinstance(item, dict) and "error" in item for item in result)
+    )
+
+
+class CircuitBreaker:
+    """Fail fast after ``failure_threshold`` consecutive failures.
+
+    Once open, calls are refused for ``reset_after`` seconds; then a single
+    trial call is let through and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_after=30):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class Provider:
+    """One resource source and the limits it is called under.
+
+    Args:
+        name (str): Resource field the provider fills, e.g. ``"github_repositories"``.
+        fetch (callable): ``fetch(query)`` returning a list of resource dicts.
+        timeout (float): Seconds one call may take before it counts as failed.
+        concurrency (int): Maximum in-flight calls during a fan-out.
+        hedge_after (float, optional): Start a second, identical call when the
+            first has not answered after this many seconds; the first answer wins.
+            Only for idempotent, cheap lookups.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_after (float): Seconds the circuit stays open before a trial call.
+        enabled (bool): Whether requests use the provider unless they name it.
+        batch_fetch (callable, optional): ``batch_fetch(queries)`` answering
+            several queries with one upstream request, returning ``{query: result}``.
+        batch_size (int): Most queries merged into one ``batch_fetch`` call.
+        fetch_async (callable, optional): Coroutine version of ``fetch`` for
+            ``call_async``; without it the sync ``fetch`` runs in a thread.
+        batch_fetch_async (callable, optional): Coroutine version of ``batch_fetch``.
+    """
+
+    def __init__(self, name, fetch, timeout=10, concurrency=2, hedge_after=None,
+                 failure_threshold=5, reset_after=30, enabled=True, batch_fetch=None, batch_size=5,
+                 fetch_async=None, batch_fetch_async=None):
+        self.name = name
+        self.fetch = fetch
+        self.fetch_async = fetch_async
+        self.batch_fetch = batch_fetch
+        self.batch_fetch_async = batch_fetch_async
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.hedge_after = hedge_after
+        self.enabled = enabled and name not in DISABLED_SOURCES
+        self.breaker = CircuitBreaker(failure_threshold, reset_after)
+        self.stats = {
+            "calls": 0, "failures": 0, "timeouts": 0, "hedges": 0, "short_circuits": 0, "pool_replacements": 0,
+        }
+        self._executor = None
+        self._lock = threading.Lock()
+        self._abandoned = 0  # calls of the current pool still running after a timeout or a lost hedge
+        self._generation = 0
+
+    def _get_executor(self):
+        if self._executor is None or self._abandoned >= self.concurrency:
+            with self._lock:
+                if self._executor is not None and self._abandoned >= self.concurrency:
+                    # Hung calls hold half the pool: leave their threads to finish in the
+                    # old pool and start a new one, so they cannot block every later call.
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+                    self._abandoned = 0
+                    self._generation += 1
+                    self.stats["pool_replacements"] += 1
+                if self._executor is None:
+                    # Room for hedged calls and for calls abandoned after a timeout
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.concurrency * 2, thread_name_prefix=f"provider-{self.name}"
+                    )
+        return self._executor
+
+    def _abandon(self, futures):
+        with self._lock:
+            generation = self._generation
+        for future in futures:
+            if future.cancel() or future.done():
+                continue
+            with self._lock:
+                self._abandoned += 1
+            future.add_done_callback(lambda _: self._release(generation))
+
+    def _release(self, generation):
+        with self._lock:
+            if generation == self._generation:
+                self._abandoned -= 1
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def call(self, query):
+        """Run one lookup under the provider's breaker, timeout and hedging."""
+        return self._guarded(self.fetch, query, is_error_result)
+
+    def call_batch(self, queries):
+        """Answer several queries with one ``batch_fetch`` call; returns ``{query: result}``.
+
+        The batch counts as one call for the breaker and fails only if every
+        query in it failed.
+        """
+        return self._guarded(
+            self.batch_fetch, list(queries),
+            lambda results: bool(results) and all(is_error_result(result) for result in results.values()),
+        )
+
+    async def call_async(self, query):
+        """``call`` for coroutines; shares the breaker and stats with ``call``."""
+        return await self._guarded_async(self.fetch_async or _in_thread(self.fetch), query, is_error_result)
+
+    async def call_batch_async(self, queries):
+        """``call_batch`` for coroutines."""
+        return await self._guarded_async(
+            self.batch_fetch_async or _in_thread(self.batch_fetch), list(queries),
+            lambda results: bool(results) and all(is_error_result(result) for result in results.values()),
+        )
+
+    def _guarded(self, func, arg, failed):
+        return run_steps(self._guarded_steps(arg, failed), lambda _: self._call_with_timeout(func, arg, failed))
+
+    async def _guarded_async(self, func, arg, failed):
+        return await run_steps_async(
+            self._guarded_steps(arg, failed), lambda _: self._call_with_timeout_async(func, arg, failed)
+        )
+
+    def _guarded_steps(self, arg, failed):
+        # Breaker and stats around one call; yields once to have the call made.
+        with span("provider", self.name, queries=len(arg) if isinstance(arg, list) else 1) as provider_span:
+            if not self.breaker.allow():
+                self._count("short_circuits")
+                raise CircuitOpen(f"{self.name} is failing, skipped for now")
+
+            self._count("calls")
+            try:
+                result = yield None
+            except Exception:
+                self._count("failures")
+                self.breaker.record_failure()
+                raise
+
+            if failed(result):
+                self._count("failures")
+                self.breaker.record_failure()
+                provider_span.set(error="error result")
+            else:
+                self.breaker.record_success()
+            return result
+
+    def _deadlines(self, now):
+        """When the call times out and when to start a hedged call (None without hedging)."""
+        hedging = self.hedge_after is not None and self.hedge_after < self.timeout
+        return now + self.timeout, now + self.hedge_after if hedging else None
+
+    def _call_with_timeout(self, func, arg, failed):
+        executor = self._get_executor()
+        deadline, hedge_at = self._deadlines(time.monotonic())
+        pending = {executor.submit(in_context(func), arg)}
+        try:
+            # The first call to succeed wins; an exception or error result only ends the
+            # wait once no other call is left
+            while True:
+                done, pending = wait(
+                    pending, timeout=max((hedge_at or deadline) - time.monotonic(), 0), return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    if future.exception() is None and not failed(future.result()):
+                        return future.result()
+                if not pending:
+                    return done.pop().result()
+                if hedge_at is not None and time.monotonic() >= hedge_at:
+                    hedge_at = None
+                    self._count("hedges")
+                    annotate(hedged=True)
+                    pending.add(executor.submit(in_context(func), arg))
+                elif time.monotonic() >= deadline:
+                    self._count("timeouts")
+                    raise ProviderTimeout(f"{self.name} did not answer within {self.timeout}s")
+        finally:
+            # Pool threads cannot be stopped; calls still running finish in the background
+            # and their results are discarded.
+            self._abandon(pending)
+
+    async def _call_with_timeout_async(self, func, arg, failed):
+        loop = asyncio.get_running_loop()
+        deadline, hedge_at = self._deadlines(loop.time())
+        tasks = [asyncio.ensure_future(func(arg))]
+        pending = set(tasks)
+        try:
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max((hedge_at or deadline) - loop.time(), 0),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None and not failed(task.result()):
+                        return task.result()
+                if not pending:
+                    return done.pop().result()
+                if hedge_at is not None and loop.time() >= hedge_at:
+                    hedge_at = None
+                    self._count("hedges")
+                    annotate(hedged=True)
+                    tasks.append(asyncio.ensure_future(func(arg)))
+                    pending.add(tasks[-1])
+                elif loop.time() >= deadline:
+                    self._count("timeouts")
+                    raise ProviderTimeout(f"{self.name} did not answer within {self.timeout}s")
+        finally:
+            # Unlike pool threads, the losing and timed-out calls can be stopped
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # mark a losing call's error as seen
+
+
+def _in_thread(func):
+    async def call(arg):
+        return await run_blocking(func, arg)
+    return call
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def register_provider(provider):
+    """Add a provider, replacing any registered under the same name."""
+    with _registry_lock:
+        _registry[provider.name] = provider
+    return provider
+
+
+def get_provider(name):
+    return _registry.get(name)
+
+
+def select_providers(sources=None):
+    """Providers to use for a request, in registration order.
+
+    ``sources`` is a list of provider names (or a comma-separated string);
+    when given it overrides which providers are enabled.
+
+    Raises:
+        ValueError: If ``sources`` names an unknown provider.
+    """
+    if sources is None:
+        return [provider for provider in _registry.values() if provider.enabled]
+
+    if isinstance(sources, str):
+        sources = [name.strip() for name in sources.split(",") if name.strip()]
+    unknown = [name for name in sources if name not in _registry]
+    if unknown:
+        raise ValueError(f"Unknown sources: {', '.join(unknown)}; expected some of: {', '.join(_registry)}")
+    return [provider for name, provider in _registry.items() if name in sources]
+
+
+def provider_stats():
+    """Call counts and circuit state of every registered provider."""
+    return {
+        name: dict(
+            provider.stats, abandoned=provider._abandoned, state=provider.breaker.state, enabled=provider.enabled
+        )
+        for name, provider in _registry.items()
+    }
+
+
+def _reset_after_fork():
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    for provider in _registry.values():
+        provider._executor = None
+        provider._abandoned = 0
+        provider._lock = threading.Lock()
+        provider.breaker._lock = threading.Lock()
+
+
+register_fork_reset(_reset_after_fork)
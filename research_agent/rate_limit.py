@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from functools import lru_cache
+from .blocking import run_blocking
+from .forking import register_fork_reset
+from .response_cache import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are shared between threads only
+    fcntl = None
+
+RATE_LIMIT_DIR = CACHE_DIR / "ratelimit"
+
+# API -> (calls per minute, burst). Override with e.g. RATE_LIMIT_GITHUB="30/5"; "0" disables the limit.
+DEFAULT_LIMITS = {
+    "github": (30, 5) if os.getenv("GITHUB_API_KEY") else (10, 3),  # search API
+    "google": (60, 5),
+    "kaggle": (30, 3),
+    "gemini": (15, 3),
+}
+# Longest a call queues for a token before it is rejected
+MAX_WAIT = {
+    "github": 5,
+    "google": 5,
+    "kaggle": 5,
+    "gemini": 30,
+}
+DEFAULT_MAX_WAIT = 5  # seconds
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimited(Exception):
+    """Raised when a call would have to wait longer than allowed for its quota.
+
+    ``retry_after`` is the number of whole seconds until a new call would be let through.
+    """
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _parse_limit(value):
+    """``(calls per minute, burst)`` from a ``"30/5"`` or ``"30"`` override.
+
+    Raises:
+        ValueError: If either number is malformed, infinite or out of range.
+    """
+    per_minute, _, burst = value.partition("/")
+    per_minute, burst = float(per_minute), float(burst or 1)
+    if not (math.isfinite(per_minute) and math.isfinite(burst)) or per_minute < 0 or burst < 1:
+        raise ValueError("expected <calls per minute>/<burst> with calls >= 0 and burst >= 1")
+    return per_minute, burst
+
+
+@lru_cache(maxsize=None)
+def _override_limit(name, value):
+    # Cached per value, so a bad override is reported once rather than on every call
+    try:
+        return _parse_limit(value)
+    except ValueError as e:
+        default = DEFAULT_LIMITS.get(name, (60, 1))
+        logger.warning("Ignoring RATE_LIMIT_%s=%r (%s); using %g/%g", name.upper(), value, e, *default)
+        return default
+
+
+def get_limit(name):
+    """``(calls per minute, burst)`` for an API, from the environment or the defaults."""
+    override = os.getenv(f"RATE_LIMIT_{name.upper()}")
+    if override:
+        return _override_limit(name, override.strip())
+    return DEFAULT_LIMITS.get(name, (60, 1))
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _thread_lock(name):
+    with _locks_guard:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def _reserve(name, per_minute, burst, max_wait):
+    """Take a token from the shared bucket.
+
+    The bucket may go negative: each caller reserves the next free slot and
+    sleeps until it, so queued calls leave in order at the quota rate.
+
+    Returns:
+        tuple: ``(wait, taken)``; ``wait`` is the seconds until the token is
+        due, and ``taken`` is False, with the bucket untouched, when that is
+        longer than ``max_wait``.
+    """
+    rate = per_minute / 60.0
+    RATE_LIMIT_DIR.mkdir(parents=True, exist_ok=True)
+    with _thread_lock(name), open(RATE_LIMIT_DIR / f"{name}.json", "a+", encoding="utf-8") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        try:
+            state = json.loads(f.read())
+        except ValueError:
+            state = {"tokens": burst, "updated": 0.0}
+
+        now = time.time()
+        tokens = min(burst, state["tokens"] + max(now - state["updated"], 0) * rate)
+        wait = max(0.0, (1 - tokens) / rate)
+        if wait > max_wait:
+            return wait, False
+
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps({"tokens": tokens - 1, "updated": now}))
+        f.flush()
+        return wait, True
+
+
+def _record(name, waited=None):
+    with _stats_lock:
+        stats = _stats.setdefault(name, {
+            "calls": 0, "waited_calls": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "rejected": 0,
+        })
+        if waited is None:
+            stats["rejected"] += 1
+            return
+        stats["calls"] += 1
+        if waited > 0:
+            stats["waited_calls"] += 1
+            stats["wait_seconds"] += waited
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+
+
+def _take_token(name, max_wait):
+    """Reserve a token for API ``name``; return the seconds to wait before using it."""
+    per_minute, burst = get_limit(name)
+    if per_minute <= 0:
+        return 0.0
+    max_wait = MAX_WAIT.get(name, DEFAULT_MAX_WAIT) if max_wait is None else max_wait
+
+    wait, taken = _reserve(name, per_minute, burst, max_wait)
+    _record(name, wait if taken else None)
+    if not taken:
+        raise RateLimited(
+            f"{name} quota of {per_minute:g}/min exhausted, try again shortly",
+            retry_after=max(1, math.ceil(wait - max_wait)),
+        )
+    return wait
+
+
+def acquire(name, max_wait=None):
+    """Block until a call to API ``name`` fits its quota.
+
+    The bucket is shared by every thread and worker process using the same
+    ``RATE_LIMIT_DIR``.
+
+    Returns:
+        float: Seconds spent waiting.
+
+    Raises:
+        RateLimited: If the wait would exceed ``max_wait`` seconds (default
+            ``MAX_WAIT[name]``).
+    """
+    wait = _take_token(name, max_wait)
+    if wait > 0:
+        time.sleep(wait)
+    return wait
+
+
+async def acquire_async(name, max_wait=None):
+    """``acquire`` for coroutines: waits on the event loop instead of blocking the thread.
+
+    Taking the token locks the bucket file, which can block while another
+    thread or process holds it, so that part runs in the blocking-call pool.
+    """
+    wait = await run_blocking(_take_token, name, max_wait)
+    if wait > 0:
+        await asyncio.sleep(wait)
+    return wait
+
+
+def rate_limited(name, func, max_wait=None):
+    """Wrap ``func`` so every call first waits for API ``name``'s quota."""
+    def call(*args, **kwargs):
+        acquire(name, max_wait)
+        return func(*args, **kwargs)
+
+    return call
+
+
+def rate_limited_async(name, func, max_wait=None):
+    """``rate_limited`` for a coroutine function."""
+    async def call(*args, **kwargs):
+        await acquire_async(name, max_wait)
+        return await func(*args, **kwargs)
+
+    return call
+
+
+def rate_limit_stats():
+    """Per-API call, wait and rejection counts for this process."""
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def _reset_after_fork():
+    global _locks_guard, _stats_lock
+    _locks_guard = threading.Lock()
+    _stats_lock = threading.Lock()
+    _locks.clear()
+
+
+register_fork_reset(_reset_after_fork)
@@ -1,93 +1,276 @@
+import asyncio
 import os
 import re
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait
 from .format_result import *
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-from google import genai
+from . import http_client
+from .html_extract import extract_paragraphs, extract_paragraphs_async
+from .near_dedup import remove_near_duplicates
+from .context_packing import pack_context, CONTEXT_TOKEN_BUDGET
+from .llm import generate_text, generate_text_async
+from .response_cache import cached_fetch, cached_fetch_async, http_fetcher, http_fetcher_async
+from .rate_limit import RateLimited, rate_limited, rate_limited_async
+from .telemetry import in_context, span
 
 GOOGLE_SEARCH_API_KEY = os.getenv("GOOGLE_SEARCH_API")
-GEMINI_API_KEY=os.getenv("GEMINI_API_KEY")
 CX = "b5e652f249c6144c2"
+GOOGLE_SEARCH_URL = os.getenv("GOOGLE_SEARCH_URL", "https://www.googleapis.com/customsearch/v1")
 
-# Configure Gemini API key
-client = genai.Client(api_key=GEMINI_API_KEY)
+# Scrape stage limits
+SCRAPE_MAX_WORKERS = 6
+SCRAPE_URL_TIMEOUT = 5  # seconds per page
+SCRAPE_DEADLINE = 12  # seconds for the whole stage
+SCRAPE_CHAR_BUDGET = 1500  # characters kept per page
+CONTEXT_PAGE_CHARS = 6000  # characters read per page when passages are ranked before packing
+SCRAPE_MAX_BYTES = 2 * 1024 * 1024  # body bytes read per page
+
+# Common unwanted phrases removed from scraped text
+UNWANTED_PHRASES = [
+    "Read more", "Learn more", "Click here", "Subscribe", "Sign up",
+    "Follow us", "Contact us", "Get started", "All rights reserved"
+]
+UNWANTED_PHRASES_RE = re.compile("|".join(map(re.escape, UNWANTED_PHRASES)))
 
 def search_google(query):
     """Fetch top search results from Google API and prioritize Wikipedia."""
-    url = f"https://www.googleapis.com/customsearch/v1?q={query}&key={GOOGLE_SEARCH_API_KEY}&cx={CX}"
-    response = requests.get(url)
-    data = response.json()
+    url = GOOGLE_SEARCH_URL
+    params = {"q": query, "key": GOOGLE_SEARCH_API_KEY, "cx": CX}
+    try:
+        data = cached_fetch("google", query, rate_limited("google", http_fetcher(url, params=params)), params={"cx": CX})
+    except (requests.RequestException, RateLimited) as e:
+        print(f"Google search failed: {e}")
+        return []
     
+    return _ranked_links(data)
+
+
+def _ranked_links(data):
     links = [item["link"] for item in data.get("items", [])[:5]]  # Get top 5 results
     
     # Prioritize Wikipedia link if available
     wiki_link = next((link for link in links if "wikipedia.org" in link), None)
     if wiki_link:
+        links.remove(wiki_link)
         links.insert(0, wiki_link)  # Move Wikipedia to the top
     
     return links
 
-def extract_text_from_url(url):
-    """Scrape text from a URL with improved filtering."""
+
+async def search_google_async(query):
+    """``search_google`` for coroutines."""
+    import httpx
+    params = {"q": query, "key": GOOGLE_SEARCH_API_KEY, "cx": CX}
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=5)
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Extract text from paragraph tags
-        paragraphs = soup.find_all("p")
-        text = " ".join([p.get_text() for p in paragraphs])
-        
-        # Remove common unwanted phrases
-        unwanted_phrases = [
-            "Read more", "Learn more", "Click here", "Subscribe", "Sign up",
-            "Follow us", "Contact us", "Get started", "All rights reserved"
-        ]
-        for phrase in unwanted_phrases:
-            text = text.replace(phrase, "")
-        
-        # Limit text to 1500 characters
-        return text[:1500] if text else "No relevant content found."
-    
-    except Exception as e:
-        return f"Error extracting content: {e}"
+        data = await cached_fetch_async(
+            "google", query, rate_limited_async("google", http_fetcher_async(GOOGLE_SEARCH_URL, params=params)),
+            params={"cx": CX}
+        )
+    except (httpx.HTTPError, RateLimited) as e:
+        print(f"Google search failed: {e}")
+        return []
+
+    return _ranked_links(data)
+
+def _remove_unwanted_phrases(text):
+    return UNWANTED_PHRASES_RE.sub("", text)
+
+
+def extract_page(url, timeout=SCRAPE_URL_TIMEOUT, char_budget=SCRAPE_CHAR_BUDGET, max_bytes=SCRAPE_MAX_BYTES):
+    """Scrape paragraph text from a URL, reading only as much of the page as needed.
+
+    Returns:
+        tuple: ``(text, stats)``; ``stats`` has ``bytes_read`` and ``bytes_skipped``.
+    """
+    response = http_client.get(url, timeout=timeout, retry=False, stream=True)
+    content_type = response.headers.get("Content-Type", "text/html")
+    if "html" not in content_type and not content_type.startswith("text/"):
+        response.close()
+        return "", {"bytes_read": 0, "bytes_skipped": None}
+
+    text, stats = extract_paragraphs(response, char_budget, max_bytes, clean=_remove_unwanted_phrases)
+    return text[:char_budget], stats
+
+
+def scrape_page(url, timeout=SCRAPE_URL_TIMEOUT, char_budget=SCRAPE_CHAR_BUDGET):
+    """Like ``extract_text_from_url`` but also returns the read stats.
+
+    ``stats["failed"]`` is True when the text is an error or empty-page placeholder.
+    """
+    with span("call", "page", host=urlparse(url).hostname) as call:
+        try:
+            text, stats = extract_page(url, timeout=timeout, char_budget=char_budget)
+            stats["failed"] = not text
+            call.set(bytes=stats["bytes_read"], chars=len(text))
+            return (text if text else "No relevant content found."), stats
+
+        except Exception as e:
+            call.set(error=str(e))
+            return f"Error extracting content: {e}", {"bytes_read": 0, "bytes_skipped": None, "failed": True}
+
+
+def extract_text_from_url(url, timeout=SCRAPE_URL_TIMEOUT):
+    """Scrape text from a URL with improved filtering."""
+    text, _ = scrape_page(url, timeout=timeout)
+    return text
+
+
+async def extract_page_async(url, timeout=SCRAPE_URL_TIMEOUT, char_budget=SCRAPE_CHAR_BUDGET, max_bytes=SCRAPE_MAX_BYTES):
+    """``extract_page`` for coroutines."""
+    response = await http_client.get_async(url, timeout=timeout, retry=False, stream=True)
+    content_type = response.headers.get("Content-Type", "text/html")
+    if "html" not in content_type and not content_type.startswith("text/"):
+        await response.aclose()
+        return "", {"bytes_read": 0, "bytes_skipped": None}
+
+    text, stats = await extract_paragraphs_async(response, char_budget, max_bytes, clean=_remove_unwanted_phrases)
+    return text[:char_budget], stats
+
+
+async def scrape_page_async(url, timeout=SCRAPE_URL_TIMEOUT, char_budget=SCRAPE_CHAR_BUDGET):
+    """``scrape_page`` for coroutines."""
+    with span("call", "page", host=urlparse(url).hostname) as call:
+        try:
+            text, stats = await extract_page_async(url, timeout=timeout, char_budget=char_budget)
+            stats["failed"] = not text
+            call.set(bytes=stats["bytes_read"], chars=len(text))
+            return (text if text else "No relevant content found."), stats
+
+        except Exception as e:
+            call.set(error=str(e))
+            return f"Error extracting content: {e}", {"bytes_read": 0, "bytes_skipped": None, "failed": True}
+
+
+async def extract_text_from_url_async(url, timeout=SCRAPE_URL_TIMEOUT):
+    """``extract_text_from_url`` for coroutines."""
+    text, _ = await scrape_page_async(url, timeout=timeout)
+    return text
     
-def generate_company_overview(scraped_info):
-    """Generates a company overview using Google Gemini."""
-    prompt = (
+def _overview_prompt(scraped_info):
+    return (
         "Provide a 200 words concise and well-structured summary of the following company details. "
         "Ensure key information is retained while removing redundancy and unnecessary details. "
         "Focus on the company's core business, major milestones, and recent developments:\n\n"
         f"{scraped_info}"
     )
 
+
+def generate_company_overview(scraped_info):
+    """Generates a company overview using Google Gemini."""
+    prompt = _overview_prompt(scraped_info)
+
     model = "gemini-2.0-flash"
 
-    response = client.models.generate_content(
-        model=model,
-        contents=prompt
-    )
+    return generate_text(prompt, model=model)
+
+
+async def generate_company_overview_async(scraped_info):
+    """``generate_company_overview`` for coroutines."""
+    return await generate_text_async(_overview_prompt(scraped_info), model="gemini-2.0-flash")
+
+
+def scrape_urls(urls, max_workers=SCRAPE_MAX_WORKERS, timeout=SCRAPE_URL_TIMEOUT, deadline=SCRAPE_DEADLINE,
+                char_budget=SCRAPE_CHAR_BUDGET, skip_failed=False):
+    """Scrape the given URLs concurrently and return their texts in rank order.
+
+    Duplicate URLs are fetched once. Pages that are still loading when the
+    stage deadline expires are dropped from the result, as are pages that
+    failed or were empty when ``skip_failed`` is set.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(unique_urls)))
+    futures = {url: executor.submit(in_context(scrape_page), url, timeout, char_budget) for url in unique_urls}
+    done, not_done = wait(futures.values(), timeout=deadline)
+    # Don't hold the request up on stragglers; their sockets time out on their own.
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    pages = [futures[url].result() for url in unique_urls if futures[url] in done]
+    return _scraped_texts(pages, len(unique_urls), len(not_done), skip_failed)
 
-    return response.text   
 
+def _scraped_texts(pages, total, timed_out, skip_failed):
+    if timed_out:
+        print(f"Scrape deadline reached, skipped {timed_out} of {total} pages")
+    bytes_read = sum(stats["bytes_read"] for _, stats in pages)
+    bytes_skipped = sum(stats["bytes_skipped"] or 0 for _, stats in pages)
+    print(f"Scraped {len(pages)} pages: read {bytes_read} bytes, skipped {bytes_skipped} bytes")
 
-def get_company_info(company_name):
+    return [text for text, stats in pages if not (skip_failed and stats["failed"])]
+
+
+async def scrape_urls_async(urls, timeout=SCRAPE_URL_TIMEOUT, deadline=SCRAPE_DEADLINE,
+                            char_budget=SCRAPE_CHAR_BUDGET, skip_failed=False):
+    """``scrape_urls`` for coroutines: every page is fetched at once, stragglers are cancelled at the deadline."""
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return []
+
+    tasks = {url: asyncio.ensure_future(scrape_page_async(url, timeout, char_budget)) for url in unique_urls}
+    done, not_done = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in not_done:
+        task.cancel()
+
+    pages = [tasks[url].result() for url in unique_urls if tasks[url] in done]
+    return _scraped_texts(pages, len(unique_urls), len(not_done), skip_failed)
+
+
+def get_company_info(company_name, token_budget=CONTEXT_TOKEN_BUDGET):
     """Search, scrape, and summarize company info"""
-    search_results = search_google(company_name + " company profile")
-    extracted_texts = [extract_text_from_url(url) for url in search_results]
+    with span("stage", "search"):
+        search_results = search_google(company_name + " company profile")
+    with span("stage", "scrape", pages=len(search_results)):
+        extracted_texts = scrape_urls(search_results, char_budget=CONTEXT_PAGE_CHARS, skip_failed=True)
+    with span("stage", "context"):
+        return build_context(extracted_texts, company_name, token_budget)
+
+
+def build_context(extracted_texts, company_name, token_budget=CONTEXT_TOKEN_BUDGET):
+    """Turn scraped pages (in rank order) into the overview prompt context."""
+    # Clean each page on its own so one page's footer doesn't cut the others
+    extracted_texts = [clean_scraped_text(text, limit=None) for text in extracted_texts]
+
+    # Drop passages that other, higher-ranked sources already cover
+    extracted_texts, dedup_stats = remove_near_duplicates(extracted_texts)
+    print(
+        f"Near-duplicate filter dropped {dedup_stats['dropped_passages']} of {dedup_stats['passages']} passages, "
+        f"saving ~{dedup_stats['tokens_saved']} tokens"
+    )
     
-    # Combine extracted texts
-    combined_text = remove_duplicates(truncate_text(clean_irrelevant_content(" ".join(extracted_texts))))
+    # Keep the passages most relevant to the company within the prompt token budget
+    combined_text, pack_stats = pack_context(extracted_texts, company_name, token_budget)
+    print(
+        f"Packed {pack_stats['packed_passages']} of {pack_stats['passages']} passages "
+        f"into {pack_stats['tokens']}/{token_budget} tokens"
+    )
     
     return combined_text 
 
+async def get_company_info_async(company_name, token_budget=CONTEXT_TOKEN_BUDGET):
+    """``get_company_info`` for coroutines."""
+    with span("stage", "search"):
+        search_results = await search_google_async(company_name + " company profile")
+    with span("stage", "scrape", pages=len(search_results)):
+        extracted_texts = await scrape_urls_async(search_results, char_budget=CONTEXT_PAGE_CHARS, skip_failed=True)
+    with span("stage", "context"):
+        # Off the loop: the first call may load the tokenizer
+        return await asyncio.to_thread(build_context, extracted_texts, company_name, token_budget)
+
 # Driver function
 def get_summarized_info(comapny):
     """Get the summarised info"""
     info = get_company_info(comapny)
     return generate_company_overview(info)
 
+
+async def get_summarized_info_async(company_name):
+    """``get_summarized_info`` for coroutines."""
+    info = await get_company_info_async(company_name)
+    return await generate_company_overview_async(info)
+
 # # Example usage
 # query = input("Enter a company/industry name: ")
 # info = get_company_info(query)
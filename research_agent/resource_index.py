@@ -0,0 +1,350 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from . import http_client
+from .clients import get_client
+from .forking import register_fork_reset
+from .rate_limit import acquire
+from .response_cache import CACHE_DIR
+
+INDEX_PATH = Path(os.getenv("RESOURCE_INDEX_PATH", CACHE_DIR / "resource_index.sqlite3"))
+
+# Sources share the resource field names used in the research payload
+SOURCES = ("huggingface_models", "huggingface_datasets", "research_papers", "kaggle_datasets")
+
+HF_PAGE_SIZE = 1000
+ARXIV_PAGE_SIZE = 200
+ARXIV_PAGE_DELAY = 3  # seconds between arXiv API pages, as its terms of use ask
+ARXIV_CATEGORIES = ("cs.AI", "cs.LG", "cs.CL", "cs.CV", "cs.IR", "stat.ML")
+DESCRIPTION_CHARS = 500
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+TERM_RE = re.compile(r"\w+")
+ARXIV_VERSION_RE = re.compile(r"v\d+$")
+
+
+def match_expression(query):
+    """FTS5 query requiring every word of ``query``, with each word quoted as a literal."""
+    terms = TERM_RE.findall(query.lower())
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class ResourceIndex:
+    """SQLite FTS5 index of resource metadata (name, url, description) per source.
+
+    Rows are keyed by ``(source, ref)`` so re-ingesting a snapshot updates
+    entries in place; ``sync_state`` remembers how far each source has
+    been crawled for incremental refreshes.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS resources (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                ref TEXT NOT NULL,
+                name TEXT NOT NULL,
+                url TEXT NOT NULL,
+                description TEXT NOT NULL DEFAULT '',
+                popularity REAL NOT NULL DEFAULT 0,
+                updated TEXT,
+                UNIQUE (source, ref)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS resources_fts USING fts5(
+                name, description, content='resources', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS resources_ai AFTER INSERT ON resources BEGIN
+                INSERT INTO resources_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS resources_ad AFTER DELETE ON resources BEGIN
+                INSERT INTO resources_fts (resources_fts, rowid, name, description)
+                VALUES ('delete', old.id, old.name, old.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS resources_au AFTER UPDATE ON resources BEGIN
+                INSERT INTO resources_fts (resources_fts, rowid, name, description)
+                VALUES ('delete', old.id, old.name, old.description);
+                INSERT INTO resources_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+            END;
+            CREATE TABLE IF NOT EXISTS sync_state (
+                source TEXT PRIMARY KEY, cursor TEXT, synced_at REAL NOT NULL
+            );
+        """)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, source, rows):
+        """Insert or update ``rows`` (dicts with ref, name, url, description, popularity, updated)."""
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT INTO resources (source, ref, name, url, description, popularity, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source, ref) DO UPDATE SET name = excluded.name, url = excluded.url, "
+                "description = excluded.description, popularity = excluded.popularity, updated = excluded.updated",
+                [
+                    (
+                        source, row["ref"], row["name"], row["url"],
+                        (row.get("description") or "")[:DESCRIPTION_CHARS],
+                        row.get("popularity") or 0, row.get("updated"),
+                    )
+                    for row in rows
+                ],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def search(self, source, query, limit=5):
+        """Best-matching ``(name, url)`` pairs of a source; every query word must match."""
+        expression = match_expression(query)
+        if not expression:
+            return []
+        return self._connect().execute(
+            "SELECT r.name, r.url FROM resources_fts JOIN resources r ON r.id = resources_fts.rowid "
+            "WHERE resources_fts MATCH ? AND r.source = ? "
+            "ORDER BY resources_fts.rank, r.popularity DESC LIMIT ?",
+            (expression, source, limit),
+        ).fetchall()
+
+    def count(self, source=None):
+        if source is None:
+            return self._connect().execute("SELECT COUNT(*) FROM resources").fetchone()[0]
+        return self._connect().execute("SELECT COUNT(*) FROM resources WHERE source = ?", (source,)).fetchone()[0]
+
+    def get_cursor(self, source):
+        row = self._connect().execute("SELECT cursor FROM sync_state WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def set_cursor(self, source, cursor):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO sync_state (source, cursor, synced_at) VALUES (?, ?, ?)",
+            (source, cursor, time.time()),
+        )
+
+
+_index = None
+_index_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_index():
+    """Return the process-wide resource index."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ResourceIndex()
+    return _index
+
+
+def search_local(source, query, limit=5):
+    """``(name, url)`` pairs from the local index, or None on a miss so callers can go live."""
+    try:
+        rows = get_index().search(source, query, limit)
+    except sqlite3.Error as e:
+        print(f"Resource index lookup failed: {e}")
+        rows = []
+    with _stats_lock:
+        counters = _stats.setdefault(source, {"hits": 0, "misses": 0})
+        counters["hits" if rows else "misses"] += 1
+    return rows or None
+
+
+def index_stats():
+    """Local index hits and misses per source since process start."""
+    with _stats_lock:
+        return {source: dict(counters) for source, counters in _stats.items()}
+
+
+# Crawlers: each yields rows newest-first and stops at the previous cursor unless ``since`` is None
+
+def crawl_huggingface(kind, since=None, max_items=5000):
+    """Yield model or dataset metadata from the Hugging Face Hub, most recently modified first."""
+    url = f"https://huggingface.co/api/{kind}"
+    params = {"sort": "lastModified", "direction": -1, "limit": HF_PAGE_SIZE}
+    base = "https://huggingface.co/" if kind == "models" else "https://huggingface.co/datasets/"
+    seen = 0
+    while url and seen < max_items:
+        response = http_client.get(url, params=params)
+        response.raise_for_status()
+        for item in response.json():
+            updated = item.get("lastModified") or item.get("createdAt")
+            if since and updated and updated <= since:
+                return
+            tags = [item.get("pipeline_tag") or ""] + [tag for tag in item.get("tags", []) if ":" not in tag]
+            yield {
+                "ref": item["id"],
+                "name": item["id"],
+                "url": base + item["id"],
+                "description": " ".join(tag for tag in tags if tag),
+                "popularity": item.get("downloads") or item.get("likes") or 0,
+                "updated": updated,
+            }
+            seen += 1
+            if seen >= max_items:
+                return
+        # The Hub paginates with a cursor in the Link header
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+
+def crawl_arxiv(since=None, max_items=5000):
+    """Yield ML-related arXiv papers, most recently updated first."""
+    query = " OR ".join(f"cat:{category}" for category in ARXIV_CATEGORIES)
+    start = 0
+    while start < max_items:
+        if start:
+            time.sleep(ARXIV_PAGE_DELAY)
+        response = http_client.get("http://export.arxiv.org/api/query", params={
+            "search_query": query, "sortBy": "lastUpdatedDate", "sortOrder": "descending",
+            "start": start, "max_results": min(ARXIV_PAGE_SIZE, max_items - start),
+        })
+        response.raise_for_status()
+        entries = ET.fromstring(response.text).findall(f"{ATOM}entry")
+        if not entries:
+            return
+        for entry in entries:
+            updated = entry.findtext(f"{ATOM}updated", "").strip()
+            if since and updated and updated <= since:
+                return
+            # Entry ids carry the revision (.../abs/2401.01234v2); key papers by the versionless id
+            link = ARXIV_VERSION_RE.sub("", entry.findtext(f"{ATOM}id", "").strip())
+            title = " ".join(entry.findtext(f"{ATOM}title", "").split())
+            yield {
+                "ref": link.split("/abs/", 1)[-1],
+                "name": title,
+                "url": link,
+                "description": " ".join(entry.findtext(f"{ATOM}summary", "").split()),
+                "updated": updated,
+            }
+        start += len(entries)
+
+
+def crawl_kaggle(since=None, max_items=5000):
+    """Yield Kaggle dataset metadata, most recently updated first."""
+    api = get_client("kaggle")
+    page = 1
+    seen = 0
+    while seen < max_items:
+        acquire("kaggle")
+        datasets = api.dataset_list(sort_by="updated", page=page)
+        if not datasets:
+            return
+        for dataset in datasets:
+            updated = str(getattr(dataset, "lastUpdated", "") or "")
+            if since and updated and updated <= since:
+                return
+            yield {
+                "ref": dataset.ref,
+                "name": dataset.ref,
+                "url": f"https://www.kaggle.com/datasets/{dataset.ref}",
+                "description": " ".join(
+                    str(getattr(dataset, field, "") or "") for field in ("title", "subtitle")
+                ),
+                "popularity": getattr(dataset, "downloadCount", 0) or 0,
+                "updated": updated,
+            }
+            seen += 1
+            if seen >= max_items:
+                return
+        page += 1
+
+
+CRAWLERS = {
+    "huggingface_models": lambda since, max_items: crawl_huggingface("models", since, max_items),
+    "huggingface_datasets": lambda since, max_items: crawl_huggingface("datasets", since, max_items),
+    "research_papers": crawl_arxiv,
+    "kaggle_datasets": crawl_kaggle,
+}
+
+
+def refresh_source(source, full=False, max_items=5000, batch_size=500):
+    """Crawl one source into the index, stopping at the last sync unless ``full``.
+
+    Returns:
+        int: Number of rows inserted or updated.
+    """
+    index = get_index()
+    since = None if full else index.get_cursor(source)
+    newest = since
+    batch = []
+    written = 0
+    crawled = 0
+    for row in CRAWLERS[source](since, max_items):
+        crawled += 1
+        if row.get("updated") and (newest is None or row["updated"] > newest):
+            newest = row["updated"]
+        batch.append(row)
+        if len(batch) >= batch_size:
+            written += index.upsert(source, batch)
+            batch = []
+    if batch:
+        written += index.upsert(source, batch)
+    # A crawl cut off at max_items has not reached the cursor: moving it to the newest row
+    # would skip everything between the two for good, so keep it and crawl the gap again.
+    # An interrupted run raises before this point and is retried the same way.
+    if full or crawled < max_items:
+        index.set_cursor(source, newest)
+    else:
+        print(f"Crawl of {source} stopped at {max_items} items before reaching its last sync; "
+              "cursor left in place, raise max_items or run a full refresh")
+    return written
+
+
+def ingest_snapshot(path, batch_size=1000):
+    """Bulk-load a JSON Lines snapshot with one ``{"source", "ref", "name", "url", ...}`` object per line.
+
+    Returns:
+        dict: Rows written per source.
+    """
+    index = get_index()
+    batches = {}
+    written = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            source = row.pop("source")
+            if source not in SOURCES:
+                raise ValueError(f"Unknown source {source!r} in snapshot")
+            batch = batches.setdefault(source, [])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                written[source] = written.get(source, 0) + index.upsert(source, batch)
+                batches[source] = []
+    for source, batch in batches.items():
+        if batch:
+            written[source] = written.get(source, 0) + index.upsert(source, batch)
+    return written
+
+
+def _reset_after_fork():
+    # SQLite connections must not cross a fork.
+    global _index, _index_lock, _stats_lock
+    _index = None
+    _index_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+
+
+register_fork_reset(_reset_after_fork)
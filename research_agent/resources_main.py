@@ -1,132 +1,347 @@
 import os
+import re
 import requests
 from dotenv import load_dotenv
 import xml.etree.ElementTree as ET
 import subprocess
 import json
+import threading
 import feedparser
-from kaggle.api.kaggle_api_extended import KaggleApi
+from functools import partial
+from .fanout import fan_out, fan_out_async, TIMED_OUT
+from . import http_client
+from .blocking import run_blocking
+from .clients import get_client
+from .providers import Provider, is_error_result, register_provider, select_providers
+from .response_cache import cached_fetch, cached_fetch_async, http_fetcher, http_fetcher_async, normalize_query
+from .rate_limit import RateLimited, acquire, rate_limited, rate_limited_async
+from .resource_index import search_local
+from .semantic_cache import get_semantic_cache
 
 GITHUB_TOKEN = os.getenv("GITHUB_API_KEY")
 
-os.environ['KAGGLE_USERNAME'] = os.getenv("KAGGLE_USERNAME")
-os.environ['KAGGLE_KEY'] = os.getenv("KAGGLE_KEY")
+REQUEST_TIMEOUT = http_client.DEFAULT_TIMEOUT  # seconds per provider call
 
-api = KaggleApi()
-api.authenticate()
+# Upstream API roots; overridable to point at stand-in servers
+HUGGINGFACE_API_URL = os.getenv("HUGGINGFACE_API_URL", "https://huggingface.co/api")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
 
-def fetch_huggingface_models(query, limit=5):
+RESOURCES_DEADLINE = 20  # seconds for the whole resources stage
+
+# "local" answers Hugging Face, Kaggle and arXiv lookups from the resource index
+# (see the build_resource_index command) and only calls the live API on a miss
+RESOURCE_LOOKUP_MODE = os.getenv("RESOURCE_LOOKUP_MODE", "live")
+
+def _local_results(source, query, limit, mode, name_key="name"):
+    """Resource dicts from the local index, or None when the live API should be asked."""
+    if (mode or RESOURCE_LOOKUP_MODE) != "local":
+        return None
+    rows = search_local(source, query, limit)
+    if rows is None:
+        return None
+    return [{name_key: name, "url": url} for name, url in rows]
+
+
+def fetch_huggingface_models(query, limit=5, mode=None):
     """Fetch relevant Hugging Face models based on the input query.
     
     Args:
         query (str): The search query for models.
         limit (int): The number of models to return (default: 5).
+        mode (str, optional): ``"live"`` or ``"local"``; defaults to ``RESOURCE_LOOKUP_MODE``.
 
     Returns:
         list: A list of dictionaries containing model names and their URLs.
     """
-    url = f"https://huggingface.co/api/models?search={query}"
+    local = _local_results("huggingface_models", query, limit, mode)
+    if local is not None:
+        return local
+
+    url = f"{HUGGINGFACE_API_URL}/models"
     
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        models = response.json()
-
-        if not models:
-            return [{"message": "No relevant models found"}]
+        params = {"search": query, "limit": limit}
+        models = cached_fetch(
+            "huggingface_models", query,
+            http_fetcher(url, params=params, timeout=REQUEST_TIMEOUT), params={"limit": limit}
+        )
 
-        model_list = [
-            {"name": model["id"], "url": f"https://huggingface.co/{model['id']}"}
-            for model in models[:limit]
-        ]
-        
-        return model_list
+        return _huggingface_list(models, limit, "https://huggingface.co/", "No relevant models found")
     
     except requests.RequestException as e:
         return [{"error": str(e)}]    
 
+
+def _huggingface_list(items, limit, base_url, empty_message):
+    if not items:
+        return [{"message": empty_message}]
+    return [{"name": item["id"], "url": f"{base_url}{item['id']}"} for item in items[:limit]]
+
+
+async def _fetch_huggingface_async(kind, query, limit, mode):
+    import httpx
+    source = f"huggingface_{kind}"
+    local = _local_results(source, query, limit, mode)
+    if local is not None:
+        return local
+
+    try:
+        items = await cached_fetch_async(
+            source, query,
+            http_fetcher_async(f"{HUGGINGFACE_API_URL}/{kind}", params={"search": query, "limit": limit}, timeout=REQUEST_TIMEOUT),
+            params={"limit": limit}
+        )
+    except httpx.HTTPError as e:
+        return [{"error": str(e)}]
+    if kind == "models":
+        return _huggingface_list(items, limit, "https://huggingface.co/", "No relevant models found")
+    return _huggingface_list(items, limit, "https://huggingface.co/datasets/", "No relevant datasets found")
+
+
+async def fetch_huggingface_models_async(query, limit=5, mode=None):
+    """``fetch_huggingface_models`` for coroutines."""
+    return await _fetch_huggingface_async("models", query, limit, mode)
+
+
+async def fetch_huggingface_datasets_async(query, limit=5, mode=None):
+    """``fetch_huggingface_datasets`` for coroutines."""
+    return await _fetch_huggingface_async("datasets", query, limit, mode)
+
     
-def fetch_huggingface_datasets(query, limit=5):
+def fetch_huggingface_datasets(query, limit=5, mode=None):
     """Fetch relevant Hugging Face datasets based on the input query.
     
     Args:
         query (str): The search query for datasets.
         limit (int): The number of datasets to return (default: 5).
+        mode (str, optional): ``"live"`` or ``"local"``; defaults to ``RESOURCE_LOOKUP_MODE``.
 
     Returns:
         list: A list of dictionaries containing dataset names and their URLs.
     """
-    url = f"https://huggingface.co/api/datasets?search={query}"
+    local = _local_results("huggingface_datasets", query, limit, mode)
+    if local is not None:
+        return local
+
+    url = f"{HUGGINGFACE_API_URL}/datasets"
     
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        datasets = response.json()
-
-        if not datasets:
-            return [{"message": "No relevant datasets found"}]
+        params = {"search": query, "limit": limit}
+        datasets = cached_fetch(
+            "huggingface_datasets", query,
+            http_fetcher(url, params=params, timeout=REQUEST_TIMEOUT), params={"limit": limit}
+        )
 
-        dataset_list = [
-            {"name": dataset["id"], "url": f"https://huggingface.co/datasets/{dataset['id']}"}
-            for dataset in datasets[:limit]
-        ]
-        
-        return dataset_list
+        return _huggingface_list(datasets, limit, "https://huggingface.co/datasets/", "No relevant datasets found")
     
     except requests.RequestException as e:
         return [{"error": str(e)}]
     
 
-def fetch_kaggle_datasets(query, limit=5):
+def fetch_kaggle_datasets(query, limit=5, mode=None):
     """Fetch relevant Kaggle datasets based on the input query.
 
     Args:
         query (str): The search query for datasets.
         limit (int): The number of datasets to return (default: 5).
+        mode (str, optional): ``"live"`` or ``"local"``; defaults to ``RESOURCE_LOOKUP_MODE``.
 
     Returns:
         list: A list of dictionaries containing dataset names and their URLs.
     """
+    local = _local_results("kaggle_datasets", query, limit, mode)
+    if local is not None:
+        return local
+
+    def fetch(etag):
+        # The Kaggle SDK has no conditional requests, cache the trimmed result instead.
+        acquire("kaggle")
+        datasets = get_client("kaggle").dataset_list(search=query)
+        return [dataset.ref for dataset in datasets[:limit]], None
+
     try:
-        datasets = api.dataset_list(search=query)
+        refs = cached_fetch("kaggle", query, fetch, params={"limit": limit})
         
-        if not datasets:
+        if not refs:
             return [{"message": "No relevant datasets found"}]
 
         dataset_list = [
-            {"name": dataset.ref, "url": f"https://www.kaggle.com/datasets/{dataset.ref}"}
-            for dataset in datasets[:limit]
+            {"name": ref, "url": f"https://www.kaggle.com/datasets/{ref}"}
+            for ref in refs
         ]
 
         return dataset_list
     
     except Exception as e:
         return [{"error": str(e)}]
+
+
+async def fetch_kaggle_datasets_async(query, limit=5, mode=None):
+    """``fetch_kaggle_datasets`` for coroutines; the Kaggle SDK is blocking, so it runs in the blocking-call pool."""
+    return await run_blocking(fetch_kaggle_datasets, query, limit, mode)
     
 
-def search_arxiv_papers(query):
+ARXIV_URL = os.getenv("ARXIV_API_URL", "http://export.arxiv.org/api/query")
+ARXIV_BATCH_RESULTS = 10  # results requested per query in a batched search
+ARXIV_CLAUSE_WORDS = 4  # leading content words of a title used in its batched clause
+ARXIV_STOP_WORDS = frozenset("and for the with using from into via based".split())
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def _arxiv_entries(feed):
+    """``(title, url, searchable text)`` for each entry of an arXiv Atom feed."""
+    entries = []
+    for entry in ET.fromstring(feed).findall(f"{ATOM}entry"):
+        title = entry.findtext(f"{ATOM}title", "").strip()
+        link = entry.findtext(f"{ATOM}id", "").strip()
+        text = f"{title} {entry.findtext(f'{ATOM}summary', '')}".lower()
+        entries.append((title, link, text))
+    return entries
+
+
+def search_arxiv_papers(query, mode=None):
     """
     Search arXiv for research papers related to the input query.
+    ``mode`` is ``"live"`` or ``"local"`` and defaults to ``RESOURCE_LOOKUP_MODE``.
     """
-    url = "http://export.arxiv.org/api/query"
+    local = _local_results("research_papers", query, 5, mode, name_key="title")
+    if local is not None:
+        return local
+
     params = {"search_query": query, "start": 0, "max_results": 5}
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx, 5xx)
+        # Raises HTTPError for bad responses (4xx, 5xx)
+        feed = cached_fetch(
+            "arxiv", query,
+            http_fetcher(ARXIV_URL, parse="text", params=params, timeout=REQUEST_TIMEOUT), params={"max_results": 5}
+        )
 
-        root = ET.fromstring(response.content)
-        papers = []
+        return _arxiv_papers(feed)
 
-        for entry in root.findall("{http://www.w3.org/2005/Atom}entry"):
-            title = entry.findtext("{http://www.w3.org/2005/Atom}title", "").strip()
-            link = entry.findtext("{http://www.w3.org/2005/Atom}id", "").strip()
-            papers.append({"title": title, "url": link})
+    except requests.exceptions.RequestException as e:
+        return [{"error": f"Failed to fetch papers: {e}"}]
 
-        return papers if papers else [{"message": "No papers found"}]
 
-    except requests.exceptions.RequestException as e:
+def _arxiv_papers(feed):
+    papers = [{"title": title, "url": link} for title, link, _ in _arxiv_entries(feed)]
+    return papers if papers else [{"message": "No papers found"}]
+
+
+async def search_arxiv_papers_async(query, mode=None):
+    """``search_arxiv_papers`` for coroutines."""
+    import httpx
+    local = _local_results("research_papers", query, 5, mode, name_key="title")
+    if local is not None:
+        return local
+
+    params = {"search_query": query, "start": 0, "max_results": 5}
+    try:
+        feed = await cached_fetch_async(
+            "arxiv", query,
+            http_fetcher_async(ARXIV_URL, parse="text", params=params, timeout=REQUEST_TIMEOUT), params={"max_results": 5}
+        )
+    except httpx.HTTPError as e:
         return [{"error": f"Failed to fetch papers: {e}"}]
+    return _arxiv_papers(feed)
+
+
+def _arxiv_clause_words(query):
+    words = [word.lower() for word in re.findall(r"[A-Za-z0-9]+", query)]
+    return [word for word in words if len(word) > 2 and word not in ARXIV_STOP_WORDS][:ARXIV_CLAUSE_WORDS]
+
+
+def search_arxiv_papers_batch(queries, limit=5, mode=None):
+    """Search arXiv for several queries with one boolean ``search_query``.
+
+    Each query becomes an AND-clause of its leading content words and the
+    clauses are OR-ed together. Returned papers are assigned back to every
+    query whose words (compared by their first five letters, since arXiv
+    stems terms) appear in the paper's title or abstract.
+
+    Returns:
+        dict: ``query -> list`` in the same format as ``search_arxiv_papers``.
+    """
+    results, clauses = _arxiv_batch_plan(queries, limit, mode)
+    if len(clauses) == 1:
+        query = next(iter(clauses))
+        results[query] = search_arxiv_papers(query, mode="live")
+        return results
+    if not clauses:
+        return results
+
+    search_query, params = _arxiv_batch_query(clauses)
+    try:
+        feed = cached_fetch(
+            "arxiv", search_query,
+            http_fetcher(ARXIV_URL, parse="text", params=params, timeout=REQUEST_TIMEOUT),
+            params={"max_results": params["max_results"]}
+        )
+    except requests.exceptions.RequestException as e:
+        results.update((query, [{"error": f"Failed to fetch papers: {e}"}]) for query in clauses)
+        return results
+
+    return _arxiv_batch_assign(results, clauses, feed, limit)
+
+
+async def search_arxiv_papers_batch_async(queries, limit=5, mode=None):
+    """``search_arxiv_papers_batch`` for coroutines."""
+    import httpx
+    results, clauses = _arxiv_batch_plan(queries, limit, mode)
+    if len(clauses) == 1:
+        query = next(iter(clauses))
+        results[query] = await search_arxiv_papers_async(query, mode="live")
+        return results
+    if not clauses:
+        return results
+
+    search_query, params = _arxiv_batch_query(clauses)
+    try:
+        feed = await cached_fetch_async(
+            "arxiv", search_query,
+            http_fetcher_async(ARXIV_URL, parse="text", params=params, timeout=REQUEST_TIMEOUT),
+            params={"max_results": params["max_results"]}
+        )
+    except httpx.HTTPError as e:
+        results.update((query, [{"error": f"Failed to fetch papers: {e}"}]) for query in clauses)
+        return results
+
+    return _arxiv_batch_assign(results, clauses, feed, limit)
+
+
+def _arxiv_batch_plan(queries, limit, mode):
+    """Split queries into answered ones (``results``) and ones to search (``clauses``: query -> words)."""
+    results = {}
+    clauses = {}
+    for query in queries:
+        local = _local_results("research_papers", query, limit, mode, name_key="title")
+        words = _arxiv_clause_words(query)
+        if local is not None:
+            results[query] = local
+        elif words:
+            clauses[query] = words
+        else:
+            results[query] = [{"message": "No papers found"}]
+    return results, clauses
+
+
+def _arxiv_batch_query(clauses):
+    search_query = " OR ".join(
+        "(" + " AND ".join(f"all:{word}" for word in words) + ")" for words in clauses.values()
+    )
+    return search_query, {"search_query": search_query, "start": 0, "max_results": ARXIV_BATCH_RESULTS * len(clauses)}
+
+
+def _arxiv_batch_assign(results, clauses, feed, limit):
+    entries = _arxiv_entries(feed)
+    for query, words in clauses.items():
+        papers = [
+            {"title": title, "url": link}
+            for title, link, text in entries
+            if all(word[:5] in text for word in words)
+        ][:limit]
+        results[query] = papers if papers else [{"message": "No papers found"}]
+    return results
 
 
 def fetch_github_repos(query, limit=5, github_token=None):
@@ -140,67 +355,242 @@ def fetch_github_repos(query, limit=5, github_token=None):
     Returns:
         list: A list of dictionaries containing repository names and their URLs.
     """
-    url = "https://api.github.com/search/repositories"
-    headers = {"Accept": "application/vnd.github.v3+json"}
+    url = f"{GITHUB_API_URL}/search/repositories"
+    headers, params = _github_request(query, limit, github_token)
+
+    try:
+        data = cached_fetch(
+            "github", query,
+            rate_limited("github", http_fetcher(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)),
+            params={key: value for key, value in params.items() if key != "q"}
+        )
+        
+        return _github_repos(data)
     
+    except (requests.exceptions.RequestException, RateLimited) as e:
+        return [{"error": str(e)}]
+
+
+def _github_request(query, limit, github_token):
+    headers = {"Accept": "application/vnd.github.v3+json"}
     if github_token:
         headers["Authorization"] = f"token {github_token}"
-    
-    params = {
-        "q": query,
-        "sort": "stars",  # Sort by most stars
-        "order": "desc",
-        "per_page": limit
-    }
+    params = {"q": query, "sort": "stars", "order": "desc", "per_page": limit}  # Sort by most stars
+    return headers, params
 
-    try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        if "items" not in data:
-            return [{"message": "No relevant repositories found"}]
 
-        repo_list = [
-            {"name": repo["full_name"], "url": repo["html_url"]}
-            for repo in data["items"]
-        ]
+def _github_repos(data):
+    if "items" not in data:
+        return [{"message": "No relevant repositories found"}]
+    return [{"name": repo["full_name"], "url": repo["html_url"]} for repo in data["items"]]
 
-        return repo_list
-    
-    except requests.exceptions.RequestException as e:
+
+async def fetch_github_repos_async(query, limit=5, github_token=None):
+    """``fetch_github_repos`` for coroutines."""
+    import httpx
+    headers, params = _github_request(query, limit, github_token)
+    try:
+        data = await cached_fetch_async(
+            "github", query,
+            rate_limited_async("github", http_fetcher_async(
+                f"{GITHUB_API_URL}/search/repositories", params=params, headers=headers, timeout=REQUEST_TIMEOUT
+            )),
+            params={key: value for key, value in params.items() if key != "q"}
+        )
+    except (httpx.HTTPError, RateLimited) as e:
         return [{"error": str(e)}]
+    return _github_repos(data)
          
 
-# Main function to process use cases
-def collect_resources_for_usecases(use_cases_json):
-    # use_cases = use_cases_json["Usecases"]["use_cases"]
-    use_cases = use_cases_json["use_cases"]
-    resource_collection = []
-
-    for use_case in use_cases:
-        title = use_case["title"]
-        print(f"Collecting resources for: {title}")
-
-        # models = search_huggingface(title)
-        models = fetch_huggingface_models(title)
-        hf_datasets = fetch_huggingface_datasets(title)
-        kaggle_datasets = fetch_kaggle_datasets(title)
-        github_repos = fetch_github_repos(title, GITHUB_TOKEN)
-        papers = search_arxiv_papers(title)
-
-        resource_collection.append({
-            "title": title,
+# Per-provider limits: seconds per call, in-flight calls, and when to send a hedged duplicate
+register_provider(Provider(
+    "huggingface_models", fetch_huggingface_models, timeout=8, concurrency=3, hedge_after=2,
+    fetch_async=fetch_huggingface_models_async,
+))
+register_provider(Provider(
+    "huggingface_datasets", fetch_huggingface_datasets, timeout=8, concurrency=3, hedge_after=2,
+    fetch_async=fetch_huggingface_datasets_async,
+))
+register_provider(Provider(
+    "kaggle_datasets", fetch_kaggle_datasets, timeout=10, concurrency=2, fetch_async=fetch_kaggle_datasets_async,
+))
+register_provider(Provider(
+    "github_repositories", partial(fetch_github_repos, github_token=GITHUB_TOKEN), timeout=8, concurrency=2,
+    fetch_async=partial(fetch_github_repos_async, github_token=GITHUB_TOKEN),
+))
+register_provider(Provider(
+    "research_papers", search_arxiv_papers, timeout=10, concurrency=2, hedge_after=4,
+    batch_fetch=search_arxiv_papers_batch, batch_size=5,
+    fetch_async=search_arxiv_papers_async, batch_fetch_async=search_arxiv_papers_batch_async,
+))
+
+
+def _lookup_result(result):
+    """Turn a fan-out result into the list stored under a resource field."""
+    if result is TIMED_OUT:
+        return [{"error": "timed out"}]
+    if isinstance(result, Exception):
+        return [{"error": str(result)}]
+    return result
+
+
+class _ResourceCollection:
+    """Bookkeeping shared by ``collect_resources_for_usecases`` and its async twin.
+
+    Plans one task per distinct query (or batch of queries) and provider,
+    routes each finished task back to the use cases waiting for it, and
+    calls ``on_usecase`` as soon as a use case is complete.
+    """
+
+    def __init__(self, use_cases_json, on_usecase=None, sources=None):
+        # use_cases = use_cases_json["Usecases"]["use_cases"]
+        self.use_cases = use_cases = use_cases_json["use_cases"]
+        self.on_usecase = on_usecase
+        self.providers = providers = select_providers(sources)
+        self.lookups = [provider.name for provider in providers]
+        self.limits = {provider.name: provider.concurrency for provider in providers}
+
+        # Reuse resources already found for a similarly worded use case
+        self.cache = get_semantic_cache()
+        self.finished = {}
+        # (normalized query, field) -> indices of the use cases waiting for that lookup
+        self.waiting = waiting = {}
+        for index, use_case in enumerate(use_cases):
+            title = use_case["title"]
+            match = self.cache.lookup(title)
+            cached = match[0] if match else {}
+            if cached:
+                print(f"Reusing resources for: {title} (similarity {match[1]:.2f})")
+            else:
+                print(f"Collecting resources for: {title}")
+            for field in self.lookups:
+                if field in cached:
+                    self.finished[(index, field)] = cached[field]
+                else:
+                    waiting.setdefault((normalize_query(title), field), []).append(index)
+
+        # One task per distinct query, or per batch of queries for batching providers:
+        # (key, provider, batched, argument)
+        self.tasks = []
+        self.task_queries = {}
+        for provider in providers:
+            queries = {}
+            for (query, field), indices in waiting.items():
+                if field == provider.name:
+                    queries[query] = use_cases[indices[0]]["title"]
+            if provider.batch_fetch is not None and len(queries) > 1:
+                keys = list(queries)
+                for start in range(0, len(keys), provider.batch_size):
+                    batch = keys[start:start + provider.batch_size]
+                    key = ("batch", provider.name, start)
+                    self.task_queries[key] = batch
+                    self.tasks.append((key, provider, True, [queries[query] for query in batch]))
+            else:
+                for query, title in queries.items():
+                    key = (query, provider.name)
+                    self.task_queries[key] = [query]
+                    self.tasks.append((key, provider, False, title))
+
+        self.pending = {index: set() for index in range(len(use_cases))}
+        for (query, field), indices in waiting.items():
+            for index in indices:
+                self.pending[index].add(field)
+        self.emitted = set()
+        self.lock = threading.Lock()
+
+        # Fully cached use cases are ready before any lookup starts
+        with self.lock:
+            for index in range(len(use_cases)):
+                if not self.pending[index]:
+                    self._emit(index)
+
+    def _build_entry(self, index):
+        return {
+            "title": self.use_cases[index]["title"],
             "resources": {
-                "huggingface_models": models,
-                "huggingface_datasets": hf_datasets,
-                "kaggle_datasets": kaggle_datasets,
-                "github_repositories": github_repos,
-                "research_papers": papers
+                field: _lookup_result(self.finished.get((index, field), TIMED_OUT)) for field in self.lookups
             }
-        })
-    
-    return {"use_cases_resources": resource_collection}
+        }
+
+    def _emit(self, index):
+        # Caller holds the lock.
+        if self.on_usecase is not None and index not in self.emitted:
+            self.emitted.add(index)
+            self.on_usecase(index, self._build_entry(index))
+
+    def _record(self, key, result):
+        """Store a task result for every use case it answers; return those indices. Caller holds the lock."""
+        field = key[1]
+        answered = []
+        for query in self.task_queries[key]:
+            if isinstance(result, dict):
+                # Batched results are keyed by the title that was sent for the query
+                title = self.use_cases[self.waiting[(query, field)][0]]["title"]
+                query_result = result.get(title, TIMED_OUT)
+            else:
+                query_result = result
+            for index in self.waiting[(query, field)]:
+                self.finished[(index, field)] = query_result
+                self.pending[index].discard(field)
+                answered.append(index)
+        return answered
+
+    def on_result(self, key, result):
+        with self.lock:
+            for index in self._record(key, result):
+                if not self.pending[index]:
+                    self._emit(index)
+
+    def finish(self, results):
+        """Record the fan-out results, store new finds in the semantic cache and return the payload."""
+        with self.lock:
+            for key, result in results.items():
+                self._record(key, result)
+            for index in range(len(self.use_cases)):
+                self._emit(index)
+
+        for (query, field), indices in self.waiting.items():
+            result = self.finished[(indices[0], field)]
+            if result is not TIMED_OUT and not isinstance(result, Exception) and not is_error_result(result):
+                self.cache.store(self.use_cases[indices[0]]["title"], {field: result})
+
+        resource_collection = [self._build_entry(index) for index in range(len(self.use_cases))]
+
+        return {"use_cases_resources": resource_collection}
+
+
+# Main function to process use cases
+def collect_resources_for_usecases(use_cases_json, deadline=RESOURCES_DEADLINE, on_usecase=None, sources=None):
+    """Look up resources for every use case with all providers in parallel.
+
+    ``on_usecase(index, entry)`` is called once per use case, as soon as all
+    of its provider lookups have finished or the deadline has expired.
+    ``sources`` limits the lookups to these provider names (see
+    ``providers.select_providers``).
+
+    Use cases whose titles normalize to the same query share one lookup per
+    provider, and providers with a ``batch_fetch`` answer up to
+    ``batch_size`` distinct queries per upstream request.
+    """
+    collection = _ResourceCollection(use_cases_json, on_usecase, sources)
+    tasks = [
+        (key, provider.name, provider.call_batch if batched else provider.call, (arg,))
+        for key, provider, batched, arg in collection.tasks
+    ]
+    results = fan_out(tasks, collection.limits, deadline, on_result=collection.on_result)
+    return collection.finish(results)
+
+
+async def collect_resources_for_usecases_async(use_cases_json, deadline=RESOURCES_DEADLINE, on_usecase=None,
+                                               sources=None):
+    """``collect_resources_for_usecases`` for coroutines, with every lookup on the running event loop."""
+    collection = _ResourceCollection(use_cases_json, on_usecase, sources)
+    tasks = [
+        (key, provider.name, provider.call_batch_async if batched else provider.call_async, (arg,))
+        for key, provider, batched, arg in collection.tasks
+    ]
+    results = await fan_out_async(tasks, collection.limits, deadline, on_result=collection.on_result)
+    return collection.finish(results)
 
 
 # Example JSON input (You should replace this with actual input)
@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from . import http_client
+from .forking import register_fork_reset
+from .steps import run_steps, run_steps_async
+from .telemetry import span
+
+CACHE_DIR = Path(os.getenv("RESEARCH_CACHE_DIR", Path(__file__).resolve().parent.parent / ".cache"))
+
+# Seconds a cached response is served without asking upstream; 0 disables caching
+PROVIDER_TTLS = {
+    "google": 24 * 3600,
+    "huggingface_models": 6 * 3600,
+    "huggingface_datasets": 6 * 3600,
+    "kaggle": 12 * 3600,
+    "github": 6 * 3600,
+    "arxiv": 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+MEMORY_ENTRIES = 512
+DISK_ENTRIES = 20000
+
+NOT_MODIFIED = object()
+
+
+def normalize_query(query):
+    """Lowercase and collapse whitespace so trivially different queries share a key."""
+    return re.sub(r"\s+", " ", str(query)).strip().lower()
+
+
+def make_key(provider, query, params=None):
+    """Stable cache key for a (provider, query, params) triple."""
+    raw = json.dumps([provider, normalize_query(query), params or {}], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier cache: a bounded in-process LRU in front of an SQLite file.
+
+    Entries are dicts with ``value``, ``etag`` and ``stored_at``. Expired
+    entries stay on disk so their ETag can be used for revalidation; the
+    disk tier is trimmed to the newest ``disk_entries`` rows.
+    """
+
+    def __init__(self, path, memory_entries=MEMORY_ENTRIES, disk_entries=DISK_ENTRIES):
+        self.path = Path(path)
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, etag TEXT, stored_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_stored_at ON entries (stored_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        try:
+            row = self._connect().execute(
+                "SELECT value, etag, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+
+        entry = {"value": json.loads(row[0]), "etag": row[1], "stored_at": row[2]}
+        self._remember(key, entry)
+        return entry
+
+    def set(self, key, value, etag=None):
+        entry = {"value": value, "etag": etag, "stored_at": time.time()}
+        self._remember(key, entry)
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, etag, stored_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), etag, entry["stored_at"]),
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_entries,),
+                )
+        except sqlite3.Error as e:
+            print(f"Response cache write failed: {e}")
+        return entry
+
+    def touch(self, key, entry):
+        """Mark a revalidated entry as fresh again."""
+        return self.set(key, entry["value"], entry["etag"])
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        self._connect().execute("DELETE FROM entries")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide response cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(CACHE_DIR / "responses.sqlite3")
+    return _cache
+
+
+def _count(provider, outcome):
+    with _stats_lock:
+        counters = _stats.setdefault(provider, {"hits": 0, "misses": 0, "revalidated": 0})
+        counters[outcome] += 1
+
+
+def cache_stats():
+    """Hit/miss/revalidation counters per provider since process start."""
+    with _stats_lock:
+        return {provider: dict(counters) for provider, counters in _stats.items()}
+
+
+def cached_fetch(provider, query, fetch, params=None):
+    """Return a cached value for the lookup or call ``fetch`` to refresh it.
+
+    Args:
+        provider (str): Provider name, selects the TTL from ``PROVIDER_TTLS``.
+        query (str): The search query; normalized for the cache key.
+        fetch (callable): ``fetch(etag)`` returning ``(value, etag)``, or
+            ``NOT_MODIFIED`` when the upstream confirms the cached copy.
+            Exceptions propagate and nothing is cached.
+        params (dict, optional): Other request parameters that change the result.
+
+    Returns:
+        The cached or freshly fetched value.
+    """
+    return run_steps(_cached_fetch_steps(provider, query, params), fetch)
+
+
+async def cached_fetch_async(provider, query, fetch, params=None):
+    """``cached_fetch`` for coroutines; ``fetch(etag)`` is a coroutine function.
+
+    Cache reads and writes stay synchronous: they hit the in-process LRU or
+    a local SQLite file and take well under a millisecond.
+    """
+    return await run_steps_async(_cached_fetch_steps(provider, query, params), fetch)
+
+
+def _cached_fetch_steps(provider, query, params):
+    # Yields the etag to fetch with and receives the result of fetch(etag).
+    with span("call", provider) as call:
+        ttl = PROVIDER_TTLS.get(provider, DEFAULT_TTL)
+        if ttl <= 0:
+            call.set(cache="off")
+            value, _ = yield None
+            return value
+
+        cache = get_cache()
+        key = make_key(provider, query, params)
+        entry = cache.get(key)
+
+        if entry is not None and time.time() - entry["stored_at"] < ttl:
+            _count(provider, "hits")
+            call.set(cache="hit")
+            return entry["value"]
+
+        result = yield entry["etag"] if entry else None
+        if result is NOT_MODIFIED and entry is not None:
+            _count(provider, "revalidated")
+            call.set(cache="revalidated")
+            cache.touch(key, entry)
+            return entry["value"]
+
+        _count(provider, "misses")
+        call.set(cache="miss")
+        value, etag = result
+        cache.set(key, value, etag)
+        return value
+
+
+def http_fetcher(url, parse="json", params=None, headers=None, timeout=http_client.DEFAULT_TIMEOUT):
+    """Build a ``fetch`` callable for ``cached_fetch`` that revalidates with If-None-Match.
+
+    ``parse`` is ``"json"`` or ``"text"``. Non-2xx responses raise
+    ``requests.HTTPError`` so callers keep their existing error handling.
+    """
+    def fetch(etag):
+        response = http_client.get(url, params=params, headers=_revalidating(headers, etag), timeout=timeout)
+        return _parse_response(response, etag, parse)
+
+    return fetch
+
+
+def http_fetcher_async(url, parse="json", params=None, headers=None, timeout=http_client.DEFAULT_TIMEOUT):
+    """``http_fetcher`` for ``cached_fetch_async``; non-2xx responses raise ``httpx.HTTPStatusError``.
+
+    A body that is not valid JSON raises ``httpx.DecodingError``, so callers
+    catching ``httpx.HTTPError`` handle it like the blocking path does.
+    """
+    async def fetch(etag):
+        import httpx
+
+        response = await http_client.get_async(
+            url, params=params, headers=_revalidating(headers, etag), timeout=timeout
+        )
+        try:
+            return _parse_response(response, etag, parse)
+        except ValueError as e:
+            # requests' JSONDecodeError is already a RequestException; httpx leaves a bare ValueError
+            raise httpx.DecodingError(f"Invalid JSON from {response.url}: {e}", request=response.request) from e
+
+    return fetch
+
+
+def _revalidating(headers, etag):
+    request_headers = dict(headers or {})
+    if etag:
+        request_headers["If-None-Match"] = etag
+    return request_headers
+
+
+def _parse_response(response, etag, parse):
+    # requests and httpx responses share this much of their API
+    if etag and response.status_code == 304:
+        return NOT_MODIFIED
+    response.raise_for_status()
+    body = response.json() if parse == "json" else response.text
+    return body, response.headers.get("ETag")
+
+
+def _reset_after_fork():
+    # SQLite connections must not cross a fork.
+    global _cache, _cache_lock, _stats_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+
+
+register_fork_reset(_reset_after_fork)
@@ -0,0 +1,159 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+
+RESULTS_DIR = Path(os.getenv("RESEARCH_RESULTS_DIR", Path(__file__).resolve().parent.parent / ".results"))
+MAX_RUNS = int(os.getenv("RESEARCH_MAX_RUNS", 1000))  # oldest runs are pruned beyond this
+PRUNE_EVERY = 50  # saves between retention sweeps
+
+RUN_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+_saves = 0
+_lock = threading.Lock()
+
+
+def normalize_company(company_name):
+    """Case- and whitespace-insensitive form of a company name."""
+    return re.sub(r"\s+", " ", company_name or "").strip().lower()
+
+
+def _run_path(run_id):
+    return RESULTS_DIR / "runs" / f"{run_id}.json.gz"
+
+
+def _company_path(company_name):
+    digest = hashlib.sha1(normalize_company(company_name).encode("utf-8")).hexdigest()
+    return RESULTS_DIR / "companies" / digest
+
+
+def atomic_write(path, data):
+    """Write bytes so readers only ever see the old or the complete new file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def save_result(company_name, payload):
+    """Store a finished run and return its run id.
+
+    The payload is written as compact, gzip-compressed JSON under its own
+    run id, then the company index and the ``latest`` pointer are updated.
+    """
+    global _saves
+    run_id = uuid.uuid4().hex
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    atomic_write(_run_path(run_id), gzip.compress(body, compresslevel=6))
+    atomic_write(_company_path(company_name), run_id.encode("ascii"))
+    atomic_write(RESULTS_DIR / "latest", run_id.encode("ascii"))
+
+    with _lock:
+        _saves += 1
+        prune = _saves % PRUNE_EVERY == 0
+    if prune:
+        prune_results()
+    return run_id
+
+
+def load_result(run_id):
+    """Return the stored payload for a run id, or None."""
+    if not run_id or not RUN_ID_RE.match(run_id):
+        return None
+    try:
+        with gzip.open(_run_path(run_id), "rb") as f:
+            return json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _read_pointer(path):
+    try:
+        return path.read_text(encoding="ascii").strip() or None
+    except OSError:
+        return None
+
+
+def latest_run_id(company_name=None):
+    """Most recent run id for a company, or for any company when none is given."""
+    if company_name:
+        return _read_pointer(_company_path(company_name))
+    return _read_pointer(RESULTS_DIR / "latest")
+
+
+def prune_dir(directory, suffix, keep):
+    """Delete all but the ``keep`` newest files ending in ``suffix``."""
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.name.endswith(suffix)]
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    except OSError:
+        return 0
+
+    removed = 0
+    for entry in entries[keep:]:
+        try:
+            os.unlink(entry.path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def prune_results(max_runs=MAX_RUNS):
+    """Delete the oldest runs beyond ``max_runs``, and the pointers to them.
+
+    Company pointers to a deleted run are removed; ``latest`` moves to the
+    newest run left.
+    """
+    removed = prune_dir(RESULTS_DIR / "runs", ".json.gz", max_runs)
+    if removed:
+        print(f"Pruned {removed} stored research runs")
+        _drop_dangling_pointers()
+    return removed
+
+
+def _drop_dangling_pointers():
+    try:
+        pointers = [
+            Path(entry.path) for entry in os.scandir(RESULTS_DIR / "companies")
+            if entry.is_file() and not entry.name.endswith(".tmp")
+        ]
+    except OSError:
+        pointers = []
+    for path in pointers:
+        run_id = _read_pointer(path)
+        if run_id and not _run_path(run_id).exists():
+            # Re-read: a save may have moved the pointer to a new run meanwhile
+            if _read_pointer(path) == run_id:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    latest = _read_pointer(RESULTS_DIR / "latest")
+    if not latest or _run_path(latest).exists():
+        return
+    try:
+        runs = [entry for entry in os.scandir(RESULTS_DIR / "runs") if entry.name.endswith(".json.gz")]
+        newest = max(runs, key=lambda entry: entry.stat().st_mtime, default=None)
+    except OSError:
+        return
+    if _read_pointer(RESULTS_DIR / "latest") != latest:
+        return  # a save moved it meanwhile
+    if newest is None:
+        try:
+            os.unlink(RESULTS_DIR / "latest")
+        except OSError:
+            pass
+    else:
+        atomic_write(RESULTS_DIR / "latest", newest.name[:-len(".json.gz")].encode("ascii"))
@@ -0,0 +1,192 @@
+import copy
+import os
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from .forking import register_fork_reset
+
+# Cosine similarity of two titles' TF-IDF vectors above which their resources are shared
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.8))
+SEMANTIC_CACHE_ENTRIES = int(os.getenv("SEMANTIC_CACHE_ENTRIES", 1000))  # 0 disables the cache
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", 6 * 3600))
+DIMENSIONS = 1 << 11  # hashed feature space; titles have only a handful of words
+INITIAL_ROWS = 64  # the term matrices start this small and double as titles are stored
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and for from in into of on or the to using via with based ai ml machine learning".split()
+)
+
+
+def title_terms(title):
+    """Lowercase content words of a title, with plural ``s`` dropped."""
+    terms = []
+    for word in WORD_RE.findall(title.lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def term_vector(terms, dimensions=DIMENSIONS):
+    """Sublinear term-frequency vector of ``terms`` hashed into ``dimensions`` buckets."""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for term in terms:
+        vector[zlib.crc32(term.encode("utf-8")) % dimensions] += 1
+    np.log1p(vector, out=vector, where=vector > 0)
+    return vector
+
+
+class SemanticCache:
+    """Resource bundles keyed by use-case title, looked up by TF-IDF cosine similarity.
+
+    Term frequencies live in one ``(rows, dimensions)`` NumPy matrix that
+    grows up to ``max_entries`` rows and is then reused as a ring buffer; IDF
+    weights come from the titles currently cached, so a lookup is a few
+    matrix-vector products. Each field of a bundle expires ``ttl`` seconds
+    after it was stored.
+    """
+
+    def __init__(self, max_entries=SEMANTIC_CACHE_ENTRIES, threshold=SIMILARITY_THRESHOLD,
+                 ttl=SEMANTIC_CACHE_TTL, dimensions=DIMENSIONS):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.dimensions = dimensions
+        self._tf = np.zeros((0, dimensions), dtype=np.float32)
+        self._tf_sq = np.zeros((0, dimensions), dtype=np.float32)  # kept so norms are one product
+        self._df = np.zeros(dimensions, dtype=np.float32)
+        self._stored_at = np.zeros(max_entries)  # newest field of each entry
+        self._entries = [None] * max_entries  # (title, {field: (stored_at, value)})
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "lookup_seconds": 0.0, "max_lookup_seconds": 0.0}
+
+    def _scores(self, vector):
+        # Caller holds the lock.
+        n = max(self._size, 1)
+        idf = np.log((1 + n) / (1 + self._df)) + 1
+        weights = idf * idf
+        norms = np.sqrt(self._tf_sq[:self._size] @ weights) * np.sqrt((vector * vector) @ weights)
+        scores = (self._tf[:self._size] @ (vector * weights)) / np.maximum(norms, 1e-12)
+        scores[self._stored_at[:self._size] < time.time() - self.ttl] = 0
+        return scores
+
+    def lookup(self, title):
+        """Return ``(bundle, similarity)`` for the most similar cached title, or None."""
+        if not self.max_entries:
+            return None
+        start = time.perf_counter()
+        match = None
+        terms = title_terms(title)
+        with self._lock:
+            if terms and self._size:
+                scores = self._scores(term_vector(terms, self.dimensions))
+                best = int(scores.argmax())
+                if scores[best] >= self.threshold:
+                    cutoff = time.time() - self.ttl
+                    bundle = {
+                        field: copy.deepcopy(value)
+                        for field, (stored_at, value) in self._entries[best][1].items() if stored_at >= cutoff
+                    }
+                    if bundle:
+                        match = bundle, float(scores[best])
+
+            elapsed = time.perf_counter() - start
+            self._stats["lookups"] += 1
+            self._stats["hits"] += match is not None
+            self._stats["lookup_seconds"] += elapsed
+            self._stats["max_lookup_seconds"] = max(self._stats["max_lookup_seconds"], elapsed)
+        return match
+
+    def _grow(self):
+        # Caller holds the lock.
+        rows = min(self.max_entries, max(INITIAL_ROWS, 2 * len(self._tf)))
+        for name in ("_tf", "_tf_sq"):
+            matrix = np.zeros((rows, self.dimensions), dtype=np.float32)
+            matrix[:len(getattr(self, name))] = getattr(self, name)
+            setattr(self, name, matrix)
+
+    def store(self, title, bundle):
+        """Cache the resources found for ``title``; fields merge into an entry for the same words.
+
+        Merged fields get their own stored-at time; the others keep theirs.
+        """
+        terms = title_terms(title)
+        if not self.max_entries or not terms or not bundle:
+            return
+        vector = term_vector(terms, self.dimensions)
+        now = time.time()
+        fields = {field: (now, value) for field, value in copy.deepcopy(bundle).items()}
+        with self._lock:
+            if self._size:
+                same = np.flatnonzero(np.all(self._tf[:self._size] == vector, axis=1))
+                if same.size:
+                    row = int(same[0])
+                    kept = {
+                        field: entry for field, entry in self._entries[row][1].items()
+                        if entry[0] >= now - self.ttl
+                    }
+                    self._entries[row] = (title, dict(kept, **fields))
+                    self._stored_at[row] = now
+                    return
+
+            row = self._next
+            if row >= len(self._tf):
+                self._grow()
+            if self._entries[row] is not None:
+                self._df -= self._tf[row] > 0
+            self._tf[row] = vector
+            self._tf_sq[row] = vector * vector
+            self._df += vector > 0
+            self._stored_at[row] = now
+            self._entries[row] = (title, fields)
+            self._next = (row + 1) % self.max_entries
+            self._size = min(self._size + 1, self.max_entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["lookups"]
+            return {
+                "entries": self._size,
+                "lookups": lookups,
+                "hits": self._stats["hits"],
+                "misses": lookups - self._stats["hits"],
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "avg_lookup_ms": 1000 * self._stats["lookup_seconds"] / lookups if lookups else 0.0,
+                "max_lookup_ms": 1000 * self._stats["max_lookup_seconds"],
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    """Return the process-wide resource bundle cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SemanticCache()
+    return _cache
+
+
+def semantic_cache_stats():
+    """Hit rate and lookup latency of the resource bundle cache."""
+    return get_semantic_cache().stats()
+
+
+def _reset_after_fork():
+    global _cache_lock
+    _cache_lock = threading.Lock()
+    if _cache is not None:
+        _cache._lock = threading.Lock()
+
+
+register_fork_reset(_reset_after_fork)
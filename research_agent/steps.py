@@ -0,0 +1,39 @@
+# Logic shared by the blocking and the coroutine paths is written once, as a generator
+# that yields a request whenever it needs I/O and receives the answer back. run_steps and
+# run_steps_async perform those requests with a blocking or an awaitable call. Errors of the
+# call are thrown back into the generator at its yield, so its try and with blocks (spans,
+# breaker bookkeeping) see them as if the call were inline.
+
+
+def run_steps(steps, perform):
+    """Run the generator ``steps``, answering each yielded request with ``perform(request)``.
+
+    Returns:
+        The generator's return value.
+    """
+    try:
+        request = next(steps)
+        while True:
+            try:
+                result = perform(request)
+            except BaseException as e:
+                request = steps.throw(e)
+            else:
+                request = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def run_steps_async(steps, perform):
+    """``run_steps`` for coroutines; ``perform(request)`` returns an awaitable."""
+    try:
+        request = next(steps)
+        while True:
+            try:
+                result = await perform(request)
+            except BaseException as e:
+                request = steps.throw(e)
+            else:
+                request = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
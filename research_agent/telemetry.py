@@ -0,0 +1,146 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import partial
+from .forking import register_fork_reset
+
+logger = logging.getLogger("research_agent.trace")
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_current = contextvars.ContextVar("research_agent_span", default=None)
+# Set while a request is being profiled; see research_agent.profiling
+active_profiler = contextvars.ContextVar("research_agent_profiler", default=None)
+_series = {}
+_series_lock = threading.Lock()
+
+
+class Span:
+    """One timed operation; ``attrs`` end up in its log record."""
+
+    __slots__ = ("kind", "name", "trace_id", "span_id", "parent_id", "attrs")
+
+    def __init__(self, kind, name, parent, attrs):
+        self.kind = kind
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def current_span():
+    return _current.get()
+
+
+def annotate(**attrs):
+    """Add attributes to the innermost open span, if there is one."""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def in_context(func, context=None):
+    """Bind ``func`` to a copy of the current context, or of ``context``.
+
+    Submit the result to an executor so spans opened in the worker thread
+    join the caller's trace (and, for a profiled request, the worker is
+    profiled too). Make a fresh one for every submission; a
+    context cannot be entered by two threads at once. Pass ``context``
+    (from ``contextvars.copy_context()``) when submitting from a callback
+    that runs outside the caller's context.
+    """
+    context = contextvars.copy_context() if context is None else context.copy()
+    return partial(context.run, _run_in_worker, func)
+
+
+def _run_in_worker(func, *args, **kwargs):
+    profiler = active_profiler.get()
+    if profiler is None:
+        return func(*args, **kwargs)
+    return profiler.run(func, *args, **kwargs)
+
+
+def _get_series(kind, name):
+    # Caller holds _series_lock.
+    series = _series.get((kind, name))
+    if series is None:
+        series = _series[(kind, name)] = {
+            "buckets": [0] * len(LATENCY_BUCKETS), "count": 0, "sum": 0.0, "errors": 0, "in_flight": 0,
+        }
+    return series
+
+
+@contextmanager
+def span(kind, name, **attrs):
+    """Time the block as one span of ``kind`` (stage, provider, call ...) and ``name``.
+
+    Spans opened inside the block, in this thread or in a worker started
+    through ``in_context``, share its trace id. When the block ends the span
+    is written to the ``research_agent.trace`` logger as one JSON record and
+    added to the latency, in-flight and error series in ``span_metrics``.
+    An exception, or an ``error`` attribute set on the span, counts as an error.
+    """
+    current = Span(kind, name, _current.get(), attrs)
+    token = _current.set(current)
+    with _series_lock:
+        _get_series(kind, name)["in_flight"] += 1
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs.setdefault("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _current.reset(token)
+        _finish(current, seconds)
+
+
+def _finish(current, seconds):
+    failed = bool(current.attrs.get("error"))
+    with _series_lock:
+        series = _get_series(current.kind, current.name)
+        series["in_flight"] -= 1
+        series["count"] += 1
+        series["sum"] += seconds
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+        if bucket < len(LATENCY_BUCKETS):
+            series["buckets"][bucket] += 1
+        if failed:
+            series["errors"] += 1
+
+    if logger.isEnabledFor(logging.INFO):
+        record = {
+            "trace": current.trace_id, "span": current.span_id, "parent": current.parent_id,
+            "kind": current.kind, "name": current.name, "ms": round(seconds * 1000, 1),
+        }
+        record.update(current.attrs)
+        logger.log(logging.WARNING if failed else logging.INFO, "span %s", json.dumps(record, default=str))
+
+
+def span_metrics():
+    """Snapshot of every span series: ``{(kind, name): {buckets, count, sum, errors, in_flight}}``.
+
+    ``buckets`` are per-bucket counts for ``LATENCY_BUCKETS``, not cumulative.
+    """
+    with _series_lock:
+        return {key: dict(series, buckets=list(series["buckets"])) for key, series in _series.items()}
+
+
+def _reset_after_fork():
+    global _series_lock
+    _series_lock = threading.Lock()
+    _series.clear()
+
+
+register_fork_reset(_reset_after_fork)
@@ -1,3 +1,1256 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from benchmarks.standins import StandInServer
+from benchmarks.text_cleaning import make_corpus
+from . import (
+    bulk, http_client, jobs, pipeline, rate_limit, resource_index, resources_main, response_cache, result_store, views,
+)
+from .context_packing import bm25_scores, pack_context
+from .fanout import TIMED_OUT, fan_out, fan_out_async
+from .format_result import (
+    TextCleaner, clean_irrelevant_content, clean_scraped_text, clean_text, remove_duplicates, truncate_text,
+)
+from .history import parse_refresh, record_run, reusable_stages
+from .html_extract import ParagraphExtractor, extract_paragraphs
+from .models import ResearchRun
+from .near_dedup import remove_near_duplicates
+from .pipeline import STAGES
+from .profiling import profile_requested
+from .providers import CircuitOpen, Provider, ProviderTimeout
+from .resources_main import collect_resources_for_usecases  # noqa: F401  registers the providers
+from .response_cache import (
+    ResponseCache, cache_stats, cached_fetch, cached_fetch_async, http_fetcher, http_fetcher_async,
+    make_key,
+)
+from .semantic_cache import SemanticCache
+from .tokens import count_tokens
+
+FRESHNESS = {"overview": 7 * 24 * 3600, "usecases": 7 * 24 * 3600, "resources": 24 * 3600}
+
+
+class ConcurrencyProbe:
+    """Callable lookup that records the most calls in flight at once per group."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = defaultdict(int)
+        self.peak = defaultdict(int)
+
+    def enter(self, group):
+        with self.lock:
+            self.running[group] += 1
+            self.peak[group] = max(self.peak[group], self.running[group])
+
+    def leave(self, group):
+        with self.lock:
+            self.running[group] -= 1
+
+    def __call__(self, group, value, delay=0.05):
+        self.enter(group)
+        try:
+            time.sleep(delay)
+            return value
+        finally:
+            self.leave(group)
+
+    async def run_async(self, group, value, delay=0.05):
+        self.enter(group)
+        try:
+            await asyncio.sleep(delay)
+            return value
+        finally:
+            self.leave(group)
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+async def fail_async(message):
+    raise ValueError(message)
+
+
+class FanOutTests(SimpleTestCase):
+    def test_limits_cap_in_flight_calls_per_group(self):
+        probe = ConcurrencyProbe()
+        tasks = [(f"a{i}", "a", probe, ("a", i)) for i in range(6)]
+        tasks += [(f"b{i}", "b", probe, ("b", i)) for i in range(3)]
+        results = fan_out(tasks, {"a": 2, "b": 1}, deadline=5)
+        self.assertEqual(results, {key: args[1] for key, _, _, args in tasks})
+        self.assertEqual(dict(probe.peak), {"a": 2, "b": 1})
+
+    def test_deadline_marks_unfinished_tasks_timed_out(self):
+        probe = ConcurrencyProbe()
+        tasks = [("fast", "x", probe, ("x", 1, 0.01)), ("slow", "y", probe, ("y", 2, 1))]
+        start = time.monotonic()
+        results = fan_out(tasks, {}, deadline=0.2)
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(results["fast"], 1)
+        self.assertIs(results["slow"], TIMED_OUT)
+
+    def test_queued_tasks_past_the_deadline_are_timed_out(self):
+        probe = ConcurrencyProbe()
+        tasks = [(i, "x", probe, ("x", i, 0.15)) for i in range(4)]
+        results = fan_out(tasks, {"x": 1}, deadline=0.25)
+        self.assertEqual(results[0], 0)
+        self.assertEqual([results[i] for i in (2, 3)], [TIMED_OUT, TIMED_OUT])
+
+    def test_errors_are_returned_and_reported(self):
+        seen = []
+        tasks = [("ok", "x", lambda: "fine", ()), ("bad", "x", fail, ("boom",))]
+        results = fan_out(tasks, {}, deadline=5, on_result=lambda key, result: seen.append(key))
+        self.assertEqual(results["ok"], "fine")
+        self.assertIsInstance(results["bad"], ValueError)
+        self.assertCountEqual(seen, ["ok", "bad"])
+
+    def test_async_limits_and_deadline(self):
+        probe = ConcurrencyProbe()
+        tasks = [(f"a{i}", "a", probe.run_async, ("a", i)) for i in range(6)]
+        tasks += [("slow", "b", probe.run_async, ("b", "late", 1)), ("bad", "c", fail_async, ("boom",))]
+        start = time.monotonic()
+        results = asyncio.run(fan_out_async(tasks, {"a": 2}, deadline=0.4))
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertEqual([results[f"a{i}"] for i in range(6)], list(range(6)))
+        self.assertIs(results["slow"], TIMED_OUT)
+        self.assertIsInstance(results["bad"], ValueError)
+        self.assertEqual(probe.peak["a"], 2)
+
+
+class CachedFetchTests(SimpleTestCase):
+    """``cached_fetch`` against the stand-in Hugging Face API, which sends ETags."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StandInServer(latency=0, jitter=0).start()
+        cls.addClassCleanup(cls.server.stop)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = ResponseCache(Path(directory.name) / "responses.sqlite3")
+        patches = [
+            mock.patch.object(response_cache, "_cache", self.cache),
+            mock.patch.dict(response_cache.PROVIDER_TTLS, {"huggingface": 60}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.params = {"search": f"query {random.random()}", "limit": 2}
+        self.url = f"{self.server.base_url}/huggingface/api/models"
+
+    def requests_made(self):
+        return self.server.requests["huggingface"]
+
+    def fetch(self, provider="huggingface"):
+        return cached_fetch(provider, self.params["search"], http_fetcher(self.url, params=self.params), self.params)
+
+    def stats(self):
+        return cache_stats().get("huggingface", {"hits": 0, "misses": 0, "revalidated": 0})
+
+    def test_fresh_entry_is_served_without_a_request(self):
+        before, stats = self.requests_made(), self.stats()
+        first = self.fetch()
+        second = self.fetch()
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(self.requests_made() - before, 1)
+        self.assertEqual(self.stats()["misses"] - stats["misses"], 1)
+        self.assertEqual(self.stats()["hits"] - stats["hits"], 1)
+
+    def test_expired_entry_is_revalidated_with_its_etag(self):
+        first = self.fetch()
+        entry = self.cache.get(make_key("huggingface", self.params["search"], self.params))
+        self.assertTrue(entry["etag"])
+
+        stats, not_modified = self.stats(), self.server.not_modified["huggingface"]
+        with mock.patch.object(response_cache.time, "time", return_value=time.time() + 120):
+            second = self.fetch()
+        self.assertEqual(second, first)
+        self.assertEqual(self.server.not_modified["huggingface"] - not_modified, 1)
+        self.assertEqual(self.stats()["revalidated"] - stats["revalidated"], 1)
+
+    def test_changed_upstream_replaces_the_entry(self):
+        self.fetch()
+        key = make_key("huggingface", self.params["search"], self.params)
+        self.cache.set(key, ["stale"], '"old-etag"')
+        with mock.patch.object(response_cache.time, "time", return_value=time.time() + 120):
+            value = self.fetch()
+        self.assertNotEqual(value, ["stale"])
+        self.assertNotEqual(self.cache.get(key)["etag"], '"old-etag"')
+
+    def test_zero_ttl_always_fetches(self):
+        before = self.requests_made()
+        with mock.patch.dict(response_cache.PROVIDER_TTLS, {"huggingface": 0}):
+            self.fetch()
+            self.fetch()
+        self.assertEqual(self.requests_made() - before, 2)
+        self.assertIsNone(self.cache.get(make_key("huggingface", self.params["search"], self.params)))
+
+    def test_errors_are_not_cached(self):
+        self.url = f"{self.server.base_url}/huggingface/missing"
+        for _ in range(2):
+            with self.assertRaises(requests.HTTPError):
+                self.fetch()
+        self.assertIsNone(self.cache.get(make_key("huggingface", self.params["search"], self.params)))
+
+    def test_async_path_shares_the_cache(self):
+        first = self.fetch()
+        before = self.requests_made()
+
+        async def fetch_both():
+            try:
+                hit = await cached_fetch_async(
+                    "huggingface", self.params["search"], http_fetcher_async(self.url, params=self.params), self.params
+                )
+                with mock.patch.object(response_cache.time, "time", return_value=time.time() + 120):
+                    revalidated = await cached_fetch_async(
+                        "huggingface", self.params["search"], http_fetcher_async(self.url, params=self.params),
+                        self.params,
+                    )
+                return hit, revalidated
+            finally:
+                await http_client.close_async()
+
+        hit, revalidated = asyncio.run(fetch_both())
+        self.assertEqual(hit, first)
+        self.assertEqual(revalidated, first)
+        self.assertEqual(self.requests_made() - before, 1)
+
+    def test_non_json_body_raises_the_client_error(self):
+        import httpx
+
+        url = f"{self.server.base_url}/pages/0/acme"
+        with self.assertRaises(requests.RequestException):
+            cached_fetch("google", url, http_fetcher(url))
+
+        async def fetch():
+            try:
+                return await cached_fetch_async("google", url, http_fetcher_async(url))
+            finally:
+                await http_client.close_async()
+
+        with self.assertRaises(httpx.HTTPError):
+            asyncio.run(fetch())
+
+
+class StreamedResponse:
+    """Stand-in for a streamed ``requests`` response that counts the bytes handed out."""
+
+    def __init__(self, body, headers=None, encoding="utf-8"):
+        self.body = body
+        self.headers = headers if headers is not None else {"Content-Length": str(len(body))}
+        self.encoding = encoding
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+def html_page(paragraphs, padding=0):
+    body = "".join(f"<p>{text}</p>" for text in paragraphs)
+    return f"<html><head><script>var p = '<p>not text</p>';</script></head><body>{body}{' ' * padding}</body></html>"
+
+
+class HtmlExtractTests(SimpleTestCase):
+    def test_paragraph_text_only(self):
+        extractor = ParagraphExtractor(char_budget=1000)
+        extractor.feed(html_page(["Acme <b>builds</b> robots.", "Founded in 1990."]) + "<p>Unclosed")
+        extractor.close()
+        self.assertEqual(extractor.text(), "Acme builds robots. Founded in 1990. Unclosed")
+
+    def test_whole_body_is_read_when_it_fits(self):
+        response = StreamedResponse(html_page(["Acme builds robots."]).encode("utf-8"))
+        text, stats = extract_paragraphs(response, char_budget=1000, max_bytes=1 << 20)
+        self.assertEqual(text, "Acme builds robots.")
+        self.assertEqual(stats, {"bytes_read": len(response.body), "bytes_skipped": 0})
+        self.assertTrue(response.closed)
+
+    def test_reading_stops_at_the_char_budget(self):
+        body = html_page([f"Paragraph {i} " + "x" * 200 for i in range(500)]).encode("utf-8")
+        text, stats = extract_paragraphs(StreamedResponse(body), char_budget=1000, max_bytes=1 << 20)
+        self.assertGreaterEqual(len(text), 1000)
+        self.assertLess(len(text), 1500)
+        self.assertLessEqual(stats["bytes_read"], 2 * 16 * 1024)
+        self.assertEqual(stats["bytes_read"] + stats["bytes_skipped"], len(body))
+
+    def test_reading_stops_at_max_bytes(self):
+        body = html_page(["Acme builds robots."], padding=200_000).encode("utf-8")
+        response = StreamedResponse(body, headers={"Content-Encoding": "gzip"})
+        text, stats = extract_paragraphs(response, char_budget=1000, max_bytes=32 * 1024)
+        self.assertEqual(text, "Acme builds robots.")
+        self.assertEqual(stats["bytes_read"], 32 * 1024)
+        # The compressed length says nothing about the decoded body
+        self.assertIsNone(stats["bytes_skipped"])
+
+    def test_multibyte_characters_split_across_chunks(self):
+        body = html_page(["Zürich " * 5000]).encode("utf-8")
+        text, _ = extract_paragraphs(StreamedResponse(body), char_budget=100_000, max_bytes=1 << 20)
+        self.assertNotIn("\ufffd", text)
+        self.assertEqual(text.count("Zürich"), 5000)
+
+
+def legacy_clean(text, limit):
+    """The cleaning chain ``TextCleaner`` replaced."""
+    return remove_duplicates(truncate_text(clean_irrelevant_content(clean_text(text)), limit))
+
+
+class TextCleanerTests(SimpleTestCase):
+    def test_default_cleaners_are_built_once_per_limit(self):
+        text = "Acme builds robots. Acme builds robots. Contact us for more."
+        with mock.patch("research_agent.format_result.TextCleaner", wraps=TextCleaner) as build:
+            first = clean_scraped_text(text, limit=None)
+            clean_scraped_text(text, limit=None)
+            clean_scraped_text(text, limit=12345)
+            clean_scraped_text(text, limit=12345)
+        self.assertEqual(first, TextCleaner(limit=None).clean(text))
+        self.assertLessEqual(build.call_count, 2)
+
+    def test_matches_legacy_chain_when_the_text_fits(self):
+        for seed in range(20):
+            text = make_corpus(0.01, seed=seed, stop_phrase_at=0.5 if seed % 2 else None)
+            for window in (None, 64, 1000):
+                with self.subTest(seed=seed, window=window):
+                    cleaner = TextCleaner(limit=len(text) + 10, window=window)
+                    self.assertEqual(cleaner.clean(text), legacy_clean(text, len(text) + 10))
+
+    def test_matches_legacy_chain_when_no_sentence_repeats(self):
+        rng = random.Random(0)
+        words = "alpha beta gamma delta epsilon zeta eta theta".split()
+        text = " ".join(
+            " ".join(rng.choice(words) for _ in range(rng.randint(3, 9))).capitalize() + f" {i}."
+            for i in range(200)
+        )
+        for limit in (50, 333, 1000, 2999):
+            with self.subTest(limit=limit):
+                self.assertEqual(TextCleaner(limit=limit).clean(text), legacy_clean(text, limit))
+
+    def test_truncation_keeps_unique_sentences_up_to_the_limit(self):
+        # Deduplication runs before the cut, so the output is the longest run of
+        # whole unique sentences that fits, unlike the legacy chain.
+        for seed in range(10):
+            text = make_corpus(0.05, seed=seed)
+            full = TextCleaner(limit=None).clean(text)
+            for limit in (100, 3000):
+                with self.subTest(seed=seed, limit=limit):
+                    cleaned = TextCleaner(limit=limit).clean(text)
+                    first = full.split(". ")[0]
+                    if len(first) + 1 > limit:
+                        # Not even one sentence fits: hard cut, as in the legacy chain
+                        self.assertEqual(cleaned, first[:limit])
+                        continue
+                    self.assertLessEqual(len(cleaned), limit)
+                    self.assertTrue(cleaned.endswith("."))
+                    sentences = cleaned[:-1].split(". ")
+                    self.assertEqual(len(sentences), len(set(sentences)))
+                    self.assertTrue(full.startswith(cleaned[:-1]))
+                    following = full[len(cleaned) - 1:].split(". ")[1]
+                    self.assertGreater(len(cleaned) + 2 + len(following), limit)
+
+    def test_window_size_does_not_change_the_output(self):
+        text = make_corpus(0.05, seed=3, stop_phrase_at=0.8)
+        expected = TextCleaner(limit=None).clean(text)
+        for window in (16, 100, 4096):
+            with self.subTest(window=window):
+                self.assertEqual(TextCleaner(limit=None, window=window).clean(text), expected)
+
+    def test_stops_at_the_first_stop_phrase(self):
+        text = "Acme builds robots[1]. Acme builds robots[2]. It is \n growing. Newsletter. Secret sauce."
+        self.assertEqual(TextCleaner(limit=None).clean(text), "Acme builds robots. It is growing.")
+
+
+class NearDedupTests(SimpleTestCase):
+    PASSAGE = (
+        "Acme operates a fleet of delivery robots in twelve cities across Europe. "
+        "The company raised a large funding round to expand its warehouse automation business."
+    )
+
+    def test_repeated_passage_is_dropped_from_later_texts(self):
+        other = "Acme was founded in 2015 by two engineers. It employs four hundred people."
+        texts, stats = remove_near_duplicates([self.PASSAGE, other + " " + self.PASSAGE])
+        self.assertEqual(texts, [self.PASSAGE, other])
+        self.assertEqual(stats["passages"], 3)
+        self.assertEqual(stats["dropped_passages"], 1)
+        self.assertGreater(stats["tokens_saved"], 0)
+
+    def test_near_duplicate_wording_is_dropped(self):
+        reworded = self.PASSAGE.replace("twelve", "eleven")
+        texts, stats = remove_near_duplicates([self.PASSAGE, reworded])
+        self.assertEqual(texts, [self.PASSAGE, ""])
+        self.assertEqual(stats["dropped_passages"], 1)
+
+    def test_distinct_passages_are_kept(self):
+        texts = [
+            self.PASSAGE,
+            "Quarterly revenue grew on strong demand for cloud services. Margins improved in every region.",
+        ]
+        result, stats = remove_near_duplicates(texts)
+        self.assertEqual(result, texts)
+        self.assertEqual(stats["dropped_passages"], 0)
+
+    def test_empty_input(self):
+        self.assertEqual(remove_near_duplicates([]), ([], {"passages": 0, "dropped_passages": 0, "tokens_saved": 0}))
+        self.assertEqual(remove_near_duplicates([""])[0], [""])
+
+
+class PackContextTests(SimpleTestCase):
+    PAGES = [
+        "Cookies help us improve the site. Accept all cookies to continue. "
+        "Sign up for our newsletter today. Follow us on social media.",
+        "Acme was founded in 1990 and is headquartered in Springfield. "
+        "Acme sells industrial robots and automation services to factory customers. "
+        "The weather was pleasant last weekend. Many people enjoyed the park.",
+    ]
+
+    def test_relevant_passages_win_and_keep_reading_order(self):
+        relevant = (
+            "Acme was founded in 1990 and is headquartered in Springfield. "
+            "Acme sells industrial robots and automation services to factory customers."
+        )
+        budget = count_tokens(relevant) + 2
+        context, stats = pack_context(self.PAGES, "Acme", token_budget=budget)
+        self.assertIn("founded in 1990", context)
+        self.assertNotIn("cookies", context.lower())
+        self.assertLessEqual(stats["tokens"], budget)
+        self.assertEqual(stats["tokens"], count_tokens(context))
+        self.assertLess(stats["packed_passages"], stats["passages"])
+
+    def test_everything_fits_in_a_large_budget(self):
+        context, stats = pack_context(self.PAGES, "Acme", token_budget=10_000)
+        self.assertEqual(stats["packed_passages"], stats["passages"])
+        # Reading order, not score order
+        self.assertTrue(context.startswith("Cookies help us"))
+
+    def test_budget_is_never_exceeded(self):
+        text = " ".join(f"Acme fact number {i} about robots and customers." for i in range(200))
+        for budget in (0, 1, 7, 50, 333):
+            with self.subTest(budget=budget):
+                context, stats = pack_context([text], "Acme", token_budget=budget)
+                self.assertLessEqual(count_tokens(context), budget)
+
+    def test_no_text(self):
+        self.assertEqual(pack_context([], "Acme")[0], "")
+        self.assertEqual(len(bm25_scores([], "Acme")), 0)
+
+
+def research_payload(resources=None):
+    return {
+        "message": "Successfully completed the research for Acme",
+        "Overview": "Acme builds robots.",
+        "Usecases": {"use_cases": [
+            {"title": "Route planning", "explanation": "Plans routes.", "practical_application": ["Faster delivery"]},
+        ]},
+        "Resources": {"use_cases_resources": [
+            {"title": "Route planning", "resources": resources or {"github_repositories": [
+                {"name": "acme/routes", "url": "https://github.com/acme/routes"},
+            ]}},
+        ]},
+    }
+
+
+class ParseRefreshTests(SimpleTestCase):
+    def test_flags(self):
+        for value in (None, False, "", "0", "false", "no"):
+            self.assertEqual(parse_refresh(value), set(), value)
+        for value in (True, "1", "true", "YES"):
+            self.assertEqual(parse_refresh(value), set(STAGES), value)
+
+    def test_stage_names_refresh_every_later_stage(self):
+        self.assertEqual(parse_refresh("resources"), {"resources"})
+        self.assertEqual(parse_refresh("usecases"), {"usecases", "resources"})
+        self.assertEqual(parse_refresh(["resources", "overview"]), set(STAGES))
+        self.assertEqual(parse_refresh(" usecases , resources "), {"usecases", "resources"})
+
+    def test_unknown_stage_is_rejected(self):
+        with self.assertRaises(ValueError):
+            parse_refresh(["overview", "summary"])
+
+
+@override_settings(RESEARCH_PROFILING=True, RESEARCH_PROFILING_PATHS=["/api/main/"], RESEARCH_PROFILING_TOKEN="s3cret")
+class ProfileTriggerTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_token_in_header(self):
+        self.assertTrue(profile_requested(self.factory.get("/api/main/", HTTP_X_PROFILE="s3cret")))
+        self.assertFalse(profile_requested(self.factory.get("/api/main/", HTTP_X_PROFILE="wrong")))
+
+    def test_token_in_query_is_ignored(self):
+        self.assertFalse(profile_requested(self.factory.get("/api/main/?profile=s3cret")))
+
+    def test_other_paths_are_not_profiled(self):
+        self.assertFalse(profile_requested(self.factory.get("/api/history/", HTTP_X_PROFILE="s3cret")))
+
+
+@override_settings(RESEARCH_FRESHNESS=FRESHNESS)
+class ReusableStagesTests(TestCase):
+    def record(self, payload=None, run_id="run1", sources=None):
+        return record_run(run_id, "Acme", payload or research_payload(), sources=sources)
+
+    def test_fresh_run_is_reused_entirely(self):
+        run = self.record()
+        reused_from, reuse = reusable_stages("  ACME ")
+        self.assertEqual(reused_from, run)
+        self.assertEqual(list(reuse), list(STAGES))
+        self.assertEqual(reuse["overview"], "Acme builds robots.")
+
+    def test_nothing_recorded(self):
+        self.assertEqual(reusable_stages("Acme"), (None, {}))
+
+    def test_refresh_drops_the_stage_and_later_ones(self):
+        self.record()
+        _, reuse = reusable_stages("Acme", refresh=parse_refresh("usecases"))
+        self.assertEqual(list(reuse), ["overview"])
+        self.assertEqual(reusable_stages("Acme", refresh=parse_refresh(True)), (None, {}))
+
+    def test_stale_stages_are_not_reused(self):
+        self.record()
+        _, reuse = reusable_stages("Acme", now=timezone.now() + timedelta(days=2))
+        self.assertEqual(list(reuse), ["overview", "usecases"])
+        self.assertEqual(reusable_stages("Acme", now=timezone.now() + timedelta(days=8)), (None, {}))
+
+    def test_resources_need_the_same_sources(self):
+        self.record(sources=["github_repositories"])
+        _, reuse = reusable_stages("Acme", sources=["github_repositories"])
+        self.assertIn("resources", reuse)
+        _, reuse = reusable_stages("Acme", sources=["github_repositories", "research_papers"])
+        self.assertEqual(list(reuse), ["overview", "usecases"])
+
+    def test_failed_lookups_are_retried(self):
+        self.record(research_payload({"github_repositories": [{"error": "timed out"}]}))
+        _, reuse = reusable_stages("Acme")
+        self.assertEqual(list(reuse), ["overview", "usecases"])
+
+    def test_newest_run_is_used(self):
+        self.record()
+        with mock.patch("research_agent.history.timezone.now", return_value=timezone.now() + timedelta(minutes=1)):
+            newer = self.record(run_id="run2")
+        self.assertEqual(reusable_stages("Acme")[0], newer)
+
+    @override_settings(RESEARCH_FRESHNESS=dict(FRESHNESS, usecases=0))
+    def test_zero_window_turns_reuse_off_from_that_stage(self):
+        self.record()
+        _, reuse = reusable_stages("Acme")
+        self.assertEqual(list(reuse), ["overview"])
+
+    @override_settings(RESEARCH_FRESHNESS={"overview": 3600})
+    def test_stages_without_a_window_are_not_reused(self):
+        self.record()
+        _, reuse = reusable_stages("Acme")
+        self.assertEqual(list(reuse), ["overview"])
+
+    def test_empty_use_cases_are_recomputed(self):
+        payload = dict(research_payload(), Usecases={"use_cases": []}, Resources={"use_cases_resources": []})
+        self.record(payload)
+        _, reuse = reusable_stages("Acme")
+        self.assertEqual(list(reuse), ["overview"])
+
+
+class ResultStoreTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patch = mock.patch.object(result_store, "RESULTS_DIR", Path(directory.name))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_save_and_load(self):
+        run_id = result_store.save_result("Acme", research_payload())
+        self.assertEqual(result_store.load_result(run_id), research_payload())
+        self.assertEqual(result_store.latest_run_id("  ACME "), run_id)
+
+    def test_each_save_gets_its_own_run(self):
+        first = result_store.save_result("Acme", research_payload())
+        second = result_store.save_result("Acme", dict(research_payload(), message="again"))
+        self.assertNotEqual(first, second)
+        self.assertEqual(result_store.load_result(first)["message"], research_payload()["message"])
+        self.assertEqual(result_store.latest_run_id("Acme"), second)
+
+    def test_unknown_and_malformed_run_ids(self):
+        self.assertIsNone(result_store.load_result("0" * 32))
+        self.assertIsNone(result_store.load_result("../latest"))
+        self.assertIsNone(result_store.load_result(None))
+
+    def test_results_need_a_run_id_or_company(self):
+        run_id = result_store.save_result("Acme", research_payload())
+        self.assertEqual(self.client.get("/api/results/").status_code, 400)
+        self.assertEqual(self.client.get("/api/download_pdf/").status_code, 400)
+        response = self.client.get("/api/results/", {"company": "acme"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["run_id"], run_id)
+        self.assertEqual(self.client.get(f"/api/results/{run_id}/").status_code, 200)
+        self.assertEqual(self.client.get("/api/results/", {"company": "Globex"}).status_code, 404)
+
+
+class PruneResultsTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patch = mock.patch.object(result_store, "RESULTS_DIR", Path(directory.name))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def save(self, company, age):
+        run_id = result_store.save_result(company, research_payload())
+        stamp = time.time() - age
+        os.utime(result_store._run_path(run_id), (stamp, stamp))
+        return run_id
+
+    def test_pointers_to_pruned_runs_are_removed(self):
+        old = self.save("Acme", age=300)
+        kept = self.save("Globex", age=200)
+        self.save("Acme", age=400)  # newer save, older file: pruned while "latest" points at it
+
+        result_store.prune_results(max_runs=1)
+        self.assertIsNone(result_store.load_result(old))
+        self.assertIsNone(result_store.latest_run_id("Acme"))
+        self.assertEqual(result_store.latest_run_id("Globex"), kept)
+        self.assertEqual(result_store.latest_run_id(), kept)
+
+    def test_latest_is_removed_when_no_run_is_left(self):
+        self.save("Acme", age=0)
+        result_store.prune_results(max_runs=0)
+        self.assertIsNone(result_store.latest_run_id())
+        self.assertIsNone(result_store.latest_run_id("Acme"))
+
+
+@override_settings(RESEARCH_FRESHNESS=FRESHNESS)
+class JobReuseTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patch = mock.patch.object(jobs, "JOBS_DIR", Path(directory.name))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def run_job(self, reused_from, reuse):
+        events = []
+        job = jobs.Job("Acme")
+        with mock.patch.object(jobs, "save_result", return_value="f" * 32) as save:
+            jobs._run(job, lambda event, data: events.append(event), reuse, reused_from)
+        return job, events, save
+
+    def test_fully_reused_run_is_not_stored_again(self):
+        run = record_run("a" * 32, "Acme", research_payload())
+        job, events, save = self.run_job(*reusable_stages("Acme"))
+        self.assertEqual((job.status, job.run_id), ("succeeded", run.run_id))
+        self.assertEqual(events[-1], "done")
+        save.assert_not_called()
+        self.assertEqual(ResearchRun.objects.count(), 1)
+        self.assertEqual(job.to_dict()["result"]["Overview"], "Acme builds robots.")
+
+
+class Lookup:
+    """Provider fetch that answers from a script of ``(outcome, delay)`` steps, one per call."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def step(self):
+        with self.lock:
+            outcome, delay = self.script[min(self.calls, len(self.script) - 1)]
+            self.calls += 1
+            return self.calls, outcome, delay
+
+    @staticmethod
+    def answer(number, outcome):
+        if outcome == "raise":
+            raise ValueError(f"call {number} failed")
+        if outcome == "error":
+            return [{"error": f"call {number} failed"}]
+        return [{"name": f"call {number}"}]
+
+    def __call__(self, query):
+        number, outcome, delay = self.step()
+        time.sleep(delay)
+        return self.answer(number, outcome)
+
+    async def run_async(self, query):
+        number, outcome, delay = self.step()
+        await asyncio.sleep(delay)
+        return self.answer(number, outcome)
+
+
+class ProviderTests(SimpleTestCase):
+    def provider(self, lookup, **kwargs):
+        return Provider("test", lookup, fetch_async=lookup.run_async, **kwargs)
+
+    def test_breaker_opens_after_consecutive_failures(self):
+        lookup = Lookup(("raise", 0))
+        provider = self.provider(lookup, failure_threshold=2, reset_after=60)
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                provider.call("q")
+        with self.assertRaises(CircuitOpen):
+            provider.call("q")
+        self.assertEqual(lookup.calls, 2)
+        self.assertEqual(provider.breaker.state, "open")
+        self.assertEqual(provider.stats["short_circuits"], 1)
+
+    def test_error_results_count_as_failures(self):
+        provider = self.provider(Lookup(("error", 0)), failure_threshold=2)
+        provider.call("q")
+        provider.call("q")
+        self.assertEqual(provider.stats["failures"], 2)
+        self.assertEqual(provider.breaker.state, "open")
+
+    def test_trial_call_closes_or_reopens_the_circuit(self):
+        lookup = Lookup(("raise", 0), ("raise", 0), ("ok", 0))
+        provider = self.provider(lookup, failure_threshold=1, reset_after=0.05)
+        with self.assertRaises(ValueError):
+            provider.call("q")
+        time.sleep(0.06)
+        self.assertEqual(provider.breaker.state, "half_open")
+        with self.assertRaises(ValueError):
+            provider.call("q")  # the trial fails and re-opens the circuit
+        with self.assertRaises(CircuitOpen):
+            provider.call("q")
+        time.sleep(0.06)
+        self.assertEqual(provider.call("q"), [{"name": "call 3"}])
+        self.assertEqual(provider.breaker.state, "closed")
+
+    def test_only_one_trial_call_while_half_open(self):
+        provider = self.provider(Lookup(("raise", 0), ("ok", 0.1)), failure_threshold=1, reset_after=0.05)
+        with self.assertRaises(ValueError):
+            provider.call("q")
+        time.sleep(0.06)
+        trial = threading.Thread(target=provider.call, args=("q",))
+        trial.start()
+        time.sleep(0.02)
+        with self.assertRaises(CircuitOpen):
+            provider.call("q")
+        trial.join()
+        self.assertEqual(provider.breaker.state, "closed")
+
+    def call_both_ways(self, script, **kwargs):
+        """Outcome of the same scripted call through ``call`` and ``call_async``."""
+        outcomes = []
+        for mode in ("sync", "async"):
+            provider = self.provider(Lookup(*script), **kwargs)
+            try:
+                result = provider.call("q") if mode == "sync" else asyncio.run(provider.call_async("q"))
+            except Exception as e:
+                result = e
+            outcomes.append((result, provider.stats))
+        return outcomes
+
+    def test_hedge_answers_a_slow_primary(self):
+        for result, stats in self.call_both_ways([("ok", 0.5), ("ok", 0)], timeout=2, hedge_after=0.05):
+            self.assertEqual(result, [{"name": "call 2"}])
+            self.assertEqual(stats["hedges"], 1)
+
+    def test_hedge_wins_over_a_primary_that_fails_later(self):
+        for script in ([("raise", 0.15), ("ok", 0.15)], [("error", 0.15), ("ok", 0.15)]):
+            for result, stats in self.call_both_ways(script, timeout=2, hedge_after=0.05):
+                self.assertEqual(result, [{"name": "call 2"}], script)
+                self.assertEqual(stats["failures"], 0)
+
+    def test_fast_failure_is_not_hedged(self):
+        for result, stats in self.call_both_ways([("raise", 0), ("ok", 0)], timeout=2, hedge_after=0.05):
+            self.assertIsInstance(result, ValueError)
+            self.assertEqual(stats["hedges"], 0)
+
+    def test_timeout(self):
+        for result, stats in self.call_both_ways([("ok", 1)], timeout=0.1):
+            self.assertIsInstance(result, ProviderTimeout)
+            self.assertEqual(stats["timeouts"], 1)
+            self.assertEqual(stats["failures"], 1)
+
+    def test_hung_calls_do_not_exhaust_the_pool(self):
+        provider = self.provider(Lookup(("ok", 1), ("ok", 1), ("ok", 0)), timeout=0.05, concurrency=1,
+                                 failure_threshold=10)
+        for _ in range(2):
+            with self.assertRaises(ProviderTimeout):
+                provider.call("q")
+        self.assertEqual(provider.call("q"), [{"name": "call 3"}])
+        self.assertGreaterEqual(provider.stats["pool_replacements"], 1)
+
+
+class ParseCompaniesTests(SimpleTestCase):
+    def test_names_and_objects(self):
+        self.assertEqual(bulk.parse_companies([" Acme ", {"name": "Globex"}]), ["Acme", "Globex"])
+        self.assertEqual(bulk.parse_companies("Acme, Globex\nInitech"), ["Acme", "Globex", "Initech"])
+
+    def test_malformed_items_are_rejected(self):
+        for value in ([{"name": "X"}, None], ["Acme", ""], [{"id": 1}], [{"name": 5}], {"name": "Acme"}):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                bulk.parse_companies(value)
+
+
+class BulkResumeTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = Path(directory.name) / "out.jsonl"
+        self.researched = []
+        for name, value in (
+            ("run_research", lambda company, sources=None: self.researched.append(company) or research_payload()),
+            ("save_result", lambda company, result: "f" * 32),
+            ("record_run", lambda *args: None),
+        ):
+            patch = mock.patch.object(bulk, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def records(self):
+        with open(self.output, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def run_bulk(self, companies):
+        with mock.patch("builtins.print"):
+            return bulk.run_bulk(companies, self.output, workers=2)
+
+    def test_finished_companies_are_skipped(self):
+        self.run_bulk(["Acme", "Globex"])
+        self.researched.clear()
+        summary = self.run_bulk(["Acme", "Globex", "Initech"])
+        self.assertEqual(self.researched, ["Initech"])
+        self.assertEqual(summary, {"total": 3, "skipped": 2, "succeeded": 1, "failed": 0})
+        self.assertEqual(len(self.records()), 3)
+
+    def test_failed_companies_are_retried(self):
+        with mock.patch.object(bulk, "run_research", side_effect=RuntimeError("boom")):
+            self.assertEqual(self.run_bulk(["Acme"])["failed"], 1)
+        self.assertEqual(self.run_bulk(["Acme"])["succeeded"], 1)
+        self.assertEqual(self.researched, ["Acme"])
+
+    def test_truncated_last_line_is_ignored_and_terminated(self):
+        self.output.write_text(
+            json.dumps({"company": "Acme", "status": "succeeded"}) + "\n" + '{"company": "Globex", "sta',
+            encoding="utf-8",
+        )
+        summary = self.run_bulk(["Acme", "Globex"])
+        self.assertEqual(self.researched, ["Globex"])
+        self.assertEqual(summary["skipped"], 1)
+        lines = self.output.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(json.loads(lines[-1])["company"], "Globex")
+        self.assertEqual(lines[1], '{"company": "Globex", "sta')
+
+    def test_duplicate_names_are_researched_once(self):
+        summary = self.run_bulk(["Acme", " acme ", "ACME"])
+        self.assertEqual(self.researched, ["Acme"])
+        self.assertEqual(summary, {"total": 3, "skipped": 2, "succeeded": 1, "failed": 0})
+
+
+class SemanticCacheTests(SimpleTestCase):
+    def test_similar_titles_share_resources(self):
+        cache = SemanticCache(max_entries=10, threshold=0.8)
+        cache.store("Fraud detection in card payments", {"github": ["repo"]})
+        bundle, similarity = cache.lookup("Card payment fraud detection")
+        self.assertEqual(bundle, {"github": ["repo"]})
+        self.assertGreaterEqual(similarity, 0.8)
+
+    def test_titles_below_the_threshold_miss(self):
+        cache = SemanticCache(max_entries=10, threshold=0.8)
+        cache.store("Fraud detection in card payments", {"github": ["repo"]})
+        self.assertIsNone(cache.lookup("Demand forecasting for retail stores"))
+        self.assertIsNone(cache.lookup("Fraud detection in insurance claims"))
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_entries_expire(self):
+        cache = SemanticCache(max_entries=10, ttl=60)
+        with mock.patch("time.time", return_value=1000.0):
+            cache.store("Fraud detection", {"github": ["repo"]})
+        with mock.patch("time.time", return_value=1059.0):
+            self.assertIsNotNone(cache.lookup("Fraud detection"))
+        with mock.patch("time.time", return_value=1061.0):
+            self.assertIsNone(cache.lookup("Fraud detection"))
+
+    def test_merged_fields_keep_their_own_age(self):
+        cache = SemanticCache(max_entries=10, ttl=60)
+        with mock.patch("time.time", return_value=1000.0):
+            cache.store("Fraud detection", {"github": ["repo"], "arxiv": ["paper"]})
+        with mock.patch("time.time", return_value=1050.0):
+            cache.store("Fraud detection", {"github": ["newer repo"]})
+        with mock.patch("time.time", return_value=1070.0):
+            bundle, _ = cache.lookup("Fraud detection")
+        self.assertEqual(bundle, {"github": ["newer repo"]})
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_term_matrix_grows_with_entries(self):
+        cache = SemanticCache(max_entries=1000)
+        self.assertEqual(len(cache._tf), 0)
+        for index in range(70):
+            cache.store(f"Topic number{index}", {"github": [index]})
+        self.assertEqual(len(cache._tf), 128)
+        self.assertEqual(cache.lookup("Topic number3")[0], {"github": [3]})
+
+    def test_full_cache_overwrites_the_oldest_entry(self):
+        cache = SemanticCache(max_entries=2)
+        for title in ("Fraud detection", "Demand forecasting", "Churn prediction"):
+            cache.store(title, {"github": [title]})
+        self.assertIsNone(cache.lookup("Fraud detection"))
+        self.assertEqual(cache.lookup("Churn prediction")[0], {"github": ["Churn prediction"]})
+
+
+def paper(ref, name, updated, description=""):
+    return {"ref": ref, "name": name, "url": f"https://arxiv.org/abs/{ref}", "description": description,
+            "updated": updated}
+
+
+class ResourceIndexTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        index = resource_index.ResourceIndex(self.directory / "index.sqlite3")
+        for patch in (
+            mock.patch.object(resource_index, "_index", index), mock.patch.object(resource_index, "_stats", {}),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.index = index
+
+    def test_ingest_snapshot(self):
+        path = self.directory / "snapshot.jsonl"
+        rows = [
+            dict(paper("2401.00001", "Graph neural networks for fraud detection", "2024-01-02"),
+                 source="research_papers"),
+            {"source": "kaggle_datasets", "ref": "acme/transactions", "name": "acme/transactions",
+             "url": "https://www.kaggle.com/datasets/acme/transactions", "description": "Card fraud transactions"},
+            dict(paper("2401.00001", "Graph neural networks for fraud detection (revised)", "2024-02-01"),
+                 source="research_papers"),
+        ]
+        path.write_text("\n".join(json.dumps(row) for row in rows) + "\n\n", encoding="utf-8")
+        written = resource_index.ingest_snapshot(path, batch_size=1)
+        self.assertEqual(written, {"research_papers": 2, "kaggle_datasets": 1})
+        # Re-ingesting a ref updates its row in place
+        self.assertEqual(self.index.count("research_papers"), 1)
+        self.assertEqual(self.index.count(), 2)
+
+    def test_ingest_snapshot_rejects_unknown_sources(self):
+        path = self.directory / "snapshot.jsonl"
+        path.write_text(json.dumps({"source": "pypi", "ref": "x", "name": "x", "url": "x"}) + "\n", encoding="utf-8")
+        with self.assertRaises(ValueError):
+            resource_index.ingest_snapshot(path)
+
+    def test_search_local_hit_and_miss(self):
+        self.index.upsert("research_papers", [
+            paper("2401.00001", "Graph neural networks for fraud detection", "2024-01-02"),
+            paper("2401.00002", "Demand forecasting with transformers", "2024-01-03"),
+        ])
+        self.assertEqual(
+            resource_index.search_local("research_papers", "fraud detection"),
+            [("Graph neural networks for fraud detection", "https://arxiv.org/abs/2401.00001")],
+        )
+        # Every word must match, and other sources are not searched
+        self.assertIsNone(resource_index.search_local("research_papers", "fraud forecasting"))
+        self.assertIsNone(resource_index.search_local("kaggle_datasets", "fraud"))
+        self.assertIsNone(resource_index.search_local("research_papers", "!!"))
+        self.assertEqual(resource_index.index_stats()["research_papers"], {"hits": 1, "misses": 2})
+
+    def refresh(self, rows, **kwargs):
+        calls = []
+
+        def crawler(since, max_items):
+            calls.append(since)
+            for row in rows[:max_items]:
+                if since and row["updated"] <= since:
+                    return
+                yield row
+
+        with mock.patch.dict(resource_index.CRAWLERS, {"research_papers": crawler}), mock.patch("builtins.print"):
+            written = resource_index.refresh_source("research_papers", **kwargs)
+        return written, calls[0]
+
+    def test_refresh_moves_the_cursor_after_a_complete_crawl(self):
+        rows = [paper(f"2401.0000{i}", f"Paper {i}", f"2024-01-0{i}") for i in (3, 2, 1)]
+        self.assertEqual(self.refresh(rows, max_items=10), (3, None))
+        self.assertEqual(self.index.get_cursor("research_papers"), "2024-01-03")
+
+        newer = [paper("2401.00004", "Paper 4", "2024-01-04")] + rows
+        self.assertEqual(self.refresh(newer, max_items=10), (1, "2024-01-03"))
+        self.assertEqual(self.index.get_cursor("research_papers"), "2024-01-04")
+
+    def test_refresh_cut_off_at_max_items_keeps_the_cursor(self):
+        self.index.set_cursor("research_papers", "2024-01-01")
+        rows = [paper(f"2401.0000{i}", f"Paper {i}", f"2024-01-0{i}") for i in (5, 4, 3, 2)]
+        self.assertEqual(self.refresh(rows, max_items=2), (2, "2024-01-01"))
+        self.assertEqual(self.index.get_cursor("research_papers"), "2024-01-01")
+        # A full refresh starts from scratch and always records where it got to
+        self.assertEqual(self.refresh(rows, max_items=2, full=True), (2, None))
+        self.assertEqual(self.index.get_cursor("research_papers"), "2024-01-05")
+
+
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patches = [
+            mock.patch.object(rate_limit, "RATE_LIMIT_DIR", Path(directory.name)),
+            mock.patch.dict(rate_limit.DEFAULT_LIMITS, {"test": (60, 2)}),
+            mock.patch.object(rate_limit, "_stats", {}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        rate_limit._override_limit.cache_clear()
+        self.now = 1000.0
+        time_patch = mock.patch.object(rate_limit.time, "time", side_effect=lambda: self.now)
+        time_patch.start()
+        self.addCleanup(time_patch.stop)
+
+    def test_burst_then_quota_rate(self):
+        waits = [rate_limit._take_token("test", max_wait=10) for _ in range(4)]
+        # Two tokens in the bucket, then one per second at 60/min; queued calls reserve later slots
+        self.assertEqual(waits, [0.0, 0.0, 1.0, 2.0])
+        self.now += 5
+        self.assertEqual(rate_limit._take_token("test", max_wait=10), 0.0)
+        self.assertEqual(rate_limit.rate_limit_stats()["test"]["waited_calls"], 2)
+
+    def test_long_waits_are_rejected_without_taking_a_token(self):
+        for _ in range(2):
+            rate_limit._take_token("test", max_wait=0)
+        with self.assertRaises(rate_limit.RateLimited) as raised:
+            rate_limit._take_token("test", max_wait=0)
+        self.assertEqual(raised.exception.retry_after, 1)
+        self.now += 1
+        self.assertEqual(rate_limit._take_token("test", max_wait=0), 0.0)
+        self.assertEqual(rate_limit.rate_limit_stats()["test"]["rejected"], 1)
+
+    def test_overrides(self):
+        with mock.patch.dict(os.environ, {"RATE_LIMIT_TEST": "120/4"}):
+            self.assertEqual(rate_limit.get_limit("test"), (120.0, 4.0))
+        with mock.patch.dict(os.environ, {"RATE_LIMIT_TEST": "0"}):
+            self.assertEqual(rate_limit._take_token("test", max_wait=0), 0.0)
+
+    def test_malformed_override_falls_back_to_the_default(self):
+        for value in ("abc", "30/0", "-5", "inf/2"):
+            with self.subTest(value=value), mock.patch.dict(os.environ, {"RATE_LIMIT_TEST": value}):
+                with self.assertLogs("research_agent.rate_limit", "WARNING"):
+                    self.assertEqual(rate_limit.get_limit("test"), (60, 2))
+                # Reported once per value
+                with self.assertNoLogs("research_agent.rate_limit", "WARNING"):
+                    self.assertEqual(rate_limit.get_limit("test"), (60, 2))
+
+
+def arxiv_feed(*papers):
+    entries = "".join(
+        f"<entry><id>http://arxiv.org/abs/{ref}</id><title>{title}</title><summary>{summary}</summary></entry>"
+        for ref, title, summary in papers
+    )
+    return f'<feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>'
+
+
+class ArxivBatchTests(SimpleTestCase):
+    FEED = arxiv_feed(
+        ("2401.00001", "Graph networks for fraud detection", "Detecting card fraud with graphs."),
+        ("2401.00002", "Forecasting retail demand", "Transformers forecast store sales."),
+        ("2401.00003", "Fraudulent claims in insurance", "Detection of fraudulent claims."),
+    )
+
+    def test_batched_query(self):
+        clauses = {"Fraud detection": ["fraud", "detection"], "Demand forecasting": ["demand", "forecasting"]}
+        search_query, params = resources_main._arxiv_batch_query(clauses)
+        self.assertEqual(search_query, "(all:fraud AND all:detection) OR (all:demand AND all:forecasting)")
+        self.assertEqual(params["max_results"], 2 * resources_main.ARXIV_BATCH_RESULTS)
+
+    def test_clause_words(self):
+        self.assertEqual(
+            resources_main._arxiv_clause_words("AI-based Fraud Detection for Online Payments and Refunds"),
+            ["fraud", "detection", "online", "payments"],
+        )
+
+    def test_papers_are_assigned_to_every_matching_query(self):
+        clauses = {
+            "Fraud detection": ["fraud", "detection"],
+            "Demand forecasting": ["demand", "forecasting"],
+            "Protein folding": ["protein", "folding"],
+        }
+        results = resources_main._arxiv_batch_assign({}, clauses, self.FEED, limit=5)
+        # "fraud"/"detection" match "fraudulent"/"detecting" by their first five letters, as arXiv stems them
+        self.assertEqual([paper["url"] for paper in results["Fraud detection"]], [
+            "http://arxiv.org/abs/2401.00001", "http://arxiv.org/abs/2401.00003",
+        ])
+        self.assertEqual(results["Demand forecasting"][0]["title"], "Forecasting retail demand")
+        self.assertEqual(results["Protein folding"], [{"message": "No papers found"}])
+        limited = resources_main._arxiv_batch_assign({}, clauses, self.FEED, limit=1)
+        self.assertEqual(len(limited["Fraud detection"]), 1)
+
+    def test_one_request_answers_every_query(self):
+        with mock.patch.object(resources_main, "cached_fetch", return_value=self.FEED) as fetch:
+            results = resources_main.search_arxiv_papers_batch(
+                ["Fraud detection", "Demand forecasting", "the and"], mode="live",
+            )
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(len(results["Fraud detection"]), 2)
+        self.assertEqual(len(results["Demand forecasting"]), 1)
+        # No content words: nothing to search for
+        self.assertEqual(results["the and"], [{"message": "No papers found"}])
+
+    def test_failed_batch_marks_every_query(self):
+        with mock.patch.object(resources_main, "cached_fetch", side_effect=requests.ConnectionError("down")):
+            results = resources_main.search_arxiv_papers_batch(["Fraud detection", "Demand forecasting"], mode="live")
+        self.assertTrue(all("error" in papers[0] for papers in results.values()))
+
+    def test_distinct_queries_are_split_into_batches(self):
+        titles = [f"Topic{i} analysis" for i in range(7)] + ["topic0  ANALYSIS", "Topic1 analysis"]
+        with (
+            mock.patch.object(resources_main, "get_semantic_cache", return_value=SemanticCache(max_entries=0)),
+            mock.patch("builtins.print"),
+        ):
+            collection = resources_main._ResourceCollection(
+                {"use_cases": [{"title": title} for title in titles]}, sources=["research_papers"],
+            )
+        batches = [arg for _, _, batched, arg in collection.tasks if batched]
+        self.assertEqual([len(batch) for batch in batches], [5, 2])
+        self.assertEqual(len({title.lower() for batch in batches for title in batch}), 7)
+        # Duplicate titles wait on the same lookup and get its result
+        collection.finish({key: {title: [{"title": title}] for title in arg} for key, _, _, arg in collection.tasks})
+        self.assertEqual(collection.finished[(7, "research_papers")], [{"title": "Topic0 analysis"}])
+
+
+def stub_resources(use_cases, on_usecase=None, sources=None):
+    entries = research_payload()["Resources"]["use_cases_resources"]
+    for index, entry in enumerate(entries):
+        if on_usecase is not None:
+            on_usecase(index, entry)
+    return {"use_cases_resources": entries}
+
+
+async def stub_resources_async(use_cases, on_usecase=None, sources=None):
+    return stub_resources(use_cases, on_usecase, sources)
+
+
+async def stub_async(value):
+    return value
+
+
+class StubPipelineMixin:
+    """Runs the views against canned stage outputs, with nothing read from or written to the history."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        payload = research_payload()
+        self.fail_overview = False
+
+        def overview(company_name):
+            if self.fail_overview:
+                raise RuntimeError("search is down")
+            return payload["Overview"]
+
+        patches = [
+            mock.patch.dict(pipeline._STAGE_FUNCTIONS, {
+                "overview": overview,
+                "usecases": lambda company_name, overview: payload["Usecases"],
+                "resources": stub_resources,
+            }),
+            mock.patch.dict(pipeline._STAGE_FUNCTIONS_ASYNC, {
+                "overview": lambda company_name: stub_async(overview(company_name)),
+                "usecases": lambda company_name, overview: stub_async(payload["Usecases"]),
+                "resources": stub_resources_async,
+            }),
+            mock.patch.object(result_store, "RESULTS_DIR", Path(directory.name)),
+            mock.patch.object(jobs, "JOBS_DIR", Path(directory.name) / "jobs"),
+            mock.patch.object(views, "reusable_stages", return_value=(None, {})),
+            mock.patch.object(views, "record_run"),
+            mock.patch.object(jobs, "record_run"),
+            mock.patch("builtins.print"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+
+class StreamingViewTests(StubPipelineMixin, SimpleTestCase):
+    def stream(self, fmt):
+        response = self.client.post(f"/api/main/?stream={fmt}", {"query": "Acme"}, content_type="application/json")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], views.STREAM_CONTENT_TYPES[fmt])
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_ndjson_sends_each_stage_as_it_finishes(self):
+        events = [json.loads(line) for line in self.stream("ndjson").splitlines() if line]
+        self.assertEqual(
+            [event["event"] for event in events], ["job", "overview", "usecases", "resource", "done"],
+        )
+        self.assertEqual(events[1]["data"], "Acme builds robots.")
+        self.assertEqual(events[3]["data"]["index"], 0)
+        run_id = events[-1]["data"]["run_id"]
+        self.assertEqual(result_store.load_result(run_id)["Overview"], "Acme builds robots.")
+
+    def test_sse_framing(self):
+        body = self.stream("sse")
+        self.assertTrue(body.startswith("event: job\ndata: "))
+        self.assertIn('event: overview\ndata: "Acme builds robots."\n\n', body)
+        self.assertTrue(body.rstrip("\n").split("\n\n")[-1].startswith("event: done\n"))
+
+    def test_a_failed_stage_ends_the_stream_with_an_error(self):
+        self.fail_overview = True
+        with self.assertLogs("research_agent.jobs", "ERROR"):
+            events = [json.loads(line) for line in self.stream("ndjson").splitlines() if line]
+        self.assertEqual([event["event"] for event in events], ["job", "error"])
+        self.assertEqual(events[-1]["data"]["error"], "search is down")
+
+
+class AsyncViewTests(StubPipelineMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+
+    def post(self, body, path="/api/main/"):
+        return views.main_async(self.factory.post(path, body, content_type="application/json"))
+
+    async def test_runs_the_pipeline_on_the_event_loop(self):
+        response = await self.post({"query": "Acme"})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(data["Overview"], "Acme builds robots.")
+        self.assertEqual(result_store.load_result(data["run_id"])["Usecases"], research_payload()["Usecases"])
+
+    async def test_malformed_bodies_are_rejected(self):
+        request = self.factory.post("/api/main/", b"{not json", content_type="application/json")
+        self.assertEqual((await views.main_async(request)).status_code, 400)
+        self.assertEqual((await self.post(["Acme"])).status_code, 400)
+        self.assertEqual((await self.post({"query": "Acme", "sources": "nope"})).status_code, 400)
+
+    async def test_quota_errors_answer_503_with_retry_after(self):
+        async def exhausted(company_name):
+            raise rate_limit.RateLimited("google quota exhausted", retry_after=7)
+
+        with mock.patch.dict(pipeline._STAGE_FUNCTIONS_ASYNC, {"overview": exhausted}):
+            response = await self.post({"query": "Acme"})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "7")
+
+    async def test_stream_is_relayed_through_an_async_generator(self):
+        response = await self.post({"query": "Acme", "stream": "ndjson"})
+        self.assertTrue(response.is_async)
+        events = [json.loads(chunk) async for chunk in response.streaming_content if chunk.strip()]
+        self.assertEqual(
+            [event["event"] for event in events], ["job", "overview", "usecases", "resource", "done"],
+        )
+
+    async def test_pdf_download(self):
+        run_id = result_store.save_result("Acme", research_payload())
+        with mock.patch.object(views, "get_pdf_async", return_value=("key", b"%PDF-1.4")):
+            response = await views.download_pdf_async(self.factory.get("/api/download_pdf/", {"run_id": run_id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"%PDF-1.4")
+
+        etag = response["ETag"]
+        request = self.factory.get("/api/download_pdf/", {"run_id": run_id}, headers={"If-None-Match": etag})
+        self.assertEqual((await views.download_pdf_async(request)).status_code, 304)
+        self.assertEqual((await views.download_pdf_async(self.factory.get("/api/download_pdf/"))).status_code, 400)
@@ -0,0 +1,35 @@
+import threading
+
+TOKENIZER_ENCODING = "cl100k_base"
+
+_encoding = None
+_lock = threading.Lock()
+
+
+def get_encoding():
+    """Return the shared tiktoken encoding, or None when it cannot be loaded.
+
+    tiktoken downloads its BPE tables on first use; without network access
+    token counts fall back to an estimate.
+    """
+    global _encoding
+    if _encoding is None:
+        with _lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception as e:
+                    print(f"Tokenizer unavailable, estimating token counts: {e}")
+                    _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text):
+    """Number of tokens in ``text`` (about 4 characters per token without tiktoken)."""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
@@ -1,8 +1,21 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from .views import main, download_pdf
+from .views import main, download_pdf, job_status, result, batch, batch_status, profiles, profile_detail
+from .views import main_async, download_pdf_async, research_history
+
+if settings.RESEARCH_ASYNC_VIEWS:
+    main, download_pdf = main_async, download_pdf_async
 
 urlpatterns = [
     path('main/', main, name="main"),
     path("download_pdf/", download_pdf, name="download_pdf"),
+    path("jobs/<str:job_id>/", job_status, name="job_status"),
+    path("results/", result, name="company_result"),
+    path("results/<str:run_id>/", result, name="result"),
+    path("history/", research_history, name="history"),
+    path("batch/", batch, name="batch"),
+    path("batch/<str:batch_id>/", batch_status, name="batch_status"),
+    path("profiles/", profiles, name="profiles"),
+    path("profiles/<str:profile_id>/", profile_detail, name="profile_detail"),
 ]
@@ -1,31 +1,29 @@
 import os
 import re
 import json
-from google import genai
 from dotenv import load_dotenv
+from .llm import generate_text, generate_text_async
 
 load_dotenv()
 
-# Configure Gemini API key
-GEMINI_API_KEY=os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=GEMINI_API_KEY)
-
-def generate_ai_usecases(company_name, company_summary):
-    """Generates the top 5 relevant AI/ML use cases for the given company in bullet points."""
-    prompt = (
+def _usecase_prompt(company_name, company_summary):
+    return (
         f"Based on the following company summary, suggest the **top 5 most impactful** AI and Machine Learning use cases "
         f"that {company_name} can implement. Provide practical applications aligned with the company's industry and services. "
         f"Format the response as a **clear, structured bullet-point list**, with each use case briefly explained:\n\n{company_summary}"
     )
 
+def generate_ai_usecases(company_name, company_summary):
+    """Generates the top 5 relevant AI/ML use cases for the given company in bullet points."""
+    prompt = _usecase_prompt(company_name, company_summary)
+
     model = "gemini-2.0-flash"
 
-    response = client.models.generate_content(
-        model=model,
-        contents=prompt
-    )
+    return generate_text(prompt, model=model)
 
-    return response.text
+async def generate_ai_usecases_async(company_name, company_summary):
+    """``generate_ai_usecases`` for coroutines."""
+    return await generate_text_async(_usecase_prompt(company_name, company_summary), model="gemini-2.0-flash")
 
 def parse_ai_usecases(text):
     """
@@ -53,6 +51,10 @@ def generate_structured_usecases(company_name, reseach_result):
     use_cases = generate_ai_usecases(company_name, reseach_result)
     return parse_ai_usecases(use_cases)
 
+async def generate_structured_usecases_async(company_name, research_result):
+    use_cases = await generate_ai_usecases_async(company_name, research_result)
+    return parse_ai_usecases(use_cases)
+
 # Example usage
 text = "Here are the top 5 most impactful AI and Machine Learning use cases for Ola Consumer, tailored to their current focus on the Indian market:\n\n*   **1. Dynamic Pricing Optimization & Demand Forecasting:**\n    *   **Explanation:** Predicts real-time demand fluctuations based on factors like location, time of day, weather, events, and historical data.\n    *   **Practical Application:** Enables optimized surge pricing that balances profitability with rider affordability, minimizing user frustration and maximizing driver earnings during peak demand periods (e.g., rush hour, festivals, concerts). This helps to ensure ride availability and efficient resource allocation.\n\n*   **2. Enhanced Route Optimization & ETA Prediction:**\n    *   **Explanation:** Leverages AI to analyze traffic patterns, road conditions, and driver availability to determine the most efficient routes in real-time.\n    *   **Practical Application:** Provides riders with more accurate Estimated Time of Arrival (ETA) predictions, improves driver efficiency by minimizing travel time and fuel consumption, and reduces overall congestion, particularly in heavily populated Indian cities. Could also suggest optimal pick-up/drop-off locations to avoid bottlenecks.\n\n*   **3. Fraud Detection & Driver Monitoring:**\n    *   **Explanation:** Employs Machine Learning algorithms to identify and prevent fraudulent activities, such as fake bookings, inflated fares, and driver collusion.\n    *   **Practical Application:** Protects both riders and drivers from financial losses and ensures a fair and secure platform. This includes using AI to analyze driving behavior (speed, braking, harsh turns) to detect potentially unsafe driving practices, thereby improving rider safety and reducing accident risk.\n\n*   **4. Personalized Recommendations & Customer Support:**\n    *   **Explanation:** Utilizes AI to personalize the rider experience, offering relevant promotions, preferred ride options (e.g., auto, bike, car), and tailored recommendations based on user behavior and preferences.\n    *   **Practical Application:** Enhances customer loyalty and satisfaction by providing a seamless and personalized experience. AI-powered chatbots can also handle routine customer inquiries and resolve issues quickly, freeing up human agents for more complex problems, improving the overall customer support experience.\n\n*   **5. Optimized Driver Allocation & Matching:**\n    *   **Explanation:** Employs Machine Learning to efficiently match riders with available drivers, considering factors like driver location, vehicle type, driver rating, and rider destination.\n    *   **Practical Application:** Reduces rider wait times, increases driver utilization, and improves overall operational efficiency. This can be further enhanced by predicting driver availability based on historical patterns and incentives for drivers to operate in areas with high demand, optimizing the supply-demand balance across the city. This also considers the various service offerings like financial services and cloud kitchen to connect drivers to the closest opportunity (eg: a driver driving someone close to a cloud kitchen can be notified of potential deliveries).\n"
 
@@ -1,15 +1,37 @@
+import asyncio
 import requests
 import os
+import json
+import queue
+import tempfile
+import pstats
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from django.http import FileResponse
+from django.http import FileResponse, HttpResponse
 from rest_framework import status
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
 import logging
 from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from django.contrib.admin.views.decorators import staff_member_required
 from .research_main import *
 from .usecase_main import *
 from .resources_main import *
-from .pdf_generator import generate_pdf
+from .pdf_cache import get_pdf, get_pdf_async, prerender_pdf, payload_hash
+from .pipeline import STAGES, run_research, run_research_async
+from .result_store import save_result, load_result, latest_run_id
+from .jobs import submit_job, get_job, JobQueueFull
+from .providers import select_providers
+from .rate_limit import RateLimited
+from .bulk import BULK_WORKERS, batch_output_path, get_batch, parse_companies, read_companies, submit_batch
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from .profiling import hottest_functions, list_profiles, load_profile, profile_stats_path
+from .history import (
+    HISTORY_PAGE_SIZE, history_page, latest_recorded_run_id, parse_refresh, record_run, reusable_stages, run_payload,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,55 +40,485 @@ def main(request):
     # fetch the company name
     company_name = request.data.get("query", "").strip()
     print(f"Conducting market research: {company_name}")
+
+    # Optional subset of resource providers for this request
+    sources = request.data.get("sources", request.query_params.get("sources"))
+    if sources is not None:
+        try:
+            sources = [provider.name for provider in select_providers(sources)]
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Reuse stages of an earlier run that are still fresh, unless the client forces a refresh
+    try:
+        refresh = parse_refresh(request.data.get("force_refresh", request.query_params.get("force_refresh")))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    reused_from, reuse = reusable_stages(company_name, sources, refresh)
+
+    # Streaming mode: send each stage's output as soon as it is ready
+    stream_format = _stream_format(request.data, request.query_params)
+    if stream_format:
+        return _stream_research(company_name, stream_format, sources, reuse, reused_from)
+
+    # Async mode: queue the run and let the client poll the job endpoint
+    if _is_async(request.data, request.query_params):
+        try:
+            job = submit_job(company_name, sources=sources, reuse=reuse, reused_from=reused_from)
+        except JobQueueFull as e:
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": request.build_absolute_uri(reverse("job_status", args=[job.id])),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    # Everything is fresh: serve the stored run as it is
+    if len(reuse) == len(STAGES):
+        return Response(_stored_response(reused_from, reuse), status=status.HTTP_200_OK,
+                        headers={REUSED_HEADER: ",".join(STAGES)})
+
+    try:
+        response_data = run_research(company_name, sources=sources, reuse=reuse)
+    except RateLimited as e:
+        return _quota_exhausted(e)
+
+    # Store the run so the PDF download and result endpoints can find it by id
+    response_data["run_id"] = save_result(company_name, response_data)
+    record_run(response_data["run_id"], company_name, response_data, sources, reused_from, reuse)
+    prerender_pdf(response_data)
     
-    # Step 1 : Market research
-    research_results = get_summarized_info(company_name)
-    # print(research_results)
-    
-    # Step 2 : AI/Ml use cases generation
-    use_cases = generate_structured_usecases(company_name, research_results)
-    # print(use_cases)
-
-    # Step 3: Generate relevant resources for each usecases
-    resources = collect_resources_for_usecases(use_cases)
-    # print(resources)
-
-    # Prepare response data
-    response_data = {
-        "message": f"Successfully completed the research for {company_name}",
-        "Overview": research_results,
-        "Usecases": use_cases,
-        "Resources": resources
+    return Response(response_data, status=status.HTTP_200_OK, headers={REUSED_HEADER: ",".join(reuse)} if reuse else None)
+
+
+REUSED_HEADER = "X-Research-Reused"  # stages served from an earlier run
+
+
+def _quota_exhausted(e):
+    """503 with ``Retry-After`` for a run stopped by an exhausted upstream quota."""
+    response = JsonResponse({"error": str(e), "retry_after": e.retry_after}, status=503)
+    response["Retry-After"] = str(e.retry_after)
+    return response
+
+
+def _stored_response(run, reuse):
+    return {
+        "message": run.message,
+        "Overview": reuse["overview"],
+        "Usecases": reuse["usecases"],
+        "Resources": reuse["resources"],
+        "run_id": run.run_id,
     }
 
-    # Save response as result.json in the project root
-    project_root = os.path.dirname(os.path.abspath(__file__))  
-    result_file_path = os.path.join(project_root, "result.json")
 
-    with open(result_file_path, "w", encoding="utf-8") as f:
-        json.dump(response_data, f, indent=4, ensure_ascii=False)
-    
-    return Response(response_data, status=status.HTTP_200_OK)
+@csrf_exempt
+@require_POST
+async def main_async(request):
+    """``main`` as a native async view, served in place of it under ASGI (see ``RESEARCH_ASYNC_VIEWS``).
+
+    The pipeline runs on the server's event loop; streaming and background
+    job requests are handed to the job workers exactly as in ``main``.
+    """
+    try:
+        data = json.loads(request.body or b"{}") if request.content_type == "application/json" else request.POST
+    except ValueError:
+        return JsonResponse({"error": "Malformed JSON body"}, status=400)
+    if not hasattr(data, "get"):
+        return JsonResponse({"error": "Request body must be a JSON object"}, status=400)
+
+    company_name = str(data.get("query", "")).strip()
+    print(f"Conducting market research: {company_name}")
+
+    sources = data.get("sources", request.GET.get("sources"))
+    if sources is not None:
+        try:
+            sources = [provider.name for provider in select_providers(sources)]
+        except (TypeError, ValueError) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        refresh = parse_refresh(data.get("force_refresh", request.GET.get("force_refresh")))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    reused_from, reuse = await sync_to_async(reusable_stages)(company_name, sources, refresh)
+
+    stream_format = _stream_format(data, request.GET)
+    if stream_format:
+        return _stream_research_async(company_name, stream_format, sources, reuse, reused_from)
+
+    if _is_async(data, request.GET):
+        try:
+            job = submit_job(company_name, sources=sources, reuse=reuse, reused_from=reused_from)
+        except JobQueueFull as e:
+            return JsonResponse({"error": str(e)}, status=503)
+        return JsonResponse({
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": request.build_absolute_uri(reverse("job_status", args=[job.id])),
+        }, status=202)
+
+    if len(reuse) == len(STAGES):
+        response = JsonResponse(_stored_response(reused_from, reuse), json_dumps_params={"ensure_ascii": False})
+        response[REUSED_HEADER] = ",".join(STAGES)
+        return response
+
+    try:
+        response_data = await run_research_async(company_name, sources=sources, reuse=reuse)
+    except RateLimited as e:
+        return _quota_exhausted(e)
+
+    response_data["run_id"] = await asyncio.to_thread(save_result, company_name, response_data)
+    await sync_to_async(record_run)(response_data["run_id"], company_name, response_data, sources, reused_from, reuse)
+    prerender_pdf(response_data)
+
+    response = JsonResponse(response_data, json_dumps_params={"ensure_ascii": False})
+    if reuse:
+        response[REUSED_HEADER] = ",".join(reuse)
+    return response
+
+
+def _is_async(data, params):
+    """True when the client asked for a background job instead of waiting."""
+    flag = data.get("async", params.get("async", False))
+    return str(flag).lower() in ("1", "true", "yes")
+
+
+STREAM_CONTENT_TYPES = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson",
+}
+STREAM_KEEPALIVE = 15  # seconds between keep-alives while a stage is running
+
+
+def _stream_format(data, params):
+    """Return "sse" or "ndjson" when the client asked for a streaming response."""
+    fmt = data.get("stream", params.get("stream", ""))
+    fmt = str(fmt).lower()
+    return fmt if fmt in STREAM_CONTENT_TYPES else None
+
+
+def _encode_event(fmt, event, data):
+    payload = json.dumps(data, ensure_ascii=False)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {payload}\n\n"
+    return json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n"
+
+
+def _stream_research(company_name, fmt, sources=None, reuse=None, reused_from=None):
+    """Run the pipeline as a background job and relay its events to the client."""
+    events = queue.Queue()
+    try:
+        job = submit_job(
+            company_name, listener=lambda event, data: events.put((event, data)), sources=sources,
+            reuse=reuse, reused_from=reused_from,
+        )
+    except JobQueueFull as e:
+        return JsonResponse({"error": str(e)}, status=503)
+
+    def event_stream():
+        yield _encode_event(fmt, "job", {"job_id": job.id, "query": company_name})
+        while True:
+            try:
+                event, data = events.get(timeout=STREAM_KEEPALIVE)
+            except queue.Empty:
+                yield _keep_alive(fmt)
+                continue
+            chunk, finished = _relay_event(fmt, event, data)
+            if chunk is not None:
+                yield chunk
+            if finished:
+                break
+
+    return _stream_response(event_stream(), fmt)
+
+
+def _stream_research_async(company_name, fmt, sources=None, reuse=None, reused_from=None):
+    """``_stream_research`` for ASGI views.
+
+    Events reach an async generator through the event loop, so every chunk
+    is sent as soon as it is ready. A sync generator would be drained in a
+    thread by Django before the first byte goes out.
+    """
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def listener(event, data):
+        try:
+            loop.call_soon_threadsafe(events.put_nowait, (event, data))
+        except RuntimeError:
+            pass  # the loop is gone, nobody is listening any more
+
+    try:
+        job = submit_job(company_name, listener=listener, sources=sources, reuse=reuse, reused_from=reused_from)
+    except JobQueueFull as e:
+        return JsonResponse({"error": str(e)}, status=503)
+
+    async def event_stream():
+        yield _encode_event(fmt, "job", {"job_id": job.id, "query": company_name})
+        while True:
+            try:
+                event, data = await asyncio.wait_for(events.get(), STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield _keep_alive(fmt)
+                continue
+            chunk, finished = _relay_event(fmt, event, data)
+            if chunk is not None:
+                yield chunk
+            if finished:
+                break
+
+    return _stream_response(event_stream(), fmt)
+
+
+def _keep_alive(fmt):
+    # Keep proxies from closing an idle connection
+    return ": keep-alive\n\n" if fmt == "sse" else "\n"
 
 
-def stream_file(file_path):
-    with open(file_path, "rb") as f:
-        while chunk := f.read(8192):  # Read in 8KB chunks
-            yield chunk
+def _relay_event(fmt, event, data):
+    """Encoded chunk for a job event (None to skip it) and whether it ends the stream."""
+    # Resources were already sent one use case at a time
+    if event == "resources":
+        return None, False
+    return _encode_event(fmt, event, data), event in ("done", "error")
+
+
+def _stream_response(stream, fmt):
+    response = StreamingHttpResponse(stream, content_type=STREAM_CONTENT_TYPES[fmt])
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api_view(['GET'])
+def job_status(request, job_id):
+    """Report per-stage progress of a background run, and its result once finished."""
+    job = get_job(job_id)
+    if job is None:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(job.to_dict(), status=status.HTTP_200_OK)
+
+
+def _requested_run_id(request):
+    """Run id from ?run_id=, else the latest run for ?company=.
+
+    Raises:
+        ValueError: If the request names neither; the newest run overall
+            may belong to someone else.
+    """
+    run_id = request.GET.get("run_id")
+    if run_id:
+        return run_id
+    company = request.GET.get("company", "").strip()
+    if not company:
+        raise ValueError("Pass ?run_id= or ?company=")
+    # The history tables outlive pruned result files and their pointers
+    return latest_run_id(company) or latest_recorded_run_id(company)
+
+
+@api_view(['GET'])
+def result(request, run_id=None):
+    """Return a stored research payload by run id or company name."""
+    try:
+        run_id = run_id or _requested_run_id(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    data = _stored_result(run_id)
+    if data is None:
+        return Response({"error": "Result not found"}, status=status.HTTP_404_NOT_FOUND)
+    data["run_id"] = run_id
+    return Response(data, status=status.HTTP_200_OK)
+
+
+def _stored_result(run_id):
+    """Payload of a run from the result store, rebuilt from the history tables once its file is pruned."""
+    data = load_result(run_id)
+    if data is None and run_id:
+        data = run_payload(run_id)
+    return data
+
+
+@api_view(['GET'])
+def research_history(request):
+    """Recorded runs, newest first; ``?company=`` filters, ``?page=`` and ``?page_size=`` paginate."""
+    try:
+        page = int(request.query_params.get("page", 1))
+        page_size = int(request.query_params.get("page_size", HISTORY_PAGE_SIZE))
+    except ValueError:
+        return Response({"error": "page and page_size must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        data = history_page(request.query_params.get("company"), page, page_size)
+    except InvalidPage as e:
+        return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+    def page_url(number):
+        if number is None:
+            return None
+        params = request.query_params.copy()
+        params["page"] = number
+        return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    data["next"] = page_url(data.pop("next_page"))
+    data["previous"] = page_url(data.pop("previous_page"))
+    for run in data["results"]:
+        run["result_url"] = request.build_absolute_uri(reverse("result", args=[run["run_id"]]))
+    return Response(data, status=status.HTTP_200_OK)
+
+
+def _batch_response(request, state):
+    data = {key: value for key, value in state.items() if key != "companies"}
+    data["status_url"] = request.build_absolute_uri(reverse("batch_status", args=[state["batch_id"]]))
+    data["output_url"] = data["status_url"] + "?download=1"
+    return data
+
+
+@api_view(['POST'])
+def batch(request):
+    """Start a bulk research batch, or resume one with ``batch_id``.
+
+    Companies come from a ``companies`` list (or a string with one name per
+    line or comma) or an uploaded CSV/JSONL ``file``.
+    """
+    batch_id = request.data.get("batch_id")
+    if hasattr(request.data, "getlist") and len(request.data.getlist("companies")) > 1:
+        companies = request.data.getlist("companies")  # repeated form fields
+    else:
+        companies = request.data.get("companies")
+    try:
+        companies = parse_companies(companies)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    upload = request.FILES.get("file")
+    if upload is not None:
+        suffix = os.path.splitext(upload.name)[1].lower()
+        with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+            for chunk in upload.chunks():
+                tmp.write(chunk)
+            tmp.flush()
+            try:
+                companies = read_companies(tmp.name)
+            except ValueError as e:
+                return Response({"error": f"Could not read company list: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    sources = request.data.get("sources")
+    try:
+        workers = max(1, min(int(request.data.get("workers", BULK_WORKERS)), BULK_WORKERS))
+        if sources is not None:
+            sources = [provider.name for provider in select_providers(sources)]
+        state = submit_batch(companies, workers=workers, sources=sources, batch_id=batch_id)
+    except (TypeError, ValueError) as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(_batch_response(request, state), status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+def batch_status(request, batch_id):
+    """Progress of a bulk batch; ``?download=1`` returns its JSONL output so far."""
+    state = get_batch(batch_id)
+    if state is None:
+        return Response({"error": "Batch not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.query_params.get("download"):
+        path = batch_output_path(batch_id)
+        if not path.exists():
+            return Response({"error": "No results yet"}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            open(path, "rb"), as_attachment=True, filename=f"research_{batch_id}.jsonl",
+            content_type="application/x-ndjson",
+        )
+    return Response(_batch_response(request, state), status=status.HTTP_200_OK)
+
+
+def metrics(request):
+    """Prometheus scrape endpoint for this worker process."""
+    return HttpResponse(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+@staff_member_required
+def profiles(request):
+    """Newest stored request profiles."""
+    return JsonResponse({"profiles": list_profiles()})
+
+
+@staff_member_required
+def profile_detail(request, profile_id):
+    """Hottest functions of one profile; ``?sort=cumtime&limit=100`` re-ranks, ``?download=1`` returns the pstats dump."""
+    summary = load_profile(profile_id)
+    if summary is None:
+        return JsonResponse({"error": "Profile not found"}, status=404)
+
+    path = profile_stats_path(profile_id)
+    if request.GET.get("download"):
+        if path is None:
+            return JsonResponse({"error": "Profile data not found"}, status=404)
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=f"profile_{profile_id}.prof")
+
+    sort = request.GET.get("sort", "tottime")
+    if sort not in ("tottime", "cumtime"):
+        return JsonResponse({"error": "sort must be tottime or cumtime"}, status=400)
+    if "limit" in request.GET and path is not None:
+        try:
+            limit = max(1, int(request.GET["limit"]))
+        except ValueError:
+            return JsonResponse({"error": "limit must be a number"}, status=400)
+        functions = hottest_functions(pstats.Stats(str(path)), sort, limit)
+    else:
+        functions = summary[f"top_{sort}"]
+
+    summary = {key: value for key, value in summary.items() if key not in ("top_tottime", "top_cumtime")}
+    return JsonResponse(dict(summary, sort=sort, functions=functions))
+
 
 @api_view(['GET'])
 def download_pdf(request):
-    json_file = "research_agent/result.json"
-    file_path = "final_proposal.pdf"  
+    try:
+        data = _stored_result(_requested_run_id(request))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
-    if not os.path.exists(json_file):
-        return JsonResponse({"error": "JSON file not found"}, status=404)
+    if data is None:
+        return JsonResponse({"error": "Result not found"}, status=404)
 
-    generate_pdf(json_file, file_path)
+    # Reports are cached by payload hash, so the hash doubles as the ETag
+    etag = f'"{payload_hash(data)}"'
+    if request.headers.get("If-None-Match") == etag:
+        return HttpResponse(status=304)
 
-    if os.path.exists(file_path):
-        response = StreamingHttpResponse(stream_file(file_path), content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="Research_Report.pdf"'
-        return response
+    try:
+        _, pdf = get_pdf(data)
+    except Exception as e:
+        logger.error(f"Error generating PDF: {e}")
+        return JsonResponse({"error": "Could not generate PDF"}, status=500)
+
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = 'attachment; filename="Research_Report.pdf"'
+    response['ETag'] = etag
+    return response
+
+
+@require_GET
+async def download_pdf_async(request):
+    """``download_pdf`` as a native async view; the report renders without holding a server thread."""
+    try:
+        data = await sync_to_async(lambda: _stored_result(_requested_run_id(request)))()
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    if data is None:
+        return JsonResponse({"error": "Result not found"}, status=404)
+
+    etag = f'"{payload_hash(data)}"'
+    if request.headers.get("If-None-Match") == etag:
+        return HttpResponse(status=304)
+
+    try:
+        _, pdf = await get_pdf_async(data)
+    except Exception as e:
+        logger.error(f"Error generating PDF: {e}")
+        return JsonResponse({"error": "Could not generate PDF"}, status=500)
 
-    return JsonResponse({"error": "File not found"}, status=404)
\ No newline at end of file
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = 'attachment; filename="Research_Report.pdf"'
+    response['ETag'] = etag
+    return response